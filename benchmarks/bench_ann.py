@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import json
+import argparse
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from grevia.search import SpecialtyIndex, AnnSearch, IVFIndex
+from grevia.search.synthetic import SyntheticCatalog
+
+# Recall@k and latency of the IVF / IVF-PQ engine against the exact in-memory search
+parser = argparse.ArgumentParser(description="Benchmark approximate provider search against exact search.")
+parser.add_argument("--providers", type=int, default=20000)
+parser.add_argument("--dimensions", type=int, default=512)
+parser.add_argument("--queries", type=int, default=200)
+parser.add_argument("--top-k", type=int, default=5)
+parser.add_argument("--nlist", type=int, default=None)
+parser.add_argument("--pq-m", type=int, default=0, help="PQ sub-quantizers (0 = IVF-Flat)")
+parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+parser.add_argument("--rerank", type=int, default=200)
+parser.add_argument("--output", help="Write the results as JSON to this file")
+args = parser.parse_args()
+
+catalog = SyntheticCatalog(args.providers, dimensions=args.dimensions)
+index = SpecialtyIndex.from_records(catalog.records())
+queries = catalog.queries(args.queries)
+print(f"Index: {len(index)} specialty rows, {len(index.providers)} providers, {index.dimensions} dimensions")
+
+start = time.perf_counter()
+engine = IVFIndex.build(index.matrix, nlist=args.nlist, pq_m=args.pq_m, rerank=args.rerank)
+print(f"Built IVF with {engine.centroids.shape[0]} lists (pq_m={args.pq_m}) in {time.perf_counter() - start:.1f}s")
+
+
+# Function to time a search method over all queries; returns results and latencies in ms
+def run(method):
+    results, latencies = [], []
+    for q in queries:
+        start = time.perf_counter()
+        results.append(method(q, args.top_k))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return results, np.array(latencies)
+
+
+# Function to compute mean recall@k against the exact results. Many synthetic providers share a specialty,
+# hence a score: a result counts as a hit when it scores at least the k-th exact score, whichever of the
+# tied providers it is (the approximate results are re-ranked exactly, so their scores are comparable).
+def recall(exact, approx, tolerance=1e-6):
+    hits = []
+    for e, a in zip(exact, approx):
+        threshold = min((r[0] for r in e), default=0.0) - tolerance
+        hits.append(min(sum(1 for r in a if r[0] >= threshold), len(e)) / len(e) if e else 1.0)
+    return float(np.mean(hits))
+
+
+report = []
+exact, latencies = run(index.top_providers)
+report.append({"engine": "exact", "recall": 1.0, "p50_ms": float(np.percentile(latencies, 50)),
+               "p95_ms": float(np.percentile(latencies, 95))})
+for nprobe in args.nprobe:
+    search = AnnSearch(index, engine, nprobe=nprobe)
+    approx, latencies = run(search.top_providers)
+    report.append({"engine": f"ivf{'-pq' if args.pq_m else ''} nprobe={nprobe}", "recall": recall(exact, approx),
+                   "p50_ms": float(np.percentile(latencies, 50)), "p95_ms": float(np.percentile(latencies, 95))})
+
+print(f"{'engine':<24}{f'recall@{args.top_k}':>10}{'p50 ms':>10}{'p95 ms':>10}")
+for row in report:
+    print(f"{row['engine']:<24}{row['recall']:>10.3f}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}")
+
+if args.output:
+    with open(args.output, "w") as f:
+        json.dump({"args": vars(args), "results": report}, f, indent=2)
@@ -0,0 +1,38 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from grevia.embeddings import FakeEmbeddingModel, embed_texts
+
+# Compare one-call-per-text embedding (the old embedding_providers.py loop)
+# with the batched, concurrent pipeline against a fake backend with API-like latency
+parser = argparse.ArgumentParser(description="Benchmark the batched embedding pipeline offline.")
+parser.add_argument("--texts", type=int, default=2000)
+parser.add_argument("--duplicates", type=float, default=0.3, help="Fraction of repeated texts")
+parser.add_argument("--latency", type=float, default=0.05, help="Seconds per API call")
+parser.add_argument("--per-text-latency", type=float, default=0.0005, help="Seconds per text in a call")
+parser.add_argument("--workers", type=int, default=4)
+parser.add_argument("--batch-size", type=int, default=256)
+args = parser.parse_args()
+
+n_unique = max(1, int(args.texts * (1 - args.duplicates)))
+texts = [f"specialty text number {i % n_unique} about soil health and carbon farming" for i in range(args.texts)]
+
+model = FakeEmbeddingModel(latency=args.latency, per_text_latency=args.per_text_latency)
+start = time.perf_counter()
+sequential = [model.embed_documents([text])[0] for text in texts]
+sequential_time = time.perf_counter() - start
+sequential_calls = model.calls
+
+model = FakeEmbeddingModel(latency=args.latency, per_text_latency=args.per_text_latency)
+start = time.perf_counter()
+batched, errors = embed_texts(model, texts, max_batch_size=args.batch_size, max_workers=args.workers)
+batched_time = time.perf_counter() - start
+
+assert batched == sequential, "Batched pipeline returned different vectors"
+print(f"Texts: {len(texts)} ({n_unique} unique)")
+print(f"Sequential: {sequential_time:.2f}s, {sequential_calls} calls, {len(texts) / sequential_time:.0f} texts/s")
+print(f"Batched:    {batched_time:.2f}s, {model.calls} calls, {len(texts) / batched_time:.0f} texts/s")
+print(f"Speedup:    {sequential_time / batched_time:.1f}x")
@@ -0,0 +1,59 @@
+import os
+import sys
+import time
+import json
+import argparse
+import folium
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from grevia.maps import build_map, results_hash
+from grevia.search import SpecialtyIndex
+from grevia.search.synthetic import SyntheticCatalog
+
+# Build time and page size of the provider map: one folium Marker per provider (as appTest3.py did)
+# against the clustered map of grevia.maps, for growing numbers of providers.
+parser = argparse.ArgumentParser(description="Benchmark the provider map with per-provider markers vs clustering.")
+parser.add_argument("--providers", type=int, nargs="+", default=[100, 1000, 10000])
+parser.add_argument("--output", help="Write the results as JSON to this file")
+args = parser.parse_args()
+
+
+# Function to build the map the way appTest3.py did: one Marker with a Popup per provider
+def marker_map(results):
+    m = folium.Map(location=[0, 0], zoom_start=2)
+    for similarity, name, url, lat, lon in results:
+        popup_html = f"<b>{name}</b><br>Similarity: {similarity:.4f}<br><a href=\"{url}\" target=\"_blank\">Website</a>"
+        folium.Marker([lat, lon], popup=folium.Popup(popup_html, max_width=200), tooltip=name).add_to(m)
+    return m
+
+
+# Function to time building and rendering a map; returns (build ms, render ms, page size in KB)
+def measure(builder, results):
+    start = time.perf_counter()
+    m = builder(results)
+    built = time.perf_counter()
+    page = m.get_root().render()
+    rendered = time.perf_counter()
+    return (built - start) * 1000, (rendered - built) * 1000, len(page.encode("utf-8")) / 1024
+
+
+report = []
+for n_providers in args.providers:
+    index = SpecialtyIndex.from_records(SyntheticCatalog(n_providers).records())
+    results = [(0.5, name, url, lat, lon) for name, url, lat, lon in index.providers]
+    start = time.perf_counter()
+    results_hash(results)
+    hash_ms = (time.perf_counter() - start) * 1000
+    for engine, builder in (("markers", marker_map), ("clustered", build_map)):
+        build_ms, render_ms, page_kb = measure(builder, results)
+        report.append({"providers": n_providers, "engine": engine, "build_ms": build_ms, "render_ms": render_ms,
+                       "page_kb": page_kb, "hash_ms": hash_ms})
+
+print(f"{'providers':>10}{'engine':>12}{'build ms':>12}{'render ms':>12}{'page KB':>12}{'hash ms':>10}")
+for row in report:
+    print(f"{row['providers']:>10}{row['engine']:>12}{row['build_ms']:>12.1f}{row['render_ms']:>12.1f}"
+          f"{row['page_kb']:>12.0f}{row['hash_ms']:>10.1f}")
+
+if args.output:
+    with open(args.output, "w") as f:
+        json.dump({"args": vars(args), "results": report}, f, indent=2)
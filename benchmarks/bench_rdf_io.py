@@ -0,0 +1,127 @@
+import os
+import sys
+import time
+import json
+import base64
+import random
+import argparse
+import tempfile
+from rdflib import Graph, Literal, Namespace, URIRef
+from rdflib.namespace import RDF, XSD
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from grevia.rdf import KGSnapshots, NTriplesWriter, TurtleWriter, convert, iter_statements, load_graph
+
+# Wall time of KG parsing, loading and conversion to N-Triples against the number of worker processes, on
+# a synthetic providers KG (about 10 triples per provider) written as N-Triples and Turtle, and of loading
+# it back from its snapshot. "rdflib" is the single-threaded Graph.parse (+ Graph.serialize) the
+# graph-merging scripts used to run.
+schema1 = Namespace("http://schema.org/")
+custom = Namespace("http://example.org/custom/")
+ns2 = Namespace("http://example.org/embedding#")
+namespaces = {"schema1": schema1, "custom": custom, "ns2": ns2, "rdf": RDF}
+
+
+# Function to generate the triples of a synthetic providers KG, grouped by subject
+def synthetic_triples(n_triples, n_specialties=2000, dimensions=64, seed=42):
+    rng = random.Random(seed)
+    specialties = [URIRef(f"http://example.org/specialties/topic_{i}") for i in range(n_specialties)]
+    for i, specialty in enumerate(specialties):
+        vector = [rng.gauss(0, 1) for _ in range(dimensions)]
+        yield specialty, RDF.type, URIRef("http://example.org/specialties/Specialty")
+        yield specialty, RDF.value, Literal(f"topic_{i}")
+        packed = base64.b64encode(b"".join(int(v * 1000).to_bytes(4, "little", signed=True) for v in vector))
+        yield specialty, ns2.embedding_value, Literal(packed.decode(), datatype=ns2.float32Base64)
+    for i in range((n_triples - 3 * n_specialties) // 10):
+        provider = URIRef(f"http://example.org/provider/{i}")
+        yield provider, RDF.type, schema1.Organization
+        yield provider, schema1.name, Literal(f"Provider {i}")
+        yield provider, schema1.url, Literal(f"https://provider{i}.example.com")
+        yield provider, schema1.description, Literal(f'Provider "{i}" works on\nsoil, crops and carbon.', lang="en")
+        yield provider, schema1.latitude, Literal(rng.uniform(35, 60), datatype=XSD.double)
+        yield provider, schema1.longitude, Literal(rng.uniform(-10, 30), datatype=XSD.double)
+        for specialty in rng.sample(specialties, 4):
+            yield provider, custom.hasSpecialty, specialty
+
+
+# Function to time fn(); returns (wall seconds, CPU seconds of this process, result). With workers, the
+# CPU time of the main process (reading, decoding, adding to the Graph) bounds the wall time on many cores.
+def timed(fn):
+    start, start_cpu = time.perf_counter(), time.process_time()
+    result = fn()
+    return time.perf_counter() - start, time.process_time() - start_cpu, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark parallel KG parsing and serialization per worker count.")
+    parser.add_argument("--triples", type=int, default=2_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", help="Worker counts (default: 1, 2, 4 and every core)")
+    parser.add_argument("--formats", nargs="+", choices=["nt", "ttl"], default=["nt", "ttl"])
+    parser.add_argument("--dir", help="Directory for the synthetic KG files (default: a temporary directory)")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+    cpus = os.cpu_count() or 1
+    worker_counts = args.workers or sorted({w for w in (1, 2, 4, cpus) if w <= cpus})
+
+    directory = args.dir or tempfile.mkdtemp(prefix="bench_rdf_io_")
+    paths = {}
+    for extension in args.formats:
+        paths[extension] = os.path.join(directory, f"synthetic_{args.triples}.{extension}")
+        if not os.path.exists(paths[extension]):
+            with open(paths[extension], "w", encoding="utf-8") as f:
+                writer = (NTriplesWriter if extension == "nt" else TurtleWriter)(f, namespaces)
+                for triple in synthetic_triples(args.triples):
+                    writer.write(triple)
+                writer.close()
+        print(f"{paths[extension]}: {os.path.getsize(paths[extension]) / 1e6:.0f} MB", flush=True)
+
+    report = []
+    for extension, path in paths.items():
+        out = os.path.join(directory, "out.nt")
+        seconds, cpu, graph = timed(lambda: Graph().parse(path, format="nt" if extension == "nt" else "turtle"))
+        n_triples = len(graph)
+        report.append({"format": extension, "task": "load", "engine": "rdflib", "workers": 1, "seconds": seconds,
+                       "main_cpu_s": cpu})
+        save_seconds, save_cpu, _ = timed(lambda: graph.serialize(destination=out, format="nt"))
+        report.append({"format": extension, "task": "convert", "engine": "rdflib", "workers": 1,
+                       "seconds": seconds + save_seconds, "main_cpu_s": cpu + save_cpu})
+        del graph
+        snapshots = KGSnapshots(tempfile.mkdtemp(prefix="snapshots_", dir=directory))
+        seconds, cpu, _ = timed(lambda: snapshots.load(path, 1))
+        report.append({"format": extension, "task": "snapshot", "engine": "parse+save", "workers": 1,
+                       "seconds": seconds, "main_cpu_s": cpu})
+        seconds, cpu, _ = timed(lambda: snapshots.load(path, 1))
+        report.append({"format": extension, "task": "snapshot", "engine": "load", "workers": 1,
+                       "seconds": seconds, "main_cpu_s": cpu})
+        for workers in worker_counts:
+            seconds, cpu, _ = timed(lambda: sum(1 for _ in iter_statements(path, workers)))
+            report.append({"format": extension, "task": "parse", "engine": "grevia", "workers": workers,
+                           "seconds": seconds, "main_cpu_s": cpu})
+            seconds, cpu, graph = timed(lambda: load_graph(path, workers))
+            report.append({"format": extension, "task": "load", "engine": "grevia", "workers": workers,
+                           "seconds": seconds, "main_cpu_s": cpu})
+            del graph
+            seconds, cpu, _ = timed(lambda: convert(path, out, workers=workers))
+            report.append({"format": extension, "task": "convert", "engine": "grevia", "workers": workers,
+                           "seconds": seconds, "main_cpu_s": cpu})
+            print(f"{extension} x{workers} done", flush=True)
+        for row in report:
+            if row["format"] == extension:
+                row["triples_per_s"] = n_triples / row["seconds"]
+
+    # parse: iter_statements only (speedup against the fewest workers); load: into an rdflib Graph;
+    # convert: to N-Triples; snapshot: the first load parses and saves, the next ones restore
+    # (speedups against rdflib's load)
+    print(f"{'format':>7}{'task':>9}{'engine':>11}{'workers':>9}{'seconds':>10}{'main CPU s':>12}{'triples/s':>12}"
+          f"{'speedup':>9}")
+    for row in report:
+        task = "load" if row["task"] == "snapshot" else row["task"]
+        same = [r for r in report if r["format"] == row["format"] and r["task"] == task]
+        base = next((r for r in same if r["engine"] == "rdflib"), min(same, key=lambda r: r["workers"]))
+        row["speedup"] = base["seconds"] / row["seconds"]
+        print(f"{row['format']:>7}{row['task']:>9}{row['engine']:>11}{row['workers']:>9}{row['seconds']:>10.2f}"
+              f"{row['main_cpu_s']:>12.2f}{row['triples_per_s']:>12.0f}{row['speedup']:>9.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "cpus": cpus, "results": report}, f, indent=2)
@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import json
+import argparse
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from grevia.search import SpecialtyIndex
+from grevia.search.routing import CategoryRouter
+from grevia.search.synthetic import SyntheticCatalog
+
+# Speedup and recall@k of the macro/microcategory-routed search against the full scan.
+# Synthetic specialties get one microcategory per topic, eight microcategories per macrocategory.
+parser = argparse.ArgumentParser(description="Benchmark category-routed provider search against the full scan.")
+parser.add_argument("--providers", type=int, default=20000)
+parser.add_argument("--dimensions", type=int, default=512)
+parser.add_argument("--topics", type=int, default=64, help="Microcategories of the synthetic catalog")
+parser.add_argument("--queries", type=int, default=200)
+parser.add_argument("--top-k", type=int, default=5)
+parser.add_argument("--n-macro", type=int, nargs="+", default=[1, 2, 3, 5])
+parser.add_argument("--n-micro", type=int, nargs="+", default=[4, 8, 16])
+parser.add_argument("--output", help="Write the results as JSON to this file")
+args = parser.parse_args()
+
+catalog = SyntheticCatalog(args.providers, dimensions=args.dimensions, n_topics=args.topics)
+index = SpecialtyIndex.from_records(catalog.records())
+router = CategoryRouter.from_assignments(index, catalog.categories())
+queries = catalog.queries(args.queries)
+print(f"Index: {len(index)} specialty rows, {len(index.providers)} providers, "
+      f"{len(router.macro_names)} macrocategories, {len(router.micro_names)} microcategories")
+
+
+# Function to time a search method over all queries; returns results and latencies in ms
+def run(method, **options):
+    results, latencies = [], []
+    for q in queries:
+        start = time.perf_counter()
+        results.append(method(q, args.top_k, **options))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return results, np.array(latencies)
+
+
+# Function to compute mean recall@k against the full-scan results: a routed result counts as a hit when it
+# scores at least the k-th full-scan score, so providers tied with the last exact one are not counted as misses
+# (routed candidates are scored exactly, so their scores are comparable)
+def recall(exact, routed, tolerance=1e-6):
+    hits = []
+    for e, a in zip(exact, routed):
+        threshold = min((r[0] for r in e), default=0.0) - tolerance
+        hits.append(min(sum(1 for r in a if r[0] >= threshold), len(e)) / len(e) if e else 1.0)
+    return float(np.mean(hits))
+
+
+exact, latencies = run(index.top_providers)
+full_p50 = float(np.percentile(latencies, 50))
+report = [{"engine": "full scan", "recall": 1.0, "rows_scored": 1.0, "p50_ms": full_p50,
+           "p95_ms": float(np.percentile(latencies, 95)), "speedup": 1.0}]
+for n_macro in args.n_macro:
+    for n_micro in args.n_micro:
+        routed, latencies = run(router.top_providers, n_macro=n_macro, n_micro=n_micro)
+        rows = np.mean([
+            router.candidate_rows(q / np.linalg.norm(q), n_macro=n_macro, n_micro=n_micro).size for q in queries
+        ])
+        p50 = float(np.percentile(latencies, 50))
+        report.append({"engine": f"routed macro={n_macro} micro={n_micro}", "recall": recall(exact, routed),
+                       "rows_scored": float(rows / len(index)), "p50_ms": p50,
+                       "p95_ms": float(np.percentile(latencies, 95)), "speedup": full_p50 / p50})
+
+print(f"{'engine':<28}{f'recall@{args.top_k}':>10}{'rows':>8}{'p50 ms':>10}{'p95 ms':>10}{'speedup':>9}")
+for row in report:
+    print(f"{row['engine']:<28}{row['recall']:>10.3f}{row['rows_scored']:>8.1%}{row['p50_ms']:>10.2f}"
+          f"{row['p95_ms']:>10.2f}{row['speedup']:>8.1f}x")
+
+if args.output:
+    with open(args.output, "w") as f:
+        json.dump({"args": vars(args), "results": report}, f, indent=2)
@@ -0,0 +1,186 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import resource
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(ROOT)
+from grevia.search import SpecialtyIndex, AnnSearch, IVFIndex, Neo4jExactSearch, Neo4jVectorSearch, create_vector_index
+from grevia.search.synthetic import SyntheticCatalog, delete_synthetic_nodes
+
+# Latency / throughput / memory benchmark of every provider search backend on synthetic catalogs.
+# Each scale runs in its own process so peak RSS is not inherited from a larger scale.
+BACKENDS = ["legacy", "memory", "ann", "neo4j_vector", "neo4j_exact"]
+
+
+# Function to report the peak resident set size of this process in MB
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+# Function to score queries the way find_top_providers did before the in-memory index
+def legacy_backend(records):
+    def cosine_similarity(vec1, vec2):
+        vec1 = np.array(vec1)
+        vec2 = np.array(vec2)
+        return np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
+
+    def top_providers(query_embedding, top_k=5):
+        matches = {}
+        for record in records:
+            sims = matches.setdefault(record["name"], [])
+            sims.append(cosine_similarity(query_embedding, json.loads(record["embedding"])))
+        scores = sorted(((max(s), name) for name, s in matches.items()), reverse=True)
+        return scores[:top_k]
+
+    return top_providers
+
+
+# Function to time a search function over the query set
+def measure(search, queries, top_k, warmup=3):
+    for q in queries[:warmup]:
+        search(q, top_k)
+    latencies = []
+    start = time.perf_counter()
+    for q in queries:
+        t = time.perf_counter()
+        search(q, top_k)
+        latencies.append((time.perf_counter() - t) * 1000)
+    elapsed = time.perf_counter() - start
+    return {
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "qps": len(queries) / elapsed,
+    }
+
+
+# Function to benchmark every requested backend at one scale (runs in a child process)
+def run_scale(scale, args):
+    catalog = SyntheticCatalog(scale, dimensions=args.dimensions, seed=args.seed)
+    queries = catalog.queries(args.queries, seed=args.seed + 1)
+    results = []
+
+    def record(backend, build_s, stats):
+        row = {"scale": scale, "backend": backend, "build_s": build_s, **stats, "peak_rss_mb": peak_rss_mb()}
+        print(f"  {backend:<13} build {build_s:7.2f}s  p50 {row['p50_ms']:8.2f}ms  p95 {row['p95_ms']:8.2f}ms  "
+              f"p99 {row['p99_ms']:8.2f}ms  {row['qps']:9.1f} q/s  rss {row['peak_rss_mb']:8.0f}MB", flush=True)
+        results.append(row)
+
+    if "legacy" in args.backends and scale <= args.legacy_max:
+        start = time.perf_counter()
+        records = [dict(r, embedding=json.dumps(r["embedding"].tolist())) for r in catalog.records()]
+        search = legacy_backend(records)
+        build_s = time.perf_counter() - start
+        record("legacy", build_s, measure(search, queries[:args.legacy_queries], args.top_k, warmup=0))
+        del records
+
+    index = None
+    if "memory" in args.backends or "ann" in args.backends:
+        start = time.perf_counter()
+        index = SpecialtyIndex.from_records(catalog.records())
+        build_s = time.perf_counter() - start
+        if "memory" in args.backends:
+            record("memory", build_s, measure(index.top_providers, queries, args.top_k))
+        if "ann" in args.backends:
+            start = time.perf_counter()
+            engine = IVFIndex.build(index.matrix, pq_m=args.pq_m)
+            search = AnnSearch(index, engine, nprobe=args.nprobe)
+            record("ann", time.perf_counter() - start, measure(search.top_providers, queries, args.top_k))
+
+    if ("neo4j_vector" in args.backends or "neo4j_exact" in args.backends) and args.neo4j:
+        from neo4j import GraphDatabase
+        driver = GraphDatabase.driver(
+            os.getenv("NEO4J_URI", "bolt://localhost:7687"),
+            auth=(os.getenv("NEO4J_USERNAME", "neo4j"), os.getenv("NEO4J_PASSWORD", "password")),
+        )
+        database = os.getenv("DATABASE_NAME")
+        try:
+            start = time.perf_counter()
+            catalog.load_into_neo4j(driver, database=database)
+            load_s = time.perf_counter() - start
+            if "neo4j_exact" in args.backends:
+                search = Neo4jExactSearch(driver, database=database)
+                record("neo4j_exact", load_s, measure(search.top_providers, queries, args.top_k))
+            if "neo4j_vector" in args.backends:
+                start = time.perf_counter()
+                create_vector_index(driver, database=database, dimensions=args.dimensions)
+                search = Neo4jVectorSearch(driver, database=database)
+                record("neo4j_vector", load_s + time.perf_counter() - start,
+                       measure(search.top_providers, queries, args.top_k))
+        finally:
+            delete_synthetic_nodes(driver, database=database)
+            driver.close()
+
+    return results
+
+
+# Function to print the relative change of every metric against a previous report
+def compare(report, baseline_file):
+    with open(baseline_file, "r") as f:
+        baseline = {(r["scale"], r["backend"]): r for r in json.load(f)["results"]}
+    print(f"\nCompared with {baseline_file}:")
+    for row in report["results"]:
+        old = baseline.get((row["scale"], row["backend"]))
+        if old is None:
+            continue
+        changes = "  ".join(
+            f"{metric} {100 * (row[metric] - old[metric]) / old[metric]:+.1f}%"
+            for metric in ("p50_ms", "p95_ms", "p99_ms", "qps", "peak_rss_mb") if old[metric]
+        )
+        print(f"  {row['scale']:>8} {row['backend']:<13} {changes}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark provider search backends on synthetic catalogs.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Provider counts (1000000 needs roughly 16 GB of RAM)")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=["legacy", "memory", "ann"])
+    parser.add_argument("--neo4j", action="store_true",
+                        help="Also load each catalog into the local Neo4j from the environment (NEO4J_URI, ...)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--dimensions", type=int, default=512)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--pq-m", type=int, default=0)
+    parser.add_argument("--legacy-max", type=int, default=10000, help="Largest scale run through the legacy loop")
+    parser.add_argument("--legacy-queries", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_search.json")
+    parser.add_argument("--compare", help="Previous report to compare with")
+    args = parser.parse_args()
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+
+    report = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "args": vars(args),
+        "results": [],
+    }
+    for scale in args.scales:
+        print(f"Scale {scale} providers:", flush=True)
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            report["results"].extend(pool.submit(run_scale, scale, args).result())
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report saved to {args.output}")
+
+    if args.compare:
+        compare(report, args.compare)
@@ -0,0 +1 @@
+# Shared code for the Grevia scripts and the Streamlit app
@@ -0,0 +1,202 @@
+import argparse
+import asyncio
+import contextlib
+import io
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from grevia.batch import format_chunk, read_queries, search_chunk
+from grevia.search import AGGREGATIONS, BACKENDS, SEARCH_MODES, ProviderSearchService, geo_filter
+
+MAX_TOP_K = 100
+MAX_BATCH_QUERIES = 1000
+BATCH_CHUNK_SIZE = 256
+FILE_MEDIA_TYPES = {"text/csv": "csv", "text/tab-separated-values": "tsv", "application/x-ndjson": "jsonl",
+                    "application/jsonl": "jsonl"}
+
+
+# Function to turn a result tuple into a JSON object
+def result_json(result):
+    similarity, name, url, lat, lon = result
+    return {"similarity": float(similarity), "name": name, "url": url, "lat": lat, "lon": lon}
+
+
+# Function to parse and validate the search options (query string or JSON body)
+def search_options(params):
+    try:
+        top_k = int(params.get("top_k", 5))
+    except (TypeError, ValueError):
+        raise ValueError("'top_k' must be an integer.")
+    if not 1 <= top_k <= MAX_TOP_K:
+        raise ValueError(f"'top_k' must be between 1 and {MAX_TOP_K}.")
+    backend = params.get("backend") or None
+    if backend is not None and backend not in BACKENDS:
+        raise ValueError(f"Unknown search backend: {backend}")
+    per_provider = str(params.get("per_provider", "true")).lower() != "false"
+    aggregation = params.get("aggregation") or None
+    if aggregation is not None and aggregation not in AGGREGATIONS:
+        raise ValueError(f"Unknown aggregation: {aggregation}")
+    mode = params.get("mode") or None
+    if mode is not None and mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode: {mode}")
+    categories = params.get("categories") or None
+    if isinstance(categories, str):
+        categories = [name.strip() for name in categories.split(",") if name.strip()]
+    if categories is not None and not (
+            isinstance(categories, list) and all(isinstance(name, str) for name in categories)):
+        raise ValueError("'categories' must be a list of macrocategory names.")
+    near = None
+    if params.get("lat") is not None or params.get("lon") is not None:
+        try:
+            near = geo_filter(params["lat"], params["lon"], params.get("radius_km"), params.get("nearest"))
+        except (KeyError, TypeError):
+            raise ValueError("A location filter needs 'lat', 'lon' and 'radius_km' or 'nearest'.")
+    return {"top_k": top_k, "backend": backend, "per_provider": per_provider, "aggregation": aggregation,
+            "mode": mode, "categories": categories, "near": near}
+
+
+def create_app(service):
+    """HTTP/JSON API over a ProviderSearchService.
+
+    ``GET /search?q=&top_k=5[&backend=memory|ann|neo4j_vector|neo4j_exact][&per_provider=true]
+    [&aggregation=max|mean|logsumexp|top_m][&mode=semantic|lexical|hybrid|auto][&categories=a,b]
+    [&lat=&lon=&radius_km=&nearest=]``
+    has the same semantics as ``find_top_providers``. ``POST /search/batch``
+    takes ``{"queries": [...]}`` (same options as body fields) and answers in
+    JSON, or a CSV / JSONL file body (``?column=query``) and streams the
+    results back in the same format, chunk by chunk. Handlers are async: the
+    query embedding and the Neo4j vector index are awaited, in-process scoring
+    runs in worker threads, so slow calls never block other requests.
+    ``GET /cache`` reports the hit ratio and memory use of the caches and
+    ``POST /cache/invalidate`` drops the cached results.
+    """
+
+    async def search(request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return JSONResponse({"error": "Missing query parameter 'q'."}, status_code=400)
+        try:
+            options = search_options(request.query_params)
+            results = await service.asearch(query, **options)
+            # The results of a lexical search carry BM25 scores instead of cosine similarities
+            mode = await asyncio.to_thread(service.query_mode, query, options["mode"], options["categories"],
+                                           options["near"])
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        return JSONResponse({
+            "query": query,
+            "top_k": options["top_k"],
+            "backend": options["backend"] or service.backend,
+            "mode": mode,
+            "results": [result_json(result) for result in results],
+        })
+
+    async def search_batch(request):
+        media_type = request.headers.get("content-type", "").split(";")[0].strip()
+        fmt = FILE_MEDIA_TYPES.get(media_type)
+        try:
+            if fmt is None:
+                body = await request.json()
+                if not isinstance(body, dict):
+                    raise ValueError("Expected a JSON object with a 'queries' list.")
+                options = search_options(body)
+                queries = body.get("queries")
+                if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries):
+                    raise ValueError("'queries' must be a list of strings.")
+            else:
+                options = search_options(request.query_params)
+                text = (await request.body()).decode("utf-8")
+                column = request.query_params.get("column", "query")
+                chunks = list(read_queries(io.StringIO(text), fmt, column, chunk_size=BATCH_CHUNK_SIZE))
+                queries = [query for chunk in chunks for _, query in chunk]
+            if len(queries) > MAX_BATCH_QUERIES:
+                raise ValueError(f"At most {MAX_BATCH_QUERIES} queries per batch.")
+            # Checked up front: once a file response streams, its status can no longer be 400
+            await asyncio.to_thread(service.check_search_batch, queries, **options)
+            if fmt is None:
+                results = await asyncio.to_thread(service.search_batch, queries, **options)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+
+        if fmt is None:
+            return JSONResponse({
+                "top_k": options["top_k"],
+                "backend": options["backend"] or service.backend,
+                "results": [
+                    {"query": query, "results": [result_json(result) for result in query_results]}
+                    for query, query_results in zip(queries, results)
+                ],
+            })
+
+        async def stream():
+            for number, chunk in enumerate(chunks):
+                rows = await asyncio.to_thread(search_chunk, service, chunk, **options)
+                yield format_chunk(rows, fmt, header=number == 0)
+
+        return StreamingResponse(stream(), media_type=media_type)
+
+    async def health(request):
+        return JSONResponse({"status": "ok", "backend": service.backend})
+
+    async def list_categories(request):
+        return JSONResponse({"categories": await asyncio.to_thread(lambda: service.categories)})
+
+    async def cache_stats(request):
+        return JSONResponse(service.cache_stats())
+
+    # Called by loader scripts after writing to Neo4j, so cached results are not served until they expire
+    async def invalidate_cache(request):
+        service.invalidate_results()
+        return JSONResponse(service.cache_stats())
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        # Load the in-memory index before accepting requests
+        if service.backend in ("memory", "ann"):
+            await asyncio.to_thread(service.searcher)
+        if service.mode != "semantic":
+            await asyncio.to_thread(lambda: service.lexical)
+        yield
+        await service.aclose()
+
+    return Starlette(
+        routes=[
+            Route("/search", search),
+            Route("/search/batch", search_batch, methods=["POST"]),
+            Route("/categories", list_categories),
+            Route("/cache", cache_stats),
+            Route("/cache/invalidate", invalidate_cache, methods=["POST"]),
+            Route("/health", health),
+        ],
+        lifespan=lifespan,
+    )
+
+
+if __name__ == "__main__":
+    import uvicorn
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Serve the provider search over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--fake", type=int, metavar="N_PROVIDERS",
+                        help="Serve a synthetic catalog with a fake embedder (no OpenAI key or Neo4j needed)")
+    parser.add_argument("--fake-latency", type=float, default=0.05, help="Seconds per fake embedding call")
+    parser.add_argument("--backend", choices=BACKENDS)
+    parser.add_argument("--aggregation", choices=AGGREGATIONS)
+    parser.add_argument("--mode", choices=SEARCH_MODES)
+    parser.add_argument("--result-cache-ttl", type=float, help="Seconds search results are cached (0: no cache)")
+    args = parser.parse_args()
+
+    overrides = {key: value for key, value in (("backend", args.backend), ("aggregation", args.aggregation),
+                                                     ("mode", args.mode)) if value}
+    if args.result_cache_ttl is not None:
+        overrides["result_cache_ttl"] = args.result_cache_ttl
+    if args.fake:
+        service = ProviderSearchService.from_synthetic(args.fake, args.fake_latency, **overrides)
+    else:
+        load_dotenv()
+        service = ProviderSearchService.from_env(use_async_driver=True, **overrides)
+    uvicorn.run(create_app(service), host=args.host, port=args.port)
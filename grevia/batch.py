@@ -0,0 +1,162 @@
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+
+from grevia.search import AGGREGATIONS, BACKENDS, SEARCH_MODES, ProviderSearchService, geo_filter
+
+RESULT_FIELDS = ["id", "query", "rank", "similarity", "name", "url", "lat", "lon"]
+
+
+DELIMITERS = {"csv": ",", "tsv": "\t"}
+
+
+# Function to tell the file format (csv, tsv or jsonl) from a path
+def file_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if extension in (".csv", ".txt"):
+        return "csv"
+    if extension == ".tsv":
+        return "tsv"
+    if extension == ".json":
+        raise ValueError(f"Unsupported file format: {path} (JSON arrays are not streamed; write one object per "
+                         f"line to a .jsonl file)")
+    raise ValueError(f"Unsupported file format: {path} (expected .csv, .tsv or .jsonl)")
+
+
+# Function to read (id, query) pairs from a CSV, TSV or JSONL stream, in chunks of chunk_size
+def read_queries(stream, fmt, column="query", id_column=None, chunk_size=256):
+    if fmt in DELIMITERS:
+        rows = csv.DictReader(stream, delimiter=DELIMITERS[fmt])
+    else:
+        rows = (json.loads(line) for line in stream if line.strip())
+
+    chunk = []
+    for number, row in enumerate(rows, start=1):
+        if column not in row:
+            raise ValueError(f"Row {number} has no '{column}' field")
+        if id_column and id_column not in row:
+            raise ValueError(f"Row {number} has no '{id_column}' field")
+        query = (row[column] or "").strip()
+        if not query:
+            continue
+        chunk.append((row[id_column] if id_column else number, query))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# Function to run one chunk of queries: batched embedding, then one matrix-matrix scoring pass
+def search_chunk(service, chunk, top_k=5, backend=None, per_provider=True, aggregation=None, mode=None,
+                 categories=None, near=None):
+    results = service.search_batch([query for _, query in chunk], top_k, backend, per_provider, aggregation, mode,
+                                   categories, near)
+    return [(query_id, query, query_results) for (query_id, query), query_results in zip(chunk, results)]
+
+
+class ResultWriter:
+    """Writes per-query results as JSONL (one object per query) or CSV/TSV (one row per query and rank)."""
+
+    def __init__(self, stream, fmt, header=True):
+        self.stream = stream
+        self.fmt = fmt
+        if fmt in DELIMITERS:
+            self._csv = csv.writer(stream, delimiter=DELIMITERS[fmt])
+            if header:
+                self._csv.writerow(RESULT_FIELDS)
+
+    def write(self, query_id, query, results):
+        if self.fmt == "jsonl":
+            self.stream.write(json.dumps({
+                "id": query_id,
+                "query": query,
+                "results": [
+                    {"similarity": float(similarity), "name": name, "url": url, "lat": lat, "lon": lon}
+                    for similarity, name, url, lat, lon in results
+                ],
+            }) + "\n")
+        else:
+            for rank, (similarity, name, url, lat, lon) in enumerate(results, start=1):
+                self._csv.writerow([query_id, query, rank, f"{float(similarity):.6f}", name, url, lat, lon])
+
+
+# Function to render results of a chunk as text in the given format (used by the streaming API)
+def format_chunk(rows, fmt, header=False):
+    stream = io.StringIO()
+    writer = ResultWriter(stream, fmt, header)
+    for row in rows:
+        writer.write(*row)
+    return stream.getvalue()
+
+
+def run_batch(service, input_path, output_path, column="query", id_column=None, top_k=5,
+              backend=None, per_provider=True, aggregation=None, mode=None, categories=None, near=None,
+              chunk_size=256):
+    """Match every query of ``input_path`` against the providers and write them to ``output_path``.
+
+    The input is streamed in chunks of ``chunk_size`` queries; each chunk is
+    embedded in batched model calls and scored with a single matrix-matrix
+    product, then written before the next chunk is read. Returns the number
+    of queries processed.
+    """
+    in_fmt, out_fmt = file_format(input_path), file_format(output_path)
+    count = 0
+    start = time.perf_counter()
+    with open(input_path, "r", encoding="utf-8", newline="") as fin, \
+            open(output_path, "w", encoding="utf-8", newline="") as fout:
+        writer = ResultWriter(fout, out_fmt)
+        for chunk in read_queries(fin, in_fmt, column, id_column, chunk_size):
+            for row in search_chunk(service, chunk, top_k, backend, per_provider, aggregation, mode, categories,
+                                    near):
+                writer.write(*row)
+            count += len(chunk)
+            fout.flush()
+            elapsed = time.perf_counter() - start
+            print(f"{count} queries matched ({count / elapsed:.1f} queries/s)", file=sys.stderr, flush=True)
+    return count
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Match a CSV/TSV/JSONL file of queries against the providers.")
+    parser.add_argument("input", help="CSV, TSV or JSONL file with one query per row")
+    parser.add_argument("output", help="CSV, TSV or JSONL file for the results")
+    parser.add_argument("--column", default="query", help="Column / field holding the query text")
+    parser.add_argument("--id-column", help="Column / field identifying the query (default: row number)")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--chunk-size", type=int, default=256, help="Queries embedded and scored per pass")
+    parser.add_argument("--backend", choices=BACKENDS)
+    parser.add_argument("--per-specialty", action="store_true",
+                        help="Rank specialty rows instead of providers (a provider can appear several times)")
+    parser.add_argument("--aggregation", choices=AGGREGATIONS,
+                        help="How a provider's specialty similarities are combined (default: max)")
+    parser.add_argument("--mode", choices=SEARCH_MODES, help="Semantic, lexical (BM25), hybrid or auto search")
+    parser.add_argument("--categories", nargs="+", help="Only match specialties of these macrocategories")
+    parser.add_argument("--near", type=float, nargs=2, metavar=("LAT", "LON"),
+                        help="Only match providers around this location (with --radius-km and/or --nearest)")
+    parser.add_argument("--radius-km", type=float, help="Radius of the --near location filter")
+    parser.add_argument("--nearest", type=int, help="Only match the N providers nearest to --near")
+    parser.add_argument("--fake", type=int, metavar="N_PROVIDERS",
+                        help="Use a synthetic catalog with a fake embedder (no OpenAI key or Neo4j needed)")
+    args = parser.parse_args()
+    near = geo_filter(*args.near, args.radius_km, args.nearest) if args.near else None
+
+    if args.fake:
+        service = ProviderSearchService.from_synthetic(args.fake)
+    else:
+        load_dotenv()
+        service = ProviderSearchService.from_env(refresh_interval=0)
+    try:
+        run_batch(service, args.input, args.output, args.column, args.id_column, args.top_k,
+                  args.backend, not args.per_specialty, args.aggregation, args.mode, args.categories, near,
+                  args.chunk_size)
+    finally:
+        service.close()
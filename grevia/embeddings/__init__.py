@@ -0,0 +1,8 @@
+# Embedding helpers shared by the graph-merging scripts and the Streamlit app
+from grevia.embeddings.query_cache import QueryEmbeddingCache, normalize_query
+from grevia.embeddings.batching import embed_texts, make_batches
+from grevia.embeddings.embedders import EMBEDDING_BACKENDS, Embedder, LocalEmbedder, create_embedder
+from grevia.embeddings.fake import FakeEmbeddingModel
+from grevia.embeddings.store import EmbeddingStore, content_key
+from grevia.embeddings.codec import decode_embedding, embedding_literal, encode_base64
+from grevia.embeddings.matrix import load_embedding_matrix, save_embedding_matrix
@@ -0,0 +1,73 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except ImportError:
+    _encoding = None
+
+
+# Function to count (or, without tiktoken, estimate) the tokens of a text
+def count_tokens(text):
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+# Function to pack texts into batches bounded by a token budget and a batch size
+def make_batches(texts, max_tokens=8000, max_batch_size=256):
+    batches = []
+    batch, batch_tokens = [], 0
+    for text in texts:
+        tokens = count_tokens(text)
+        if batch and (batch_tokens + tokens > max_tokens or len(batch) >= max_batch_size):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(text)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+# Function to embed one batch, retrying with exponential backoff and jitter
+def embed_batch(embedding_model, batch, max_retries=5, backoff=1.0):
+    for attempt in range(max_retries + 1):
+        try:
+            return embedding_model.embed_documents(batch)
+        except Exception:
+            if attempt == max_retries:
+                raise
+            time.sleep(backoff * 2 ** attempt * (0.5 + random.random()))
+
+
+def embed_texts(embedding_model, texts, max_tokens=8000, max_batch_size=256, max_workers=4,
+                max_retries=5, backoff=1.0, progress=None):
+    """Embed ``texts`` with deduplication, token-budgeted batches and a bounded thread pool.
+
+    Returns one vector per input text, in input order. Texts whose batch still
+    fails after ``max_retries`` get ``None``; the errors are returned alongside
+    as ``(batch, exception)`` pairs. ``progress`` (e.g. a tqdm bar) is advanced
+    by the number of unique texts in each finished batch.
+    """
+    unique_texts = list(dict.fromkeys(texts))
+    batches = make_batches(unique_texts, max_tokens, max_batch_size)
+
+    vectors = {}
+    errors = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            (batch, pool.submit(embed_batch, embedding_model, batch, max_retries, backoff))
+            for batch in batches
+        ]
+        for batch, future in futures:
+            try:
+                vectors.update(zip(batch, future.result()))
+            except Exception as e:
+                errors.append((batch, e))
+            if progress is not None:
+                progress.update(len(batch))
+
+    return [vectors.get(text) for text in texts], errors
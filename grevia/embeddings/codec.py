@@ -0,0 +1,50 @@
+import base64
+import binascii
+import json
+import os
+import numpy as np
+from rdflib import Literal, URIRef
+
+EMBEDDING_NS = "http://example.org/embedding#"
+
+# Datatype of literals holding a little-endian float32 vector, base64-encoded
+FLOAT32_BASE64 = URIRef(f"{EMBEDDING_NS}float32Base64")
+
+# How writers serialize embeddings in Turtle: "base64" (compact) or "json" (legacy)
+EMBEDDING_FORMAT = os.getenv("EMBEDDING_FORMAT", "base64")
+
+
+# Function to encode a vector as base64 of its float32 bytes
+def encode_base64(vector):
+    return base64.b64encode(np.asarray(vector, dtype="<f4").tobytes()).decode("ascii")
+
+
+# Function to decode an embedding stored in any supported form:
+# a native list (Neo4j float-list property), a JSON string or a base64 float32 string
+def decode_embedding(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        text = value.strip()
+        try:
+            if text.startswith("["):
+                return np.asarray(json.loads(text), dtype=np.float32)
+            return np.frombuffer(base64.b64decode(text, validate=True), dtype="<f4").astype(np.float32)
+        except (json.JSONDecodeError, binascii.Error, ValueError):
+            return None
+    return np.asarray(value, dtype=np.float32)
+
+
+# Function to build the RDF literal of an embedding in the configured format
+def embedding_literal(vector, embedding_format=None):
+    embedding_format = embedding_format or EMBEDDING_FORMAT
+    if embedding_format == "json":
+        return Literal(json.dumps(np.asarray(vector, dtype=float).tolist()))
+    if embedding_format == "base64":
+        return Literal(encode_base64(vector), datatype=FLOAT32_BASE64)
+    raise ValueError(f"Unknown embedding format: {embedding_format}")
+
+
+# Function to tell whether a predicate holds an embedding (ns2:embedding_value, ns1:description, ...)
+def is_embedding_predicate(predicate):
+    return str(predicate).startswith(f"{EMBEDDING_NS}embedding_")
@@ -0,0 +1,178 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+
+EMBEDDING_BACKENDS = ("openai", "local", "fake")
+OPENAI_EMBEDDING_MODEL = "text-embedding-3-small"
+OPENAI_EMBEDDING_DIMENSIONS = 512
+
+
+class Embedder:
+    """Interface shared by the embedding models of the app and the scripts.
+
+    The LangChain ``Embeddings`` methods (``embed_documents``, ``embed_query``
+    and their async variants) plus the ``model`` and ``dimensions`` attributes
+    used to key the embedding caches. OpenAIEmbeddings already has this shape;
+    subclasses only implement ``embed_documents``.
+    """
+
+    model = None
+    dimensions = None
+
+    def embed_documents(self, texts):
+        raise NotImplementedError
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts):
+        return await asyncio.to_thread(self.embed_documents, texts)
+
+    async def aembed_query(self, text):
+        return (await self.aembed_documents([text]))[0]
+
+
+class LocalEmbedder(Embedder):
+    """Sentence encoder running on the CPU with ONNX Runtime (e.g. a quantized all-MiniLM-L6-v2 export).
+
+    ``model_path`` is a directory with the ONNX model and its ``tokenizer.json``
+    (as exported by Optimum / sentence-transformers). Embeddings are the mean of
+    the token states, unit-normalized. Documents are sorted by length and cut
+    into batches of at most ``max_batch_size`` texts and ``max_batch_tokens``
+    padded tokens. Concurrent ``embed_query`` calls are coalesced: requests
+    arriving within ``max_wait_ms`` of each other share one model run. ONNX
+    Runtime parallelizes each run over ``intra_op_threads`` cores.
+    """
+
+    def __init__(self, model_path, onnx_file="model_quantized.onnx", max_length=256, max_batch_size=64,
+                 max_batch_tokens=16384, intra_op_threads=None, max_wait_ms=2.0, model=None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads or os.cpu_count() or 1
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(os.path.join(model_path, onnx_file), options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_path, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length)
+        self.tokenizer.no_padding()
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_wait = max_wait_ms / 1000
+        self.model = model or f"local:{os.path.basename(os.path.normpath(model_path))}"
+        self.dimensions = len(self._run([self.tokenizer.encode("dimensions")])[0])
+
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    # Function to run the model on a batch of encodings: padded inputs, mean pooling, unit norm
+    def _run(self, encodings):
+        length = max(len(encoding.ids) for encoding in encodings)
+        ids = np.zeros((len(encodings), length), dtype=np.int64)
+        mask = np.zeros((len(encodings), length), dtype=np.int64)
+        for i, encoding in enumerate(encodings):
+            ids[i, :len(encoding.ids)] = encoding.ids
+            mask[i, :len(encoding.ids)] = 1
+        inputs = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self.input_names:
+            inputs["token_type_ids"] = np.zeros_like(ids)
+        states = self.session.run(None, inputs)[0]
+        weights = mask[:, :, None].astype(np.float32)
+        pooled = (states * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+        return pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+
+    def embed_documents(self, texts):
+        if not texts:
+            return []
+        encodings = self.tokenizer.encode_batch(list(texts))
+        order = sorted(range(len(texts)), key=lambda i: len(encodings[i].ids))
+        vectors = [None] * len(texts)
+        start = 0
+        while start < len(order):
+            # Grow the batch while it stays under both limits (texts are sorted, so the last one is the longest)
+            end = start + 1
+            while end < len(order) and end - start < self.max_batch_size and \
+                    (end - start + 1) * len(encodings[order[end]].ids) <= self.max_batch_tokens:
+                end += 1
+            batch = order[start:end]
+            for i, vector in zip(batch, self._run([encodings[i] for i in batch])):
+                vectors[i] = vector.tolist()
+            start = end
+        return vectors
+
+    # Function to serve queued queries: waits up to max_wait for more requests, then runs them as one batch
+    def _serve(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                vectors = self.embed_documents([text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+    def _submit(self, text):
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._serve, name="local-embedder", daemon=True)
+                self._worker.start()
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def embed_query(self, text):
+        return self._submit(text).result()
+
+    async def aembed_query(self, text):
+        return await asyncio.wrap_future(self._submit(text))
+
+
+# Function to create the embedding model selected by EMBEDDING_BACKEND (openai by default):
+# OpenAI, the local ONNX encoder at LOCAL_EMBEDDING_MODEL, or the offline fake model
+def create_embedder(backend=None, **options):
+    backend = backend or os.getenv("EMBEDDING_BACKEND", "openai")
+    if backend == "openai":
+        from langchain_openai import OpenAIEmbeddings
+
+        openai_api_key = os.getenv("OPENAI_API_KEY")
+        if not openai_api_key:
+            raise ValueError("OpenAI API key not set. Please set the OPENAI_API_KEY environment variable.")
+        return OpenAIEmbeddings(
+            model=options.get("model", OPENAI_EMBEDDING_MODEL),
+            openai_api_key=openai_api_key,
+            dimensions=options.get("dimensions", OPENAI_EMBEDDING_DIMENSIONS)
+        )
+    if backend == "local":
+        model_path = options.pop("model_path", None) or os.getenv("LOCAL_EMBEDDING_MODEL")
+        if not model_path:
+            raise ValueError("Local embedding model not set. "
+                             "Please set the LOCAL_EMBEDDING_MODEL environment variable.")
+        threads = os.getenv("LOCAL_EMBEDDING_THREADS")
+        if threads and "intra_op_threads" not in options:
+            options["intra_op_threads"] = int(threads)
+        return LocalEmbedder(model_path, **options)
+    if backend == "fake":
+        from grevia.embeddings.fake import FakeEmbeddingModel
+
+        return FakeEmbeddingModel(**options)
+    raise ValueError(f"Unknown embedding backend: {backend}")
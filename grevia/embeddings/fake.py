@@ -0,0 +1,43 @@
+import asyncio
+import hashlib
+import time
+import numpy as np
+
+from grevia.embeddings.embedders import Embedder
+
+
+class FakeEmbeddingModel(Embedder):
+    """Offline stand-in for OpenAIEmbeddings.
+
+    Vectors are deterministic (seeded by the text) and unit-length. Each call
+    sleeps ``latency`` seconds plus ``per_text_latency`` per text to mimic a
+    remote API, so batching and concurrency can be benchmarked offline.
+    """
+
+    def __init__(self, dimensions=512, latency=0.0, per_text_latency=0.0, model="fake-embedding"):
+        self.model = model
+        self.dimensions = dimensions
+        self.latency = latency
+        self.per_text_latency = per_text_latency
+        self.calls = 0
+
+    def _vector(self, text):
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dimensions)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        time.sleep(self.latency + self.per_text_latency * len(texts))
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts):
+        self.calls += 1
+        await asyncio.sleep(self.latency + self.per_text_latency * len(texts))
+        return [self._vector(text) for text in texts]
+
+    async def aembed_query(self, text):
+        return (await self.aembed_documents([text]))[0]
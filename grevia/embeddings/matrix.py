@@ -0,0 +1,36 @@
+import json
+import os
+import numpy as np
+
+
+# Function to get the (matrix, URI index) file paths of an artifact, e.g. ".../providers_embeddings"
+def matrix_paths(prefix):
+    prefix = os.path.splitext(prefix)[0] if prefix.endswith((".npy", ".json")) else prefix
+    return f"{prefix}.npy", f"{prefix}_uris.json"
+
+
+# Function to write an embedding matrix as float32 .npy plus a JSON index of row URIs
+def save_embedding_matrix(prefix, uris, vectors):
+    matrix_path, index_path = matrix_paths(prefix)
+    vectors = list(vectors)
+    dimensions = len(vectors[0]) if vectors else 0
+    matrix = np.lib.format.open_memmap(matrix_path, mode="w+", dtype=np.float32, shape=(len(vectors), dimensions))
+    for row, vector in enumerate(vectors):
+        matrix[row] = vector
+    matrix.flush()
+    del matrix
+
+    with open(index_path, "w") as f:
+        json.dump({"uris": list(uris), "shape": [len(vectors), dimensions], "dtype": "float32"}, f)
+    return matrix_path, index_path
+
+
+# Function to open an embedding matrix artifact; the matrix is memory-mapped (read-only, zero-copy)
+def load_embedding_matrix(prefix, mmap_mode="r"):
+    matrix_path, index_path = matrix_paths(prefix)
+    with open(index_path, "r") as f:
+        index = json.load(f)
+    matrix = np.load(matrix_path, mmap_mode=mmap_mode)
+    if matrix.shape[0] != len(index["uris"]):
+        raise ValueError(f"{matrix_path} has {matrix.shape[0]} rows but {index_path} lists {len(index['uris'])} URIs")
+    return index["uris"], matrix
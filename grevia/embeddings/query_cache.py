@@ -0,0 +1,162 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+from grevia.embeddings.batching import embed_texts
+
+
+# Function to normalize a query before using it as a cache key
+def normalize_query(text):
+    return " ".join(text.lower().split())
+
+
+class QueryEmbeddingCache:
+    """Two-tier cache in front of ``embedding_model.embed_query``.
+
+    Vectors are keyed by (model, dimensions, normalized text). The first tier
+    is an in-memory LRU of ``memory_size`` entries; the second is a SQLite
+    table at ``path`` that survives restarts and is trimmed to ``disk_size``
+    entries by last use.
+    """
+
+    def __init__(self, embedding_model, model, dimensions, path, memory_size=256, disk_size=100_000):
+        self.embedding_model = embedding_model
+        self.model = model
+        self.dimensions = dimensions
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS query_embeddings (
+                model TEXT NOT NULL,
+                dimensions INTEGER NOT NULL,
+                query TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, dimensions, query)
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS query_embeddings_last_used ON query_embeddings (last_used)")
+        self._db.commit()
+        self._disk_count = self._db.execute("SELECT count(*) FROM query_embeddings").fetchone()[0]
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key):
+        row = self._db.execute(
+            "SELECT vector FROM query_embeddings WHERE model = ? AND dimensions = ? AND query = ?",
+            (self.model, self.dimensions, key),
+        ).fetchone()
+        if row is None:
+            return None
+        self._db.execute(
+            "UPDATE query_embeddings SET last_used = ? WHERE model = ? AND dimensions = ? AND query = ?",
+            (time.time(), self.model, self.dimensions, key),
+        )
+        self._db.commit()
+        return np.frombuffer(row[0], dtype=np.float32).tolist()
+
+    def _write_disk(self, key, vector):
+        self._db.execute(
+            "INSERT OR REPLACE INTO query_embeddings VALUES (?, ?, ?, ?, ?)",
+            (self.model, self.dimensions, key, np.asarray(vector, dtype=np.float32).tobytes(), time.time()),
+        )
+        self._disk_count += 1
+        if self._disk_count > self.disk_size:
+            # Evict the least recently used tenth so trimming does not run on every insert
+            keep = int(self.disk_size * 0.9)
+            self._db.execute(
+                """
+                DELETE FROM query_embeddings WHERE rowid IN (
+                    SELECT rowid FROM query_embeddings ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (keep,),
+            )
+            self._disk_count = self._db.execute("SELECT count(*) FROM query_embeddings").fetchone()[0]
+        self._db.commit()
+
+    # Function to look a normalized query up in both tiers (None on a miss)
+    def _lookup(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._memory[key]
+            vector = self._read_disk(key)
+            if vector is not None:
+                self.disk_hits += 1
+                self._remember(key, vector)
+            return vector
+
+    def _store(self, key, vector):
+        with self._lock:
+            self.misses += 1
+            self._remember(key, vector)
+            self._write_disk(key, vector)
+
+    # Function to embed a query, going to the model only on a miss in both tiers
+    def embed_query(self, text):
+        key = normalize_query(text)
+        vector = self._lookup(key)
+        if vector is None:
+            vector = self.embedding_model.embed_query(key)
+            self._store(key, vector)
+        return vector
+
+    # Function to embed many queries: cached ones are looked up, the misses go to the
+    # model in token-budgeted embed_documents batches (see embed_texts)
+    def embed_queries(self, texts, **batch_options):
+        keys = [normalize_query(text) for text in texts]
+        vectors = {key: self._lookup(key) for key in dict.fromkeys(keys)}
+        missing = [key for key, vector in vectors.items() if vector is None]
+        if missing:
+            embedded, errors = embed_texts(self.embedding_model, missing, **batch_options)
+            if errors:
+                raise RuntimeError(f"{len(errors)} embedding batches failed: {errors[0][1]}")
+            for key, vector in zip(missing, embedded):
+                self._store(key, vector)
+                vectors[key] = vector
+        return [vectors[key] for key in keys]
+
+    # Async variant for the HTTP API: SQLite work runs in a thread, the model call is awaited
+    async def aembed_query(self, text):
+        key = normalize_query(text)
+        vector = await asyncio.to_thread(self._lookup, key)
+        if vector is None:
+            vector = await self.embedding_model.aembed_query(key)
+            await asyncio.to_thread(self._store, key, vector)
+        return vector
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": self._disk_count,
+            }
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,92 @@
+import hashlib
+import os
+import sqlite3
+import numpy as np
+
+from grevia.embeddings.batching import embed_texts
+
+# Store shared by every embedding script, independent of the working directory
+DEFAULT_STORE_PATH = os.getenv(
+    "EMBEDDING_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "cache", "embeddings.sqlite"),
+)
+
+
+# Function to compute the content address of a text for a given model and dimensions
+def content_key(text, model, dimensions):
+    return hashlib.sha256(f"{model}\x00{dimensions}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """Persistent, content-addressed store of document embeddings.
+
+    Vectors are stored as float32 under ``content_key(text, model, dimensions)``,
+    so a re-run only sends unseen (or edited) texts to the model. ``reused`` and
+    ``new`` count the unique texts served from the store and embedded so far.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.reused = 0
+        self.new = 0
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                dimensions INTEGER NOT NULL,
+                vector BLOB NOT NULL
+            )
+            """
+        )
+        self._db.commit()
+
+    def get_many(self, keys):
+        found = {}
+        keys = list(keys)
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self._db.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            )
+            for key, vector in rows:
+                found[key] = np.frombuffer(vector, dtype=np.float32).tolist()
+        return found
+
+    def put_many(self, items, model, dimensions):
+        self._db.executemany(
+            "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)",
+            [(key, model, dimensions, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items],
+        )
+        self._db.commit()
+
+    # Function to embed texts, calling the model only for texts not in the store yet
+    def embed(self, embedding_model, texts, model=None, dimensions=None, **batch_options):
+        model = model or embedding_model.model
+        dimensions = dimensions or embedding_model.dimensions
+        keys = [content_key(text, model, dimensions) for text in texts]
+        found = self.get_many(set(keys))
+
+        missing = list(dict.fromkeys(text for text, key in zip(texts, keys) if key not in found))
+        vectors, errors = embed_texts(embedding_model, missing, **batch_options) if missing else ([], [])
+        stored = [
+            (content_key(text, model, dimensions), vector)
+            for text, vector in zip(missing, vectors)
+            if vector is not None
+        ]
+        self.put_many(stored, model, dimensions)
+        # Read the new vectors back as float32 so reused and new results are identical
+        found.update((key, np.asarray(vector, dtype=np.float32).tolist()) for key, vector in stored)
+
+        self.reused += len(set(keys)) - len(missing)
+        self.new += len(stored)
+        return [found.get(key) for key in keys], errors
+
+    def report(self):
+        return f"Embedding store: {self.reused} texts reused, {self.new} newly embedded ({self.path})"
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,70 @@
+import hashlib
+import html
+import json
+import math
+
+import folium
+from folium.plugins import FastMarkerCluster
+
+from grevia.search.geo import coordinate
+
+# Leaflet marker built in the browser from one [lat, lon, name, url, similarity] row
+MARKER_CALLBACK = """
+function (row) {
+    var marker = L.marker(new L.LatLng(row[0], row[1]));
+    var popup = "<b>" + row[2] + "</b><br>";
+    if (row[4] !== null) {
+        popup += "Similarity: " + row[4].toFixed(4) + "<br>";
+    }
+    if (row[3]) {
+        popup += "<a href=\\"" + row[3] + "\\" target=\\"_blank\\">Website</a>";
+    }
+    marker.bindPopup(popup, {maxWidth: 200});
+    marker.bindTooltip(row[2]);
+    return marker;
+}
+"""
+
+
+# Function to turn result tuples into map rows [lat, lon, name, url, similarity]
+# (providers without coordinates are left out)
+def map_rows(results):
+    rows = []
+    for similarity, name, url, lat, lon in results:
+        lat, lon = coordinate(lat), coordinate(lon)
+        if math.isnan(lat) or math.isnan(lon):
+            continue
+        rows.append([lat, lon, html.escape(name or ""), html.escape(url or "", quote=True),
+                     None if similarity is None else float(similarity)])
+    return rows
+
+
+# Function to hash a result set, so a map is only rebuilt when the results changed
+def results_hash(results):
+    return hashlib.sha1(json.dumps(map_rows(results)).encode("utf-8")).hexdigest()
+
+
+# Function to list every provider of the index as a result tuple (no similarity)
+def catalog_results(index):
+    return [(None, name, url, lat, lon) for name, url, lat, lon in index.providers]
+
+
+def build_map(results, zoom_start=2):
+    """Folium map of the providers of a result set, with client-side marker clustering.
+
+    The rows are passed to the browser as one array and the markers are
+    created there (FastMarkerCluster), instead of one folium Marker per
+    provider, so the map stays small and fast with the whole catalogue.
+    """
+    rows = map_rows(results)
+    if rows:
+        center = [sum(row[0] for row in rows) / len(rows), sum(row[1] for row in rows) / len(rows)]
+    else:
+        center = [0, 0]
+    m = folium.Map(location=center, zoom_start=zoom_start)
+    if rows:
+        FastMarkerCluster(rows, callback=MARKER_CALLBACK, name="Providers").add_to(m)
+        if len(rows) > 1:
+            m.fit_bounds([[min(row[0] for row in rows), min(row[1] for row in rows)],
+                          [max(row[0] for row in rows), max(row[1] for row in rows)]])
+    return m
@@ -0,0 +1,246 @@
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from grevia.rdf.snapshot import file_hash
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# KG files and artifacts read and written by the graph-merging and Neo4j scripts
+DATA_DIR = os.getenv("GREVIA_DATA_DIR", os.path.join(REPO_DIR, "import_data"))
+
+# Content keys, output hashes and last timings of every stage, shared by every run of the pipeline
+DEFAULT_STATE_PATH = os.getenv("PIPELINE_STATE_PATH", os.path.join(REPO_DIR, "cache", "pipeline_state.json"))
+
+
+class Stage:
+    """One step of the pipeline: a script run as ``python script *args``.
+
+    ``inputs`` and ``outputs`` are the files it reads and writes; a stage runs
+    after the stages writing its inputs. ``after`` names stages it must follow
+    without reading their files (e.g. a Neo4j load), and ``env`` the environment
+    variables its result depends on.
+    """
+
+    def __init__(self, name, script, args=(), inputs=(), outputs=(), after=(), env=()):
+        self.name = name
+        self.script = script
+        self.args = [str(arg) for arg in args]
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.after = list(after)
+        self.env = list(env)
+
+
+# Function to report the peak resident set size of a finished child process in MB (None where
+# the platform does not report it, e.g. Windows)
+def peak_rss_mb(usage):
+    if usage is None:
+        return None
+    return usage.ru_maxrss / 1024 ** 2 if sys.platform == "darwin" else usage.ru_maxrss / 1024
+
+
+# Function to run a stage's script, printing its output line by line under the stage name;
+# returns (exit code, seconds, peak RSS in MB)
+def run_script(stage):
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-u", stage.script, *stage.args], stdout=subprocess.PIPE,
+                               stderr=subprocess.STDOUT, text=True, encoding="utf-8", errors="replace")
+    for line in process.stdout:
+        print(f"[{stage.name}] {line}", end="", flush=True)
+    process.stdout.close()
+    usage = None
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+    else:
+        process.wait()
+    return process.returncode, time.perf_counter() - start, peak_rss_mb(usage)
+
+
+class Pipeline:
+    """DAG of stages run in dependency order, skipping the ones whose inputs did not change.
+
+    The key of a stage hashes its script, arguments, ``env`` values, the
+    content of its inputs and the keys of its ``after`` stages. A stage is
+    skipped when its key matches the last successful run and its outputs
+    still have the content that run wrote, so an edited file only reruns the
+    stages downstream of it (and not even those when a rerun writes the same
+    content). Stages whose dependencies are done run concurrently, up to
+    ``parallel`` at a time. File hashes are cached by size and mtime.
+    """
+
+    def __init__(self, stages, state_path=DEFAULT_STATE_PATH):
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_path = state_path
+        self.state = {"stages": {}, "files": {}}
+        if os.path.exists(state_path):
+            with open(state_path, "r") as f:
+                self.state = json.load(f)
+        self.dependencies = self._dependencies()
+
+    # Function to find the stages each stage follows: the writers of its inputs plus its ``after`` stages
+    def _dependencies(self):
+        writers = {}
+        for stage in self.stages.values():
+            for path in stage.outputs:
+                if os.path.abspath(path) in writers:
+                    raise ValueError(f"{path} is written by both {writers[os.path.abspath(path)]} and {stage.name}")
+                writers[os.path.abspath(path)] = stage.name
+        dependencies = {}
+        for stage in self.stages.values():
+            names = [writers[os.path.abspath(path)] for path in stage.inputs if os.path.abspath(path) in writers]
+            for name in stage.after:
+                if name not in self.stages:
+                    raise ValueError(f"Stage {stage.name} follows unknown stage {name}")
+                names.append(name)
+            dependencies[stage.name] = sorted(set(names))
+        self.order(dependencies)
+        return dependencies
+
+    # Function to sort stage names so that every stage comes after its dependencies
+    def order(self, dependencies=None):
+        dependencies = self.dependencies if dependencies is None else dependencies
+        ordered, visiting = [], set()
+
+        def visit(name):
+            if name in ordered:
+                return
+            if name in visiting:
+                raise ValueError(f"Stage {name} depends on itself")
+            visiting.add(name)
+            for dependency in dependencies[name]:
+                visit(dependency)
+            visiting.discard(name)
+            ordered.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return ordered
+
+    # Function to list the given stages plus everything they depend on, in run order
+    def upstream(self, names):
+        selected = set()
+        pending = list(names)
+        while pending:
+            name = pending.pop()
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage: {name} (stages: {', '.join(self.stages)})")
+            if name not in selected:
+                selected.add(name)
+                pending.extend(self.dependencies[name])
+        return [name for name in self.order() if name in selected]
+
+    # Function to hash a file, reusing the hash of the last run when its size and mtime are unchanged
+    def content_hash(self, path):
+        path = os.path.abspath(path)
+        info = os.stat(path)
+        cached = self.state["files"].get(path)
+        if cached and cached["size"] == info.st_size and cached["mtime_ns"] == info.st_mtime_ns:
+            return cached["sha256"]
+        digest = file_hash(path)
+        self.state["files"][path] = {"size": info.st_size, "mtime_ns": info.st_mtime_ns, "sha256": digest}
+        return digest
+
+    def stage_key(self, stage, keys):
+        description = {
+            "script": self.content_hash(stage.script),
+            "args": stage.args,
+            "env": {name: os.getenv(name) for name in stage.env},
+            "inputs": {path: self.content_hash(path) for path in stage.inputs},
+            "after": {name: keys[name] for name in stage.after},
+        }
+        return hashlib.sha256(json.dumps(description, sort_keys=True).encode("utf-8")).hexdigest()
+
+    # Function to tell whether the last successful run of a stage had this key and its outputs are intact
+    def up_to_date(self, stage, key):
+        last = self.state["stages"].get(stage.name)
+        if not last or last.get("key") != key:
+            return False
+        for path in stage.outputs:
+            if not os.path.exists(path) or self.content_hash(path) != last["outputs"].get(path):
+                return False
+        return True
+
+    def save_state(self):
+        if os.path.dirname(self.state_path):
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        with open(self.state_path + ".tmp", "w") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(self.state_path + ".tmp", self.state_path)
+
+    def run(self, targets=None, force=(), parallel=2, dry_run=False):
+        """Run the target stages (default: all) and the stages they depend on.
+
+        ``force`` names stages to run even when up to date. Returns a report
+        with one row per stage: name, status (``ran``, ``skipped``, ``failed``
+        -- which includes a missing input file -- or ``blocked`` by a failed
+        dependency), seconds and peak RSS in MB of the script. With
+        ``dry_run`` nothing runs: stages report ``stale``, or ``skipped`` when
+        they are up to date.
+        """
+        names = self.upstream(targets or list(self.stages))
+        keys, status, report = {}, {}, {}
+        running = {}
+        with ThreadPoolExecutor(max_workers=max(1, parallel)) as pool:
+            while len(status) < len(names):
+                for name in names:
+                    if name in status or name in running.values():
+                        continue
+                    dependencies = [status.get(dependency) for dependency in self.dependencies[name]]
+                    if any(state in ("failed", "blocked") for state in dependencies):
+                        status[name] = "blocked"
+                        report[name] = {"stage": name, "status": "blocked", "seconds": None, "peak_rss_mb": None}
+                        continue
+                    if not all(state in ("ran", "skipped", "stale") for state in dependencies):
+                        continue
+                    stage = self.stages[name]
+                    # Inputs written by a stale stage only exist once it has run
+                    missing = [path for path in stage.inputs if not os.path.exists(path)]
+                    if missing and "stale" not in dependencies:
+                        print(f"Stage {name} failed: missing input {missing[0]}", flush=True)
+                        status[name] = "failed"
+                        report[name] = {"stage": name, "status": "failed", "seconds": None, "peak_rss_mb": None}
+                        continue
+                    key = keys[name] = self.stage_key(stage, keys) if "stale" not in dependencies else None
+                    if key is not None and name not in force and self.up_to_date(stage, key):
+                        status[name] = "skipped"
+                        last = self.state["stages"][name]
+                        report[name] = {"stage": name, "status": "skipped", "seconds": None, "peak_rss_mb": None,
+                                        "last_seconds": last["seconds"], "last_peak_rss_mb": last["peak_rss_mb"]}
+                    elif dry_run:
+                        status[name] = "stale"
+                        report[name] = {"stage": name, "status": "stale", "seconds": None, "peak_rss_mb": None}
+                    else:
+                        print(f"Running {name}: {stage.script} {' '.join(stage.args)}", flush=True)
+                        running[pool.submit(run_script, stage)] = name
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    stage = self.stages[name]
+                    code, seconds, peak = future.result()
+                    missing = [path for path in stage.outputs if not os.path.exists(path)]
+                    if code != 0 or missing:
+                        print(f"Stage {name} failed: " + (f"exit code {code}" if code else f"{missing[0]} not written"))
+                        status[name] = "failed"
+                        self.state["stages"].pop(name, None)
+                    else:
+                        status[name] = "ran"
+                        self.state["stages"][name] = {
+                            "key": keys[name],
+                            "outputs": {path: self.content_hash(path) for path in stage.outputs},
+                            "seconds": seconds,
+                            "peak_rss_mb": peak,
+                            "finished": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                        }
+                    report[name] = {"stage": name, "status": status[name], "seconds": seconds, "peak_rss_mb": peak}
+                    self.save_state()
+        if not dry_run:
+            self.save_state()
+        return [report[name] for name in names]
@@ -0,0 +1,8 @@
+# Streaming RDF readers and writers used by the graph-merging scripts, their parallel (process pool)
+# variants and the snapshot cache of parsed KGs
+from grevia.rdf.stream import (
+    CHUNK_CHARS, CHUNK_LINES, NTriplesWriter, TurtleWriter, iter_nquads, iter_ntriples, iter_triples, iter_turtle,
+    parse_nquads, parse_ntriples, parse_turtle, rdf_format, triple_key, triple_writer, turtle_prefixes,
+)
+from grevia.rdf.parallel import add_statements, convert, iter_statements, load_graph, save_graph
+from grevia.rdf.snapshot import DEFAULT_SNAPSHOT_DIR, KGSnapshots, file_hash
@@ -0,0 +1,239 @@
+import io
+import os
+import uuid
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from rdflib import BNode, Dataset, Graph, Literal, URIRef
+from grevia.rdf.stream import (
+    CHUNK_CHARS, CHUNK_LINES, NTriplesWriter, TurtleWriter, line_chunks, parse_nquads, parse_ntriples, parse_turtle,
+    rdf_format, triple_key, turtle_chunks, turtle_prefixes,
+)
+
+
+class _LabeledBNodes(dict):
+    """bnode_context mapping a blank node label to the same BNode in every worker.
+
+    The parsers look labels up with ``get``; the prefix is drawn once per
+    file, so ``_:b1`` is one node across chunks but not across files.
+    """
+
+    def __init__(self, prefix):
+        super().__init__()
+        self.prefix = prefix
+
+    def get(self, label, default=None):
+        return BNode(f"{self.prefix}{label}")
+
+
+# Function to turn a term into plain values (None stays None: the default graph of a quad).
+# A literal whose value is its lexical form sends Ellipsis instead of a second copy of the text.
+def _encode_term(term, datatypes):
+    if isinstance(term, Literal):
+        lexical, value = str(term), term._value
+        if type(value) is str and value == lexical:
+            value = ...
+        datatype = datatypes.setdefault(term.datatype, term.datatype)
+        return "l", lexical, term.language, datatype, value, term._ill_typed
+    if isinstance(term, BNode):
+        return "b", str(term)
+    if term is None:
+        return None
+    return "u", str(term)
+
+
+# Function to rebuild a term from _encode_term's values without re-running rdflib's validation and
+# literal conversion (the worker already did both, and they are most of the cost of unpickling terms)
+def _decode_term(encoded):
+    if encoded is None:
+        return None
+    if encoded[0] == "u":
+        return str.__new__(URIRef, encoded[1])
+    if encoded[0] == "b":
+        return str.__new__(BNode, encoded[1])
+    _, lexical, language, datatype, value, ill_typed = encoded
+    literal = str.__new__(Literal, lexical)
+    literal._language = language
+    literal._datatype = datatype
+    literal._value = lexical if value is ... else value
+    literal._ill_typed = ill_typed
+    return literal
+
+
+# Function to encode parsed statements for the trip back from a worker: each distinct term once,
+# the statements as an array of term numbers
+def encode_statements(statements):
+    numbers, terms, datatypes = {}, [], {}
+    ids = array("i")
+    for statement in statements:
+        for term in statement:
+            number = numbers.get(term)
+            if number is None:
+                number = numbers[term] = len(terms)
+                terms.append(_encode_term(term, datatypes))
+            ids.append(number)
+    width = len(statements[0]) if statements else 3
+    return width, terms, ids
+
+
+def decode_statements(encoded):
+    width, terms, ids = encoded
+    nodes = [_decode_term(term) for term in terms]
+    row = [nodes[i] for i in ids]
+    return list(zip(*[iter(row)] * width))
+
+
+# Function to parse one chunk: triples (nt, turtle) or quads (nquads)
+def parse_statements(fmt, text, bnode_prefix):
+    if fmt == "nt":
+        return parse_ntriples(text, _LabeledBNodes(bnode_prefix))
+    if fmt == "nquads":
+        return parse_nquads(text, _LabeledBNodes(bnode_prefix))
+    return parse_turtle(text)
+
+
+# Worker task of iter_statements: the parsed statements cross the process boundary encoded
+def parse_chunk(fmt, text, bnode_prefix):
+    return encode_statements(parse_statements(fmt, text, bnode_prefix))
+
+
+# Worker task of convert: parse a chunk, transform its triples and format them as output_fmt text. The
+# triples selected by dedupe come back apart, as (key, statement) pairs, for the writing process to
+# drop the ones already written by another chunk.
+def convert_chunk(fmt, text, bnode_prefix, output_fmt, transform, namespaces, dedupe=None):
+    stream = io.StringIO()
+    if output_fmt == "nt":
+        writer = NTriplesWriter(stream)
+    else:
+        writer = TurtleWriter(stream, namespaces, header=False)
+    keyed = []
+    for statement in parse_statements(fmt, text, bnode_prefix):
+        triple = statement[:3] if transform is None else transform(*statement[:3])
+        if dedupe is not None and dedupe(*triple):
+            keyed.append((triple_key(triple), writer.statement(triple)))
+        else:
+            writer.write(triple)
+    writer.close()
+    return stream.getvalue(), writer.count, keyed
+
+
+# Function to resolve the number of worker processes (None: one per core)
+def worker_count(workers=None):
+    return max(1, workers or os.cpu_count() or 1)
+
+
+# Function to run fn over tasks in a process pool, yielding the results in task order. At most
+# 2 x workers tasks are in flight, so a file is never read much further ahead than it is consumed.
+def ordered_map(fn, tasks, workers):
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.submit(fn, *task))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# Function to cut an open RDF file into (fmt, text, bnode prefix) parse tasks: whole lines for N-Triples
+# and N-Quads, complete statements after the prefixes seen so far for Turtle
+def chunk_tasks(f, fmt, chunk_lines=CHUNK_LINES, chunk_chars=CHUNK_CHARS):
+    bnode_prefix = uuid.uuid4().hex
+    if fmt == "turtle":
+        for header, statements in turtle_chunks(f, chunk_lines, chunk_chars):
+            yield fmt, header + statements, bnode_prefix
+    else:
+        for chunk in line_chunks(f, chunk_lines, chunk_chars):
+            yield fmt, chunk, bnode_prefix
+
+
+def iter_statements(path, workers=None, chunk_lines=CHUNK_LINES, chunk_chars=CHUNK_CHARS):
+    """Stream the statements of an RDF file, parsing its chunks in a process pool.
+
+    The chunks (see ``chunk_tasks``) are parsed by ``workers`` processes
+    (default: one per core; 1 parses in this process). Statements come back
+    in file order: triples, or ``(s, p, o, graph name)`` quads for N-Quads.
+    Labeled blank nodes keep their identity across chunks, except in Turtle
+    (see ``iter_turtle``).
+    """
+    workers = worker_count(workers)
+    with open(path, "r", encoding="utf-8") as f:
+        tasks = chunk_tasks(f, rdf_format(path), chunk_lines, chunk_chars)
+        if workers == 1:
+            for task in tasks:
+                yield from parse_statements(*task)
+        else:
+            for encoded in ordered_map(parse_chunk, tasks, workers):
+                yield from decode_statements(encoded)
+
+
+# Function to add triples to a Graph, or (s, p, o, graph name) quads to a Dataset
+def add_statements(graph, statements):
+    if not isinstance(graph, Dataset):
+        graph.addN((s, p, o, graph) for s, p, o in statements)
+        return graph
+    contexts = {}
+    for s, p, o, name in statements:
+        if name not in contexts:
+            contexts[name] = graph.default_graph if name is None else graph.graph(name)
+        contexts[name].add((s, p, o))
+    return graph
+
+
+# Function to load an RDF file into an rdflib Graph (a Dataset for N-Quads) with a parallel parse;
+# with a single worker rdflib parses the file directly
+def load_graph(path, workers=None, graph=None):
+    fmt = rdf_format(path)
+    if graph is None:
+        graph = Dataset(default_union=True) if fmt == "nquads" else Graph()
+    if worker_count(workers) == 1:
+        return graph.parse(path, format=fmt)
+    if fmt == "turtle":
+        for prefix, namespace in turtle_prefixes(path):
+            graph.bind(prefix, namespace)
+    return add_statements(graph, iter_statements(path, workers))
+
+
+# Function to save a graph in the format of the extension of path; returns the number of triples
+def save_graph(graph, path):
+    graph.serialize(destination=path, format=rdf_format(path))
+    return len(graph)
+
+
+def convert(input_path, output_path, transform=None, workers=None, namespaces=None,
+            chunk_lines=CHUNK_LINES, chunk_chars=CHUNK_CHARS, dedupe=None):
+    """Rewrite an RDF file as N-Triples or Turtle, one chunk per worker process.
+
+    Each worker parses a chunk, applies ``transform(s, p, o)`` (returning the
+    triple to write; graph names of N-Quads input are dropped) and formats it,
+    so this process only reads and writes text. ``transform`` must be a
+    module-level function, as it is pickled to the workers. Chunks are written
+    in file order; Turtle output uses the ``namespaces`` prefixes. Transformed
+    triples for which ``dedupe(s, p, o)`` (also module-level) is true are
+    written once in the whole file: this process keeps a 16-byte key for
+    each of them. Returns the number of triples written.
+    """
+    fmt, output_fmt = rdf_format(input_path), rdf_format(output_path)
+    if output_fmt == "nquads":
+        raise ValueError(f"Cannot convert to N-Quads: {output_path} (write .nt or .ttl)")
+    workers = worker_count(workers)
+    count = 0
+    written = set()
+    with open(input_path, "r", encoding="utf-8") as f, open(output_path, "w", encoding="utf-8") as out:
+        if output_fmt == "turtle":
+            TurtleWriter(out, namespaces)
+        tasks = (task + (output_fmt, transform, namespaces, dedupe)
+                 for task in chunk_tasks(f, fmt, chunk_lines, chunk_chars))
+        if workers == 1:
+            results = (convert_chunk(*task) for task in tasks)
+        else:
+            results = ordered_map(convert_chunk, tasks, workers)
+        for text, n, keyed in results:
+            out.write(text)
+            count += n
+            for key, statement in keyed:
+                if key not in written:
+                    written.add(key)
+                    out.write(statement)
+                    count += 1
+    return count
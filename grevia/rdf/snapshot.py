@@ -0,0 +1,119 @@
+import glob
+import hashlib
+import os
+import pickle
+import rdflib
+from rdflib import Dataset, Graph
+from rdflib.graph import DATASET_DEFAULT_GRAPH_ID
+from grevia.rdf.parallel import add_statements, decode_statements, encode_statements, load_graph
+
+# Snapshots shared by every graph-merging script, independent of the working directory
+DEFAULT_SNAPSHOT_DIR = os.getenv(
+    "KG_SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "cache", "kg_snapshots"),
+)
+
+# Layout of the snapshot files: snapshots of another version (or rdflib version) are rebuilt, not read
+SNAPSHOT_VERSION = 1
+
+
+# Function to compute the SHA-256 of a file, read in blocks
+def file_hash(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Function to list the statements of a graph: triples, or (s, p, o, graph name) quads for a Dataset
+def graph_statements(graph):
+    if not isinstance(graph, Dataset):
+        return list(graph.triples((None, None, None)))
+    statements = []
+    for s, p, o, context in graph.quads():
+        name = context.identifier if isinstance(context, Graph) else context
+        statements.append((s, p, o, None if name == DATASET_DEFAULT_GRAPH_ID else name))
+    return statements
+
+
+class KGSnapshots:
+    """Cache of parsed KG files as binary snapshots, keyed by the SHA-256 of the source file.
+
+    A snapshot is a pickle of the graph's triples as a table of distinct
+    terms plus an array of term numbers (see ``encode_statements``), with its
+    namespace bindings. Restoring one skips parsing and rdflib's term
+    validation, so the scripts that reload the same KG only pay for building
+    the Graph. An edited source file gets a new hash, hence a new snapshot
+    (which replaces the old one). Snapshots are pickles: only load ones this
+    cache wrote.
+    """
+
+    def __init__(self, directory=DEFAULT_SNAPSHOT_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    # Function to name the snapshots of a file: its name, a hash of its absolute path (files with the
+    # same name in different folders keep their own snapshots) and the hash of its content
+    def snapshot_prefix(self, path):
+        location = hashlib.sha256(os.path.abspath(path).encode("utf-8")).hexdigest()[:8]
+        return os.path.join(self.directory, f"{os.path.basename(path)}.{location}")
+
+    def snapshot_path(self, path, digest):
+        return f"{self.snapshot_prefix(path)}.{digest[:16]}.kgsnap"
+
+    # Function to load a KG file, from its snapshot when there is one for its current content
+    # (otherwise parsed with load_graph, then snapshotted)
+    def load(self, path, workers=None):
+        digest = file_hash(path)
+        snapshot = self.snapshot_path(path, digest)
+        graph = self.restore(snapshot, digest) if os.path.exists(snapshot) else None
+        if graph is not None:
+            self.hits += 1
+            return graph
+        self.misses += 1
+        graph = load_graph(path, workers)
+        self.save(graph, path, digest)
+        return graph
+
+    # Function to snapshot the graph parsed from path, replacing the snapshots of its earlier versions
+    def save(self, graph, path, digest):
+        snapshot = self.snapshot_path(path, digest)
+        data = {
+            "version": SNAPSHOT_VERSION,
+            "rdflib": rdflib.__version__,
+            "sha256": digest,
+            "dataset": isinstance(graph, Dataset),
+            "namespaces": [(prefix, str(namespace)) for prefix, namespace in graph.namespaces()],
+            "statements": encode_statements(graph_statements(graph)),
+        }
+        # Scripts run side by side (see grevia.pipeline) may snapshot the same file: one temporary file each
+        temporary = f"{snapshot}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, snapshot)
+        for old in glob.glob(glob.escape(self.snapshot_prefix(path)) + ".*.kgsnap"):
+            if old != snapshot:
+                # Another script may be replacing the same old snapshot
+                try:
+                    os.remove(old)
+                except FileNotFoundError:
+                    pass
+
+    # Function to rebuild the graph of a snapshot (None when it was written for another source or layout)
+    def restore(self, snapshot, digest):
+        with open(snapshot, "rb") as f:
+            data = pickle.load(f)
+        expected = (SNAPSHOT_VERSION, rdflib.__version__, digest)
+        if (data.get("version"), data.get("rdflib"), data.get("sha256")) != expected:
+            return None
+        graph = Dataset(default_union=True) if data["dataset"] else Graph()
+        for prefix, namespace in data["namespaces"]:
+            graph.bind(prefix, namespace, override=True)
+        return add_statements(graph, decode_statements(data["statements"]))
+
+    def report(self):
+        return f"KG snapshots: {self.hits} loaded, {self.misses} parsed and saved ({self.directory})"
+
@@ -0,0 +1,293 @@
+import io
+import os
+import re
+import hashlib
+from rdflib import BNode, Graph, URIRef
+from rdflib.plugins.parsers.nquads import NQuadsParser
+from rdflib.plugins.parsers.ntriples import W3CNTriplesParser
+from rdflib.plugins.serializers.nt import _nt_row
+
+# Lines (and characters, as embedding literals make long lines) parsed at a time: memory
+# stays bounded by one chunk whatever the size of the KG
+CHUNK_LINES = 10_000
+CHUNK_CHARS = 4_000_000
+
+# Local names written as prefix:name by the Turtle writer (anything else is written as a full <IRI>)
+SAFE_LOCAL_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_\-]*$")
+
+
+# Function to tell the RDF format (nt, nquads or turtle) from a path
+def rdf_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".nt", ".ntriples"):
+        return "nt"
+    if extension in (".nq", ".nquads"):
+        return "nquads"
+    if extension in (".ttl", ".turtle"):
+        return "turtle"
+    raise ValueError(f"Unsupported RDF format: {path} (expected .nt, .nq or .ttl)")
+
+
+class _ListSink:
+    def __init__(self):
+        self.triples = []
+
+    def triple(self, s, p, o):
+        self.triples.append((s, p, o))
+
+
+class _QuadSink:
+    """Collects the quads of NQuadsParser, which adds each triple to ``get_context(name)``."""
+
+    def __init__(self):
+        self.quads = []
+        self.default_context = _ContextSink(self.quads, None)
+        self._contexts = {}
+
+    def get_context(self, name):
+        if name not in self._contexts:
+            self._contexts[name] = _ContextSink(self.quads, name)
+        return self._contexts[name]
+
+
+class _ContextSink:
+    def __init__(self, quads, name):
+        self.quads = quads
+        self.name = name
+
+    def add(self, triple):
+        self.quads.append((*triple, self.name))
+
+
+# Function to parse N-Triples text (whole lines). bnode_context maps blank node labels to
+# BNodes, so labels keep their identity across chunks of the same file.
+def parse_ntriples(text, bnode_context=None):
+    sink = _ListSink()
+    W3CNTriplesParser(sink, bnode_context=bnode_context).parse(io.StringIO(text))
+    return sink.triples
+
+
+# Function to group the lines of a stream into chunks of at most chunk_lines lines / chunk_chars characters
+def line_chunks(stream, chunk_lines=CHUNK_LINES, chunk_chars=CHUNK_CHARS):
+    chunk, chars = [], 0
+    for line in stream:
+        chunk.append(line)
+        chars += len(line)
+        if len(chunk) >= chunk_lines or chars >= chunk_chars:
+            yield "".join(chunk)
+            chunk, chars = [], 0
+    if chunk:
+        yield "".join(chunk)
+
+
+# Function to parse N-Quads text (whole lines) into (s, p, o, graph name) quads; the graph
+# name is None for triples of the default graph
+def parse_nquads(text, bnode_context=None):
+    sink = _QuadSink()
+    W3CNTriplesParser.parse(NQuadsParser(sink, bnode_context=bnode_context), io.StringIO(text))
+    return sink.quads
+
+
+# Function to parse Turtle text (directives plus complete statements) into triples grouped by subject
+def parse_turtle(text):
+    graph = Graph(bind_namespaces="none")
+    graph.parse(data=text, format="turtle")
+    return [(subject, predicate, obj) for subject in graph.subjects(unique=True)
+            for predicate, obj in graph.predicate_objects(subject)]
+
+
+def iter_ntriples(path, chunk_lines=CHUNK_LINES, chunk_chars=CHUNK_CHARS):
+    bnode_context = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for chunk in line_chunks(f, chunk_lines, chunk_chars):
+            yield from parse_ntriples(chunk, bnode_context)
+
+
+# Function to split a Turtle stream into (header, statements) chunks: the header holds the
+# @prefix/@base directives seen so far, the statements about chunk_lines lines / chunk_chars
+# characters of complete statements. A statement ends on a line ending with "." outside a long
+# (triple-quoted) string.
+def turtle_chunks(stream, chunk_lines=CHUNK_LINES, chunk_chars=CHUNK_CHARS):
+    header, statement, chunk = [], [], []
+    in_long_string = False
+    chars = 0
+    for line in stream:
+        statement.append(line)
+        chars += len(line)
+        in_long_string ^= (line.count('"""') + line.count("'''")) % 2 == 1
+        stripped = line.strip()
+        if in_long_string or not stripped.endswith(".") or stripped.startswith("#"):
+            continue
+        first = statement[0].lstrip()
+        if first.startswith(("@prefix", "@base")) or first[:6].upper() in ("PREFIX", "BASE "):
+            header.extend(statement)
+        else:
+            chunk.extend(statement)
+        statement = []
+        if len(chunk) >= chunk_lines or chars >= chunk_chars:
+            yield "".join(header), "".join(chunk)
+            chunk, chars = [], 0
+    chunk.extend(statement)
+    if chunk:
+        yield "".join(header), "".join(chunk)
+
+
+# Function to read the @prefix directives at the top of a Turtle file as (prefix, namespace) pairs
+def turtle_prefixes(path):
+    header = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            stripped = line.strip()
+            if not stripped or stripped.startswith("#"):
+                continue
+            if not (stripped.startswith(("@prefix", "@base")) or stripped[:6].upper() in ("PREFIX", "BASE ")):
+                break
+            header.append(line)
+    graph = Graph(bind_namespaces="none")
+    graph.parse(data="".join(header), format="turtle")
+    return list(graph.namespaces())
+
+
+def iter_turtle(path, chunk_lines=CHUNK_LINES, chunk_chars=CHUNK_CHARS):
+    """Stream the triples of a Turtle file, parsing one chunk of statements at a time.
+
+    Blank nodes written inline (``[ ... ]``) are fine; labeled blank nodes
+    (``_:b1``) referenced from statements in different chunks are not merged.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for header, statements in turtle_chunks(f, chunk_lines, chunk_chars):
+            yield from parse_turtle(header + statements)
+
+
+def iter_nquads(path, chunk_lines=CHUNK_LINES, chunk_chars=CHUNK_CHARS):
+    bnode_context = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for chunk in line_chunks(f, chunk_lines, chunk_chars):
+            yield from parse_nquads(chunk, bnode_context)
+
+
+# Function to stream the triples of an N-Triples, N-Quads (graph names dropped) or Turtle file
+def iter_triples(path, chunk_lines=CHUNK_LINES, chunk_chars=CHUNK_CHARS):
+    fmt = rdf_format(path)
+    if fmt == "nt":
+        return iter_ntriples(path, chunk_lines, chunk_chars)
+    if fmt == "nquads":
+        return (quad[:3] for quad in iter_nquads(path, chunk_lines, chunk_chars))
+    return iter_turtle(path, chunk_lines, chunk_chars)
+
+
+# Function to key a triple by a 16-byte digest of its N-Triples line (for the repeat checks of the writers)
+def triple_key(triple):
+    return hashlib.blake2b(_nt_row(triple).encode("utf-8"), digest_size=16).digest()
+
+
+# Function to tell whether a writer already wrote this triple (only checked for its ``dedupe`` triples)
+def _repeated(writer, triple):
+    if writer.dedupe is None or not writer.dedupe(*triple):
+        return False
+    key = triple_key(triple)
+    if key in writer._keys:
+        return True
+    writer._keys.add(key)
+    return False
+
+
+class NTriplesWriter:
+    """Writes triples one line each, as they come.
+
+    Triples for which ``dedupe(s, p, o)`` is true are written once: the
+    writer keeps the key of each of them (not the other triples, so memory is
+    bounded by the triples that can repeat).
+    """
+
+    def __init__(self, stream, namespaces=None, dedupe=None):
+        self.stream = stream
+        self.dedupe = dedupe
+        self.count = 0
+        self._keys = set()
+
+    def write(self, triple):
+        if _repeated(self, triple):
+            return
+        self.stream.write(_nt_row(triple))
+        self.count += 1
+
+    # Function to format a triple as a statement of its own, to be written after the others
+    def statement(self, triple):
+        return _nt_row(triple)
+
+    def close(self):
+        pass
+
+
+class TurtleWriter:
+    """Writes triples as Turtle as they come.
+
+    Consecutive triples about the same subject are grouped with ``;``
+    (the readers above return them grouped), and repeats within a group are
+    dropped, as are repeats of ``dedupe`` triples anywhere in the stream (see
+    ``NTriplesWriter``). IRIs in ``namespaces`` are written as
+    ``prefix:name`` when the name is a plain identifier. ``header=False``
+    leaves out the ``@prefix`` lines, for a chunk of a file whose header is
+    written separately.
+    """
+
+    def __init__(self, stream, namespaces=None, header=True, dedupe=None):
+        self.stream = stream
+        self.dedupe = dedupe
+        self._keys = set()
+        self.namespaces = sorted(((str(ns), prefix) for prefix, ns in (namespaces or {}).items()),
+                                 key=lambda item: len(item[0]), reverse=True)
+        self.count = 0
+        self._subject = None
+        self._seen = set()
+        if header:
+            for prefix, ns in (namespaces or {}).items():
+                stream.write(f"@prefix {prefix}: <{ns}> .\n")
+            stream.write("\n")
+
+    def term(self, node):
+        if isinstance(node, URIRef):
+            for ns, prefix in self.namespaces:
+                if node.startswith(ns) and SAFE_LOCAL_NAME.match(node[len(ns):]):
+                    return f"{prefix}:{node[len(ns):]}"
+            return node.n3()
+        if isinstance(node, BNode):
+            return f"_:{node}"
+        return node.n3()
+
+    def write(self, triple):
+        s, p, o = triple
+        if _repeated(self, triple):
+            return
+        if s != self._subject:
+            if self._subject is not None:
+                self.stream.write(" .\n\n")
+            self._subject = s
+            self._seen = set()
+            self.stream.write(f"{self.term(s)} {self.term(p)} {self.term(o)}")
+        elif (p, o) in self._seen:
+            return
+        else:
+            self.stream.write(f" ;\n    {self.term(p)} {self.term(o)}")
+        self._seen.add((p, o))
+        self.count += 1
+
+    def statement(self, triple):
+        s, p, o = triple
+        return f"{self.term(s)} {self.term(p)} {self.term(o)} .\n"
+
+    def close(self):
+        if self._subject is not None:
+            self.stream.write(" .\n")
+            self._subject = None
+
+
+# Function to open the writer matching the format of path (the stream is opened by the caller)
+def triple_writer(path, stream, namespaces=None, dedupe=None):
+    fmt = rdf_format(path)
+    if fmt == "nquads":
+        raise ValueError(f"Cannot stream triples to N-Quads: {path} (write .nt or .ttl)")
+    if fmt == "nt":
+        return NTriplesWriter(stream, namespaces, dedupe=dedupe)
+    return TurtleWriter(stream, namespaces, dedupe=dedupe)
@@ -0,0 +1,9 @@
+# Provider search engine used by the Streamlit app
+from grevia.search.index import AGGREGATIONS, SpecialtyIndex
+from grevia.search.refresh import IndexRefresher, current_watermark
+from grevia.search.vector_index import Neo4jExactSearch, Neo4jVectorSearch, create_vector_index
+from grevia.search.ann import AnnSearch, IVFIndex, load_or_build_ivf
+from grevia.search.lexical import BM25Index, load_or_build_bm25, reciprocal_rank_fusion
+from grevia.search.geo import GeoFilter, GeoIndex, geo_filter
+from grevia.search.result_cache import ResultCache, invalidate_result_caches
+from grevia.search.service import BACKENDS, SEARCH_MODES, ProviderSearchService
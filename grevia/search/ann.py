@@ -0,0 +1,201 @@
+import os
+import hashlib
+import numpy as np
+
+from grevia.search.index import top_k_indices
+
+
+# Function to run Lloyd's k-means on (a sample of) X; returns the centroids
+def kmeans(X, k, n_iter=20, max_sample=100_000, seed=42):
+    rng = np.random.default_rng(seed)
+    if X.shape[0] > max_sample:
+        X = X[rng.choice(X.shape[0], max_sample, replace=False)]
+    X = np.asarray(X, dtype=np.float32)
+    k = min(k, X.shape[0])
+    centroids = X[rng.choice(X.shape[0], k, replace=False)].copy()
+    for _ in range(n_iter):
+        labels = assign(X, centroids)
+        counts = np.bincount(labels, minlength=k)
+        empty = counts == 0
+        starts = (np.cumsum(counts) - counts)[~empty]
+        sums = np.add.reduceat(X[np.argsort(labels, kind="stable")], starts, axis=0)
+        centroids[~empty] = sums / counts[~empty, None]
+        # Re-seed empty clusters with random points
+        centroids[empty] = X[rng.choice(X.shape[0], empty.sum())]
+    return centroids
+
+
+# Function to assign every row of X to its nearest centroid (L2), in chunks to bound memory
+def assign(X, centroids, chunk=65536):
+    centroid_norms = (centroids ** 2).sum(axis=1)
+    labels = np.empty(X.shape[0], dtype=np.int64)
+    for start in range(0, X.shape[0], chunk):
+        block = np.asarray(X[start:start + chunk], dtype=np.float32)
+        labels[start:start + chunk] = np.argmin(centroid_norms - 2 * block @ centroids.T, axis=1)
+    return labels
+
+
+# Function to fingerprint the content of an embedding matrix (shape and float32 values)
+def matrix_fingerprint(matrix):
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    digest = hashlib.sha1(str(matrix.shape).encode("ascii"))
+    digest.update(memoryview(matrix).cast("B"))
+    return digest.hexdigest()
+
+
+class IVFIndex:
+    """Inverted-file index over the rows of a normalized embedding matrix.
+
+    Rows are bucketed by a k-means coarse quantizer of ``nlist`` centroids; a
+    query only scans the ``nprobe`` buckets with the highest inner product.
+    With ``pq_m`` > 0 the residuals are product-quantized into ``pq_m`` uint8
+    codes per row: candidates are ranked by asymmetric distance first and only
+    the best ``rerank`` of them are scored exactly. Exact scores always come
+    from the live matrix passed to ``search``. ``fingerprint`` identifies the
+    matrix it was built from (see ``matrix_fingerprint``).
+    """
+
+    def __init__(self, centroids, list_offsets, list_rows, codebooks=None, codes=None, nprobe=8, rerank=200,
+                 fingerprint=None):
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_rows = list_rows
+        self.codebooks = codebooks  # (pq_m, 256, sub_dimensions) or None
+        self.codes = codes  # (n_rows, pq_m) uint8, aligned with list_rows
+        self.nprobe = nprobe
+        self.rerank = rerank
+        self.fingerprint = fingerprint
+
+    @property
+    def n_rows(self):
+        return self.list_rows.shape[0]
+
+    @classmethod
+    def build(cls, matrix, nlist=None, pq_m=0, nprobe=8, rerank=200, n_iter=20, seed=42):
+        matrix = np.asarray(matrix, dtype=np.float32)
+        nlist = nlist or max(1, int(4 * np.sqrt(matrix.shape[0])))
+        centroids = kmeans(matrix, nlist, n_iter=n_iter, seed=seed)
+        labels = assign(matrix, centroids)
+
+        list_rows = np.argsort(labels, kind="stable")
+        list_offsets = np.zeros(centroids.shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=centroids.shape[0]), out=list_offsets[1:])
+
+        codebooks = codes = None
+        if pq_m:
+            if matrix.shape[1] % pq_m:
+                raise ValueError(f"pq_m={pq_m} must divide the embedding dimensions ({matrix.shape[1]})")
+            residuals = matrix[list_rows] - centroids[labels[list_rows]]
+            sub = matrix.shape[1] // pq_m
+            codebooks = np.zeros((pq_m, 256, sub), dtype=np.float32)
+            codes = np.zeros((matrix.shape[0], pq_m), dtype=np.uint8)
+            for m in range(pq_m):
+                part = residuals[:, m * sub:(m + 1) * sub]
+                books = kmeans(part, 256, n_iter=n_iter, seed=seed + m)
+                codebooks[m, :books.shape[0]] = books
+                codes[:, m] = assign(part, books)
+        return cls(centroids, list_offsets, list_rows, codebooks, codes, nprobe, rerank)
+
+    # Function to return the best (rows, exact scores) for a normalized query
+    def search(self, query, k, matrix, nprobe=None, rerank=None):
+        query = np.asarray(query, dtype=np.float32)
+        coarse = self.centroids @ query
+        lists = top_k_indices(coarse, nprobe or self.nprobe)
+        starts, ends = self.list_offsets[lists], self.list_offsets[lists + 1]
+        positions = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)]) if len(lists) else np.empty(0, np.int64)
+        rows = self.list_rows[positions]
+
+        if self.codes is not None:
+            sub = self.codebooks.shape[2]
+            lut = np.einsum("mcs,ms->mc", self.codebooks, query.reshape(-1, sub))
+            approx = np.repeat(coarse[lists], ends - starts)
+            approx += lut[np.arange(lut.shape[0]), self.codes[positions]].sum(axis=1)
+            keep = top_k_indices(approx, max(rerank or self.rerank, k))
+            rows = rows[keep]
+
+        exact = matrix[rows] @ query
+        order = top_k_indices(exact, k)
+        return rows[order], exact[order]
+
+    def save(self, path):
+        arrays = {
+            "centroids": self.centroids,
+            "list_offsets": self.list_offsets,
+            "list_rows": self.list_rows,
+            "params": np.array([self.nprobe, self.rerank]),
+        }
+        if self.codes is not None:
+            arrays.update(codebooks=self.codebooks, codes=self.codes)
+        if self.fingerprint is not None:
+            arrays["fingerprint"] = np.array(self.fingerprint)
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            nprobe, rerank = (int(x) for x in data["params"])
+            return cls(
+                data["centroids"], data["list_offsets"], data["list_rows"],
+                data["codebooks"] if "codebooks" in data else None,
+                data["codes"] if "codes" in data else None,
+                nprobe, rerank,
+                str(data["fingerprint"]) if "fingerprint" in data else None,
+            )
+
+
+class AnnSearch:
+    """Provider search on a SpecialtyIndex through an IVFIndex.
+
+    Same interface and result tuples as SpecialtyIndex. Rows added to the
+    index after the IVF was built are not searched until it is rebuilt.
+    """
+
+    def __init__(self, index, engine, oversample=10, nprobe=None, rerank=None):
+        self.index = index
+        self.engine = engine
+        self.oversample = oversample
+        self.nprobe = nprobe
+        self.rerank = rerank
+
+    def _search(self, query_embedding, k):
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+        rows, scores = self.engine.search(query, k, self.index.matrix, self.nprobe, self.rerank)
+        providers = self.index.row_provider[rows]
+        live = providers >= 0
+        return providers[live], scores[live]
+
+    def top_specialties(self, query_embedding, top_k=5):
+        providers, scores = self._search(query_embedding, top_k)
+        return [self.index.result(p, s) for p, s in zip(providers, scores)]
+
+    def top_providers(self, query_embedding, top_k=5):
+        providers, scores = self._search(query_embedding, top_k * self.oversample)
+        results, seen = [], set()
+        # Rows come best first, so the first row of a provider is its best specialty
+        for provider, score in zip(providers, scores):
+            if provider not in seen:
+                seen.add(provider)
+                results.append(self.index.result(provider, score))
+                if len(results) == top_k:
+                    break
+        return results
+
+
+# Function to load a persisted IVF for this index, or build (and save) it when missing or stale: built
+# from another matrix (e.g. after a re-embed, even with the same number of rows), or saved without a
+# fingerprint
+def load_or_build_ivf(index, path, **params):
+    fingerprint = matrix_fingerprint(index.matrix)
+    if os.path.exists(path):
+        engine = IVFIndex.load(path)
+        if engine.fingerprint == fingerprint:
+            return engine
+    engine = IVFIndex.build(index.matrix, **params)
+    engine.fingerprint = fingerprint
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    engine.save(path)
+    return engine
@@ -0,0 +1,123 @@
+from collections import namedtuple
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = np.pi * EARTH_RADIUS_KM / 180
+
+# Location filter of a search: providers within radius_km of (lat, lon), and/or its nearest providers
+GeoFilter = namedtuple("GeoFilter", ["lat", "lon", "radius_km", "nearest"], defaults=(None, None))
+
+
+# Function to compute great-circle distances in km from (lat0, lon0)
+def haversine_km(lat, lon, lat0, lon0):
+    lat, lon, lat0, lon0 = np.radians(lat), np.radians(lon), np.radians(lat0), np.radians(lon0)
+    a = np.sin((lat - lat0) / 2) ** 2 + np.cos(lat) * np.cos(lat0) * np.sin((lon - lon0) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+# Function to read a coordinate as a float (NaN when missing or not a number)
+def coordinate(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class GeoIndex:
+    """Grid index of provider coordinates for radius and nearest-neighbour lookups.
+
+    Providers are bucketed into ``cell_deg`` x ``cell_deg`` cells stored
+    CSR-style (positions sorted by cell id). A radius query only visits the
+    cells overlapping the query's bounding box, then checks the exact
+    haversine distance. Providers without coordinates are never returned.
+    """
+
+    def __init__(self, lat, lon, cell_deg=1.0):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.cell_deg = cell_deg
+        self.n_rows = int(np.ceil(180 / cell_deg)) + 1
+        self.n_cols = int(np.ceil(360 / cell_deg))
+
+        located = np.flatnonzero(~(np.isnan(self.lat) | np.isnan(self.lon)))
+        cells = self._cell(self.lat[located], self.lon[located])
+        order = np.argsort(cells, kind="stable")
+        self.positions = located[order]
+        self.cells = cells[order]
+
+    def __len__(self):
+        return self.positions.size
+
+    @classmethod
+    def from_index(cls, index, cell_deg=1.0):
+        lat = [coordinate(provider[2]) for provider in index.providers]
+        lon = [coordinate(provider[3]) for provider in index.providers]
+        return cls(lat, lon, cell_deg)
+
+    def _cell(self, lat, lon):
+        row = np.floor((np.asarray(lat) + 90) / self.cell_deg).astype(np.int64)
+        col = np.floor((np.asarray(lon) + 180) / self.cell_deg).astype(np.int64) % self.n_cols
+        return row * self.n_cols + col
+
+    # Function to find the providers within radius_km of (lat, lon): returns (positions, distances)
+    def within(self, lat, lon, radius_km):
+        dlat = radius_km / KM_PER_DEGREE
+        lat_min, lat_max = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+        rows = np.arange(int((lat_min + 90) // self.cell_deg), int((lat_max + 90) // self.cell_deg) + 1)
+
+        # Longitude span of the bounding box at the latitude farthest from the equator
+        widest = np.cos(np.radians(max(abs(lat_min), abs(lat_max))))
+        dlon = dlat / widest if widest > 1e-9 else 360.0
+        if dlon >= 180:
+            cols = np.arange(self.n_cols)
+        else:
+            first = int((lon - dlon + 180) // self.cell_deg)
+            last = int((lon + dlon + 180) // self.cell_deg)
+            cols = np.arange(first, last + 1) % self.n_cols
+            cols = np.unique(cols)
+
+        cells = (rows[:, None] * self.n_cols + cols[None, :]).ravel()
+        starts = np.searchsorted(self.cells, cells, side="left")
+        ends = np.searchsorted(self.cells, cells, side="right")
+        lengths = ends - starts
+        offsets = np.arange(lengths.sum()) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        candidates = self.positions[offsets]
+
+        distances = haversine_km(self.lat[candidates], self.lon[candidates], lat, lon)
+        keep = distances <= radius_km
+        return candidates[keep], distances[keep]
+
+    # Function to find the k providers nearest to (lat, lon), optionally within radius_km:
+    # the search radius doubles until it holds k providers, so only nearby cells are visited
+    def nearest(self, lat, lon, k, radius_km=None, start_km=50.0):
+        limit = radius_km if radius_km is not None else np.pi * EARTH_RADIUS_KM
+        radius = min(start_km, limit)
+        while True:
+            positions, distances = self.within(lat, lon, radius)
+            if positions.size >= k or radius >= limit:
+                break
+            radius = min(2 * radius, limit)
+        order = np.argsort(distances, kind="stable")[:k]
+        return positions[order], distances[order]
+
+    # Function to apply a GeoFilter: returns the positions of the matching providers
+    def filter(self, geo):
+        if geo.nearest:
+            return self.nearest(geo.lat, geo.lon, geo.nearest, geo.radius_km)[0]
+        if geo.radius_km is None:
+            raise ValueError("A location filter needs radius_km or nearest")
+        return self.within(geo.lat, geo.lon, geo.radius_km)[0]
+
+
+# Function to build a GeoFilter from user input, checking the coordinates and limits
+def geo_filter(lat, lon, radius_km=None, nearest=None):
+    lat, lon = float(lat), float(lon)
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError(f"Invalid location: {lat}, {lon}")
+    if radius_km is None and not nearest:
+        raise ValueError("A location filter needs radius_km or nearest")
+    if radius_km is not None and float(radius_km) <= 0:
+        raise ValueError("radius_km must be positive")
+    if nearest is not None and int(nearest) <= 0:
+        raise ValueError("nearest must be positive")
+    return GeoFilter(lat, lon, None if radius_km is None else float(radius_km), None if nearest is None else int(nearest))
@@ -0,0 +1,396 @@
+import threading
+import numpy as np
+
+from grevia.embeddings.codec import decode_embedding
+from grevia.embeddings.matrix import load_embedding_matrix
+
+# Cypher query pulling every provider with its specialty embeddings
+SPECIALTY_INDEX_QUERY = """
+MATCH (provider:schema1__Organization)
+OPTIONAL MATCH (provider)-[:custom__hasSpecialty]->(specialty:specialties__Specialty)
+RETURN coalesce(provider.uri, provider.schema1__name) AS provider_id,
+       provider.schema1__name AS name,
+       provider.schema1__url AS url,
+       provider.schema1__latitude AS lat,
+       provider.schema1__longitude AS lon,
+       specialty.uri AS specialty_uri,
+       specialty.ns2__embedding_value AS embedding
+"""
+
+# Same rows without the embeddings, for when vectors come from the part1 matrix artifact
+SPECIALTY_ROWS_QUERY = SPECIALTY_INDEX_QUERY.replace(
+    "specialty.ns2__embedding_value AS embedding", "null AS embedding"
+)
+
+
+# Function to L2-normalize the rows of a matrix (zero rows are left untouched)
+def normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+# Function to return the indices of the top_k scores, best first
+def top_k_indices(scores, top_k):
+    if top_k <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.int64)
+    if top_k < scores.size:
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+    else:
+        candidates = np.arange(scores.size)
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+AGGREGATIONS = ("max", "mean", "logsumexp", "top_m")
+
+
+# Function to reduce row scores to one score per segment (CSR: segment i is rows
+# starts[i]:starts[i+1]) in one vectorized pass; scores are (rows,) or (rows, queries).
+#   max        best matching specialty
+#   mean       average over all specialties
+#   logsumexp  smooth max: temperature * log(mean(exp(score / temperature))), between mean and max
+#   top_m      average of the m best specialties
+def aggregate_segments(scores, starts, aggregation="max", m=3, temperature=0.1):
+    counts = np.diff(np.append(starts, scores.shape[0]))
+    shape = (-1,) + (1,) * (scores.ndim - 1)
+    if aggregation == "max":
+        return np.maximum.reduceat(scores, starts, axis=0)
+    if aggregation == "mean":
+        return np.add.reduceat(scores, starts, axis=0) / counts.reshape(shape)
+
+    segment = np.repeat(np.arange(starts.size), counts)
+    if aggregation == "logsumexp":
+        peak = np.maximum.reduceat(scores, starts, axis=0)
+        total = np.add.reduceat(np.exp((scores - peak[segment]) / temperature), starts, axis=0)
+        return peak + temperature * np.log(total / counts.reshape(shape))
+    if aggregation == "top_m":
+        # One argsort orders rows by (segment, score desc): segments are spaced wider than the score range
+        keys = 4.0 * segment.reshape(shape) - scores.astype(np.float64)
+        ranked = np.take_along_axis(scores, np.argsort(keys, axis=0, kind="stable"), axis=0)
+        keep = (np.arange(segment.size) - starts[segment]) < m
+        total = np.add.reduceat(np.where(keep.reshape(shape), ranked, 0.0), starts, axis=0)
+        return total / np.minimum(counts, m).reshape(shape)
+    raise ValueError(f"Unknown aggregation: {aggregation} (expected one of {', '.join(AGGREGATIONS)})")
+
+
+# Function to group index records by provider: {provider_id: (info, [(specialty_uri, embedding)])};
+# embeddings of another dimension are skipped, or refused with ``strict``
+def group_records(records, dimensions=None, strict=False):
+    grouped = {}
+    for record in records:
+        provider_id = record["provider_id"]
+        if provider_id not in grouped:
+            info = (record["name"], record["url"], record["lat"], record["lon"])
+            grouped[provider_id] = (info, [])
+
+        embedding = decode_embedding(record["embedding"])
+        if embedding is None or embedding.ndim != 1:
+            continue
+        if dimensions is None:
+            dimensions = embedding.shape[0]
+        if embedding.shape[0] != dimensions:
+            if strict:
+                raise ValueError(f"Specialty {record['specialty_uri']} has a {embedding.shape[0]}-d embedding but "
+                                 f"the index holds {dimensions}-d vectors (re-embedded with another model?); "
+                                 f"restart the app with the matching EMBEDDING_BACKEND")
+            continue
+        grouped[provider_id][1].append((record["specialty_uri"], embedding))
+    return grouped, dimensions
+
+
+class SpecialtyIndex:
+    """In-memory index of specialty embeddings.
+
+    Rows of ``matrix`` are the L2-normalized specialty embeddings (float32,
+    C-contiguous); ``row_provider[i]`` is the position in ``providers`` of the
+    provider owning row ``i``. A query is scored with a single matrix-vector
+    product. Rows can be patched in place with ``apply_records``; rows freed
+    by a patch are marked with provider ``-1`` and reused by later patches.
+    Provider scores are reduced over a CSR view of the live rows grouped by
+    provider (see ``aggregate_segments``), rebuilt lazily after a patch.
+    """
+
+    def __init__(self, matrix, row_provider, row_specialty, provider_ids, providers):
+        self._matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        self._row_provider = np.asarray(row_provider, dtype=np.int64)
+        self._n_rows = self._matrix.shape[0]
+        self.row_specialty = list(row_specialty)
+        self.provider_ids = list(provider_ids)
+        self.providers = list(providers)  # (name, url, lat, lon) per provider
+        self.provider_pos = {pid: i for i, pid in enumerate(self.provider_ids)}
+
+        self._free_rows = []
+        self._provider_rows = {}
+        for row, provider in enumerate(self._row_provider):
+            self._provider_rows.setdefault(int(provider), []).append(row)
+        self._segments = None
+        self._positions = None  # (version, {(name, url): provider position}), see provider_similarities
+        self.version = 0  # bumped by every patch that changes a provider, so derived structures know when to rebuild
+        self._lock = threading.RLock()
+
+    @property
+    def matrix(self):
+        return self._matrix[:self._n_rows]
+
+    @property
+    def row_provider(self):
+        return self._row_provider[:self._n_rows]
+
+    @property
+    def dimensions(self):
+        return self._matrix.shape[1]
+
+    def __len__(self):
+        return self._n_rows - len(self._free_rows)
+
+    @classmethod
+    def from_records(cls, records, dimensions=None):
+        grouped, dimensions = group_records(records, dimensions)
+        provider_ids = []
+        providers = []
+        vectors = []
+        row_provider = []
+        row_specialty = []
+
+        for provider_id, (info, rows) in grouped.items():
+            for specialty_uri, embedding in rows:
+                vectors.append(embedding)
+                row_provider.append(len(provider_ids))
+                row_specialty.append(specialty_uri)
+            provider_ids.append(provider_id)
+            providers.append(info)
+
+        if vectors:
+            matrix = normalize_rows(np.vstack(vectors))
+        else:
+            matrix = np.zeros((0, dimensions or 0), dtype=np.float32)
+        return cls(matrix, row_provider, row_specialty, provider_ids, providers)
+
+    @classmethod
+    def load(cls, driver, database=None, matrix_path=None):
+        if matrix_path:
+            return cls.load_with_matrix(driver, matrix_path, database)
+        with driver.session(database=database) as session:
+            records = session.run(SPECIALTY_INDEX_QUERY)
+            return cls.from_records(records)
+
+    # Function to load provider rows from Neo4j and their vectors from a memory-mapped
+    # part1 artifact (providers_embeddings.npy + _uris.json) instead of over the wire
+    @classmethod
+    def load_with_matrix(cls, driver, matrix_path, database=None):
+        uris, matrix = load_embedding_matrix(matrix_path)
+        row_of = {uri: row for row, uri in enumerate(uris)}
+        with driver.session(database=database) as session:
+            records = [
+                dict(record, embedding=matrix[row_of[record["specialty_uri"]]])
+                if record["specialty_uri"] in row_of else dict(record)
+                for record in session.run(SPECIALTY_ROWS_QUERY)
+            ]
+        return cls.from_records(records, dimensions=matrix.shape[1])
+
+    # Function to take a row for a new specialty, reusing freed rows before growing the buffer
+    def _allocate_row(self):
+        if self._free_rows:
+            return self._free_rows.pop()
+        if self._n_rows == self._matrix.shape[0]:
+            capacity = max(16, 2 * self._matrix.shape[0])
+            matrix = np.zeros((capacity, self.dimensions), dtype=np.float32)
+            matrix[:self._n_rows] = self._matrix[:self._n_rows]
+            row_provider = np.full(capacity, -1, dtype=np.int64)
+            row_provider[:self._n_rows] = self._row_provider[:self._n_rows]
+            self._matrix, self._row_provider = matrix, row_provider
+        self.row_specialty.append(None)
+        self._n_rows += 1
+        return self._n_rows - 1
+
+    def _release_row(self, row):
+        self._matrix[row] = 0.0
+        self._row_provider[row] = -1
+        self.row_specialty[row] = None
+        self._free_rows.append(row)
+
+    # Function to return the CSR view of the live rows: (row order, segment starts, segment provider)
+    def segments(self):
+        with self._lock:
+            if self._segments is None:
+                live = np.flatnonzero(self.row_provider >= 0)
+                order = live[np.argsort(self.row_provider[live], kind="stable")]
+                providers = self.row_provider[order]
+                starts = np.flatnonzero(np.r_[True, providers[1:] != providers[:-1]]) if order.size else order
+                self._segments = (order, starts, providers[starts])
+            return self._segments
+
+    # Function to tell whether a provider already has this info and these specialty rows
+    def _unchanged(self, provider_id, info, rows):
+        pos = self.provider_pos.get(provider_id)
+        if pos is None or self.providers[pos] != info:
+            return False
+        old_rows = self._provider_rows.get(pos, [])
+        if [self.row_specialty[row] for row in old_rows] != [specialty_uri for specialty_uri, _ in rows]:
+            return False
+        return not rows or np.array_equal(self._matrix[old_rows],
+                                          normalize_rows(np.vstack([embedding for _, embedding in rows])))
+
+    # Function to replace the info and specialty rows of one provider in place; returns False (and
+    # leaves the version alone) when they are unchanged
+    def update_provider(self, provider_id, info, rows):
+        with self._lock:
+            if self._unchanged(provider_id, info, rows):
+                return False
+            self._segments = None
+            self.version += 1
+            pos = self.provider_pos.get(provider_id)
+            if pos is None:
+                pos = len(self.provider_ids)
+                self.provider_pos[provider_id] = pos
+                self.provider_ids.append(provider_id)
+                self.providers.append(info)
+            else:
+                self.providers[pos] = info
+
+            old_rows = self._provider_rows.pop(pos, [])
+            for row in old_rows[len(rows):]:
+                self._release_row(row)
+            targets = old_rows[:len(rows)]
+            while len(targets) < len(rows):
+                targets.append(self._allocate_row())
+
+            if rows:
+                vectors = normalize_rows(np.vstack([embedding for _, embedding in rows]))
+                self._matrix[targets] = vectors
+                self._row_provider[targets] = pos
+                for row, (specialty_uri, _) in zip(targets, rows):
+                    self.row_specialty[row] = specialty_uri
+                self._provider_rows[pos] = targets
+            return True
+
+    # Function to patch the index with the rows of changed providers and count the providers whose
+    # content differed; nothing is patched when an embedding does not fit the matrix, as the query
+    # embedder would not match it either
+    def apply_records(self, records):
+        with self._lock:
+            dimensions = self.dimensions or None
+            grouped, dimensions = group_records(records, dimensions, strict=True)
+            if dimensions and not self.dimensions and self._n_rows == 0:
+                self._matrix = np.zeros((0, dimensions), dtype=np.float32)
+            return sum(self.update_provider(provider_id, info, rows) for provider_id, (info, rows) in grouped.items())
+
+    # Function to compute the cosine similarity of the query with every specialty row
+    def score(self, query_embedding):
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+        with self._lock:
+            scores = self.matrix @ query
+            row_provider = self.row_provider.copy()
+        scores[row_provider < 0] = -np.inf
+        return scores, row_provider
+
+    # Function to score a batch of queries at once: one matrix-matrix product, (rows, queries)
+    def score_batch(self, query_embeddings):
+        queries = normalize_rows(np.asarray(query_embeddings, dtype=np.float32).reshape(-1, self.dimensions))
+        with self._lock:
+            scores = self.matrix @ queries.T
+            row_provider = self.row_provider.copy()
+        scores[row_provider < 0] = -np.inf
+        return scores, row_provider
+
+    # Function to return the live rows of a set of providers, via the CSR view
+    def provider_rows(self, providers):
+        order, starts, segment_provider = self.segments()
+        segment_of = np.full(len(self.providers), -1, dtype=np.int64)
+        segment_of[segment_provider] = np.arange(segment_provider.size)
+        segments = segment_of[np.asarray(providers, dtype=np.int64)]
+        segments = segments[segments >= 0]
+        ends = np.append(starts[1:], order.size)
+        lengths = ends[segments] - starts[segments]
+        positions = np.arange(lengths.sum()) + np.repeat(starts[segments] - (np.cumsum(lengths) - lengths), lengths)
+        return order[positions]
+
+    # Function to score a subset of rows: returns (scores, providers) of the live ones
+    def score_rows(self, rows, query_embedding):
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+        with self._lock:
+            scores = self.matrix[rows] @ query
+            providers = self.row_provider[rows]
+        live = providers >= 0
+        return scores[live], providers[live]
+
+    # Function to find the top specialty rows among a subset of rows
+    def rank_rows_specialties(self, rows, query_embedding, top_k=5):
+        scores, providers = self.score_rows(rows, query_embedding)
+        return [self.result(providers[i], scores[i]) for i in top_k_indices(scores, top_k)]
+
+    # Function to find the top providers among a subset of rows (a provider is scored on its rows in the subset)
+    def rank_rows(self, rows, query_embedding, top_k=5, aggregation="max", m=3, temperature=0.1):
+        scores, providers = self.score_rows(rows, query_embedding)
+        if not scores.size:
+            return []
+        order = np.argsort(providers, kind="stable")
+        providers = providers[order]
+        starts = np.flatnonzero(np.r_[True, providers[1:] != providers[:-1]])
+        best = aggregate_segments(scores[order], starts, aggregation, m, temperature)
+        return [self.result(providers[starts[i]], best[i]) for i in top_k_indices(best, top_k)]
+
+    # Function to score providers given by (name, url) for one query: {(name, url): similarity}
+    # (providers without specialty rows are left out)
+    def provider_similarities(self, query_embedding, keys, aggregation="max", m=3, temperature=0.1):
+        with self._lock:
+            if self._positions is None or self._positions[0] != self.version:
+                self._positions = (self.version, {info[:2]: p for p, info in enumerate(self.providers)})
+            positions = [self._positions[1][key] for key in keys if key in self._positions[1]]
+        if not positions:
+            return {}
+        rows = self.provider_rows(positions)
+        return {(name, url): similarity for similarity, name, url, _, _ in
+                self.rank_rows(rows, query_embedding, len(positions), aggregation, m, temperature)}
+
+    def result(self, provider, similarity):
+        name, url, lat, lon = self.providers[provider]
+        return (float(similarity), name, url, lat, lon)
+
+    # Function to find the top specialty rows (a provider can appear several times)
+    def top_specialties(self, query_embedding, top_k=5):
+        scores, row_provider = self.score(query_embedding)
+        return [
+            self.result(row_provider[i], scores[i])
+            for i in top_k_indices(scores, top_k)
+            if row_provider[i] >= 0
+        ]
+
+    # Function to score every provider for one query (n_providers,) or a batch (n_providers, n_queries).
+    # Providers without any specialty embedding score 0.0
+    def provider_scores(self, query_embeddings, aggregation="max", m=3, temperature=0.1):
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        single = queries.ndim == 1
+        queries = normalize_rows(queries.reshape(-1, self.dimensions))
+        with self._lock:
+            order, starts, segment_provider = self.segments()
+            scores = self.matrix @ queries.T
+            best = np.zeros((len(self.providers), queries.shape[0]), dtype=np.float32)
+        if starts.size:
+            best[segment_provider] = aggregate_segments(scores[order], starts, aggregation, m, temperature)
+        return best[:, 0] if single else best
+
+    # Function to find the top providers, scored by aggregating their specialty
+    # similarities (best matching specialty by default)
+    def top_providers(self, query_embedding, top_k=5, aggregation="max", m=3, temperature=0.1):
+        best = self.provider_scores(query_embedding, aggregation, m, temperature)
+        return [self.result(p, best[p]) for p in top_k_indices(best, top_k)]
+
+    # Batch variant of top_specialties: one result list per query
+    def top_specialties_batch(self, query_embeddings, top_k=5):
+        scores, row_provider = self.score_batch(query_embeddings)
+        return [
+            [self.result(row_provider[i], column[i]) for i in top_k_indices(column, top_k) if row_provider[i] >= 0]
+            for column in scores.T
+        ]
+
+    # Batch variant of top_providers: one result list per query
+    def top_providers_batch(self, query_embeddings, top_k=5, aggregation="max", m=3, temperature=0.1):
+        best = self.provider_scores(np.atleast_2d(query_embeddings), aggregation, m, temperature)
+        return [[self.result(p, column[p]) for p in top_k_indices(column, top_k)] for column in best.T]
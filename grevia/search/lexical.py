@@ -0,0 +1,188 @@
+import os
+import re
+from collections import Counter
+import numpy as np
+
+from grevia.search.index import top_k_indices
+from grevia.search.refresh import current_watermark
+
+# Cypher query pulling the text of every provider: name, description and specialty rdf:values
+LEXICAL_DOCUMENTS_QUERY = """
+MATCH (provider:schema1__Organization)
+OPTIONAL MATCH (provider)-[:custom__hasSpecialty]->(specialty:specialties__Specialty)
+WITH provider, collect(specialty.rdf__value) AS specialty_values
+RETURN coalesce(provider.uri, provider.schema1__name) AS provider_id,
+       provider.schema1__name AS name,
+       provider.schema1__url AS url,
+       provider.schema1__latitude AS lat,
+       provider.schema1__longitude AS lon,
+       provider.schema1__description AS description,
+       specialty_values
+"""
+
+PROVIDER_COUNT_QUERY = "MATCH (provider:schema1__Organization) RETURN count(provider) AS providers"
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it", "of", "on",
+    "or", "our", "that", "the", "their", "this", "to", "we", "what", "with", "my", "i", "do", "can",
+}
+
+
+# Function to split a text into lowercase word tokens (stopwords removed). Underscores
+# separate words too, as specialty values are stored as identifiers (e.g. "soil_health")
+def tokenize(text):
+    return [token for token in re.findall(r"[^\W_]+", text.lower()) if token not in STOPWORDS]
+
+
+# Function to join the searchable text of a provider record
+def document_text(record):
+    parts = [record.get("name"), record.get("description")] + list(record.get("specialty_values") or [])
+    texts = []
+    for part in parts:
+        if isinstance(part, (list, tuple)):
+            texts.extend(str(p) for p in part if p)
+        elif part:
+            texts.append(str(part))
+    return " ".join(texts)
+
+
+class BM25Index:
+    """Inverted index with Okapi BM25 scoring over provider texts.
+
+    Postings are stored CSR-style: the documents containing term ``t`` are
+    ``postings[offsets[t]:offsets[t + 1]]`` with their term frequencies in
+    ``frequencies``. A query only touches the postings of its own terms.
+    """
+
+    def __init__(self, terms, offsets, postings, frequencies, doc_lengths, provider_ids, providers,
+                 k1=1.5, b=0.75, watermark=0):
+        self.terms = {term: i for i, term in enumerate(terms)}
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.postings = np.asarray(postings, dtype=np.int32)
+        self.frequencies = np.asarray(frequencies, dtype=np.float32)
+        self.doc_lengths = np.asarray(doc_lengths, dtype=np.float32)
+        self.provider_ids = list(provider_ids)
+        self.providers = list(providers)  # (name, url, lat, lon) per provider
+        self.k1 = k1
+        self.b = b
+        self.watermark = watermark
+
+        n_docs = len(self.provider_ids)
+        doc_freq = np.diff(self.offsets)
+        self.idf = np.log1p((n_docs - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+        average = self.doc_lengths.mean() if n_docs else 1.0
+        self._length_norm = k1 * (1 - b + b * self.doc_lengths / (average or 1.0))
+
+    def __len__(self):
+        return len(self.provider_ids)
+
+    @classmethod
+    def from_records(cls, records, **params):
+        provider_ids, providers, doc_lengths = [], [], []
+        term_ids, term_docs = {}, []
+        for record in records:
+            doc = len(provider_ids)
+            provider_ids.append(record["provider_id"])
+            providers.append((record["name"], record["url"], record["lat"], record["lon"]))
+            counts = Counter(tokenize(document_text(record)))
+            doc_lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                term_docs.append((term_ids.setdefault(term, len(term_ids)), doc, count))
+
+        entries = np.array(term_docs, dtype=np.int64).reshape(-1, 3)
+        entries = entries[np.argsort(entries[:, 0], kind="stable")]
+        offsets = np.zeros(len(term_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(entries[:, 0], minlength=len(term_ids)), out=offsets[1:])
+        return cls(list(term_ids), offsets, entries[:, 1], entries[:, 2], doc_lengths,
+                   provider_ids, providers, **params)
+
+    @classmethod
+    def load_from_neo4j(cls, driver, database=None, **params):
+        with driver.session(database=database) as session:
+            return cls.from_records((dict(record) for record in session.run(LEXICAL_DOCUMENTS_QUERY)), **params)
+
+    # Function to tell whether every query term is in the vocabulary (an exact-term lookup)
+    def covers(self, query):
+        tokens = tokenize(query)
+        return bool(tokens) and all(token in self.terms for token in tokens)
+
+    # Function to compute the BM25 score of every provider for a query
+    def score(self, query):
+        scores = np.zeros(len(self.provider_ids), dtype=np.float32)
+        for token, count in Counter(tokenize(query)).items():
+            term = self.terms.get(token)
+            if term is None:
+                continue
+            start, end = self.offsets[term], self.offsets[term + 1]
+            docs, tf = self.postings[start:end], self.frequencies[start:end]
+            scores[docs] += count * self.idf[term] * tf * (self.k1 + 1) / (tf + self._length_norm[docs])
+        return scores
+
+    # Function to find the top providers by BM25 score (providers matching no term are left out)
+    def top_providers(self, query, top_k=5):
+        scores = self.score(query)
+        results = []
+        for p in top_k_indices(scores, top_k):
+            if scores[p] <= 0:
+                break
+            name, url, lat, lon = self.providers[p]
+            results.append((float(scores[p]), name, url, lat, lon))
+        return results
+
+    def save(self, path):
+        np.savez(
+            path,
+            terms=np.array(list(self.terms), dtype=str),
+            offsets=self.offsets,
+            postings=self.postings,
+            frequencies=self.frequencies,
+            doc_lengths=self.doc_lengths,
+            provider_ids=np.array(self.provider_ids, dtype=str),
+            names=np.array([p[0] or "" for p in self.providers], dtype=str),
+            urls=np.array([p[1] or "" for p in self.providers], dtype=str),
+            coordinates=np.array([[np.nan if v is None else v for v in p[2:]] for p in self.providers],
+                                 dtype=np.float64).reshape(-1, 2),
+            params=np.array([self.k1, self.b, self.watermark], dtype=np.float64),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            providers = [
+                (name or None, url or None, None if np.isnan(lat) else float(lat), None if np.isnan(lon) else float(lon))
+                for name, url, (lat, lon) in zip(data["names"].tolist(), data["urls"].tolist(), data["coordinates"])
+            ]
+            k1, b, watermark = data["params"].tolist()
+            return cls(data["terms"].tolist(), data["offsets"], data["postings"], data["frequencies"],
+                       data["doc_lengths"], data["provider_ids"].tolist(), providers,
+                       k1=k1, b=b, watermark=int(watermark))
+
+
+# Function to fuse several rankings of result tuples with reciprocal rank fusion.
+# Providers are matched on (name, url); the fused score replaces the similarity.
+def reciprocal_rank_fusion(rankings, top_k=5, k=60):
+    scores, results = {}, {}
+    for ranking in rankings:
+        for rank, result in enumerate(ranking, start=1):
+            key = (result[1], result[2])
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            results.setdefault(key, result)
+    best = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    return [(scores[key],) + tuple(results[key][1:]) for key in best]
+
+
+# Function to load the persisted BM25 index, or build (and save) it from Neo4j when
+# missing or when the graph changed since it was built
+def load_or_build_bm25(driver, path, database=None):
+    watermark = current_watermark(driver, database=database)
+    if os.path.exists(path):
+        lexical = BM25Index.load(path)
+        with driver.session(database=database) as session:
+            n_providers = session.run(PROVIDER_COUNT_QUERY).single()["providers"]
+        if lexical.watermark == watermark and len(lexical) == n_providers:
+            return lexical
+    lexical = BM25Index.load_from_neo4j(driver, database=database, watermark=watermark)
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    lexical.save(path)
+    return lexical
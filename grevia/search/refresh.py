@@ -0,0 +1,119 @@
+import threading
+import time
+
+# Property stamped by every writer with timestamp() when it changes a provider or specialty
+UPDATED_AT = "custom__updatedAt"
+
+# Cypher query returning the highest change stamp currently in the graph
+WATERMARK_QUERY = f"""
+MATCH (n)
+WHERE n:schema1__Organization OR n:specialties__Specialty
+RETURN max(n.{UPDATED_AT}) AS watermark
+"""
+
+# Cypher query returning every specialty row of the providers changed since $since:
+# providers stamped themselves, or linked to a stamped specialty
+CHANGED_ROWS_QUERY = f"""
+CALL {{
+    MATCH (provider:schema1__Organization)
+    WHERE provider.{UPDATED_AT} > $since
+    RETURN provider
+    UNION
+    MATCH (provider:schema1__Organization)-[:custom__hasSpecialty]->(changed:specialties__Specialty)
+    WHERE changed.{UPDATED_AT} > $since
+    RETURN provider
+}}
+OPTIONAL MATCH (provider)-[:custom__hasSpecialty]->(specialty:specialties__Specialty)
+RETURN coalesce(provider.uri, provider.schema1__name) AS provider_id,
+       provider.schema1__name AS name,
+       provider.schema1__url AS url,
+       provider.schema1__latitude AS lat,
+       provider.schema1__longitude AS lon,
+       specialty.uri AS specialty_uri,
+       specialty.ns2__embedding_value AS embedding,
+       provider.{UPDATED_AT} AS provider_updated_at,
+       specialty.{UPDATED_AT} AS specialty_updated_at
+"""
+
+# Cypher query stamping every provider and specialty, for loaders that (re)import the whole KG
+STAMP_ALL_QUERY = f"""
+MATCH (n)
+WHERE n:schema1__Organization OR n:specialties__Specialty
+SET n.{UPDATED_AT} = timestamp()
+RETURN count(n) AS stamped
+"""
+
+# Range indexes so the change queries are index seeks instead of label scans
+CHANGE_TRACKING_INDEXES = [
+    f"CREATE INDEX organization_updated_at IF NOT EXISTS FOR (n:schema1__Organization) ON (n.{UPDATED_AT})",
+    f"CREATE INDEX specialty_updated_at IF NOT EXISTS FOR (n:specialties__Specialty) ON (n.{UPDATED_AT})",
+]
+
+
+# Function to read the current change watermark (0 when nothing is stamped yet)
+def current_watermark(driver, database=None):
+    with driver.session(database=database) as session:
+        record = session.run(WATERMARK_QUERY).single()
+        return record["watermark"] or 0
+
+
+class IndexRefresher(threading.Thread):
+    """Background thread keeping a SpecialtyIndex in sync with Neo4j.
+
+    Every ``interval`` seconds it fetches the providers changed since the last
+    watermark and patches their rows in the index. The query looks back
+    ``overlap_ms`` before the watermark so that transactions committed late
+    with an older timestamp() are not missed; providers fetched again with
+    the stamp they were already applied with are skipped, so a bulk stamp
+    (every node sharing one timestamp()) is applied once, not every cycle.
+    """
+
+    def __init__(self, index, driver, database=None, since=0, interval=60, overlap_ms=5000):
+        super().__init__(name="specialty-index-refresher", daemon=True)
+        self.index = index
+        self.driver = driver
+        self.database = database
+        self.watermark = since
+        self.interval = interval
+        self.overlap_ms = overlap_ms
+        self.last_refresh = None
+        self.last_error = None
+        self._applied = {}  # provider_id -> stamp applied, for the stamps inside the overlap window
+        self._stop_event = threading.Event()
+
+    # Function to patch the index once and advance the watermark
+    def refresh(self):
+        since = max(self.watermark - self.overlap_ms, 0)
+        with self.driver.session(database=self.database) as session:
+            records = list(session.run(CHANGED_ROWS_QUERY, since=since))
+
+        # Latest stamp of each provider, over its own stamp and its specialties'
+        stamps = {}
+        for record in records:
+            for stamp in (record["provider_updated_at"], record["specialty_updated_at"]):
+                if stamp is not None:
+                    stamps[record["provider_id"]] = max(stamp, stamps.get(record["provider_id"], stamp))
+        fresh = [record for record in records
+                 if record["provider_id"] not in stamps
+                 or self._applied.get(record["provider_id"]) != stamps[record["provider_id"]]]
+        updated = self.index.apply_records(fresh)
+
+        if stamps:
+            self.watermark = max(self.watermark, max(stamps.values()))
+        horizon = self.watermark - self.overlap_ms
+        self._applied.update(stamps)
+        self._applied = {provider_id: stamp for provider_id, stamp in self._applied.items() if stamp >= horizon}
+        self.last_refresh = time.time()
+        return updated
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+                print(f"Error refreshing specialty index: {e}")
+
+    def stop(self):
+        self._stop_event.set()
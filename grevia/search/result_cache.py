@@ -0,0 +1,165 @@
+import hashlib
+import os
+import re
+import sys
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+import numpy as np
+
+# Step of the embedding quantization: embeddings closer than this in every coordinate share a key
+QUANTIZATION_STEP = 0.01
+
+
+# Function to reduce a query to its words, so "soil health" and "Soil health." share an entry
+def canonical_query(text):
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+
+# Function to hash a query embedding quantized to QUANTIZATION_STEP (after unit normalization)
+def embedding_key(query_embedding, step=QUANTIZATION_STEP):
+    vector = np.asarray(query_embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector = vector / norm
+    return hashlib.sha1(np.round(vector / step).astype(np.int16).tobytes()).hexdigest()
+
+
+# Marker file touched by loader scripts after writing to Neo4j: every search process on this machine
+# (the API and the Streamlit app) drops its cached results when the file's modification time changes
+INVALIDATION_PATH = os.getenv(
+    "RESULT_CACHE_INVALIDATION_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "cache",
+                 "result_cache.invalidated"),
+)
+
+
+# Function to read the modification time of the invalidation marker (None before the first invalidation)
+def invalidation_stamp(path=INVALIDATION_PATH):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+# Function to make every search process drop its cached results, for loader scripts that wrote to
+# Neo4j: touches the invalidation marker and, when GREVIA_API_URL is set, asks that API (which may run
+# on another machine) to drop them right away. Returns whether the API answered.
+def invalidate_result_caches(api_url=None, timeout=10, path=INVALIDATION_PATH):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a"):
+        pass
+    now = time.time_ns()
+    os.utime(path, ns=(now, now))
+
+    api_url = api_url or os.getenv("GREVIA_API_URL")
+    if not api_url:
+        return False
+    request = urllib.request.Request(api_url.rstrip("/") + "/cache/invalidate", data=b"", method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=timeout):
+            pass
+    except OSError as e:
+        print(f"Could not invalidate the result cache of {api_url}: {e}")
+        return False
+    print(f"Invalidated the result cache of {api_url}.")
+    return True
+
+
+# Function to estimate the memory held by a list of result tuples, in bytes
+def results_size(results):
+    size = sys.getsizeof(results)
+    for result in results:
+        size += sys.getsizeof(result) + sum(sys.getsizeof(value) for value in result)
+    return size
+
+
+class ResultCache:
+    """In-memory LRU cache of search results shared by every session of the process.
+
+    Entries are keyed by the canonical query text or by the quantized query
+    embedding, plus the search options (top_k, backend, filters...). They
+    expire after ``ttl`` seconds, and all of them are dropped when the
+    ``generation`` passed to ``validate`` changes (a patch changed the index,
+    the graph's change watermark moved or a loader script touched the
+    invalidation marker) or on ``invalidate``.
+    """
+
+    def __init__(self, ttl=300, max_entries=10_000, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.generation = None
+        self._entries = OrderedDict()  # key -> (expires_at, results, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _drop(self, key):
+        self._bytes -= self._entries.pop(key)[2]
+
+    # Function to look results up (None on a miss or when the entry expired). count_miss=False
+    # is for a first lookup that may be followed by another one for the same search.
+    def get(self, key, count_miss=True):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self.clock():
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += count_miss
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[1])
+
+    # Function to store results under one or more keys (e.g. canonical text and embedding);
+    # the keys share one list, so its size is split between them
+    def put(self, keys, results):
+        results = list(results)
+        size = results_size(results) // max(len(keys), 1)
+        with self._lock:
+            expires_at = self.clock() + self.ttl
+            for key in keys:
+                if key in self._entries:
+                    self._drop(key)
+                self._entries[key] = (expires_at, results, size)
+                self._bytes += size
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    # Function to drop every entry when the data generation changed
+    def validate(self, generation):
+        with self._lock:
+            if generation == self.generation:
+                return
+            changed = self.generation is not None
+            self.generation = generation
+        if changed:
+            self.invalidate()
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "memory_bytes": self._bytes,
+                "invalidations": self.invalidations,
+                "ttl": self.ttl,
+            }
@@ -0,0 +1,158 @@
+import json
+import os
+import numpy as np
+
+from grevia.search.index import normalize_rows, top_k_indices
+
+# Cypher query returning the category of every categorized specialty (see part3AssignSpecToMacroCat.py)
+CATEGORY_QUERY = """
+MATCH (specialty:specialties__Specialty)-[:specialties__hasMicrocategory]->(micro:specialties__Microcategory)
+      -[:specialties__belongsToMacrocategory]->(macro:specialties__Macrocategory)
+RETURN specialty.uri AS specialty_uri,
+       micro.rdfs__label AS microcategory,
+       macro.rdfs__label AS macrocategory
+"""
+
+
+class CategoryRouter:
+    """Coarse-to-fine provider search over the macro/microcategory hierarchy.
+
+    A query is scored against the macrocategory centroids first, then
+    against the microcategory centroids of the ``n_macro`` best
+    macrocategories; only the specialty rows of the ``n_micro`` best
+    microcategories (plus uncategorized rows) are scored exactly. With
+    ``categories`` the search is exact within those macrocategories instead.
+    Same interface and result tuples as SpecialtyIndex; the row lists follow
+    patches of the index (checked through ``index.version``).
+    """
+
+    def __init__(self, index, macro_names, macro_centroids, micro_names, micro_centroids, micro_macro,
+                 specialty_micro, n_macro=3, n_micro=8):
+        self.index = index
+        self.macro_names = list(macro_names)
+        self.macro_pos = {name: i for i, name in enumerate(self.macro_names)}
+        self.macro_centroids = normalize_rows(np.asarray(macro_centroids, dtype=np.float32))
+        self.micro_names = list(micro_names)
+        self.micro_centroids = normalize_rows(np.asarray(micro_centroids, dtype=np.float32))
+        self.micro_macro = np.asarray(micro_macro, dtype=np.int64)
+        self.specialty_micro = dict(specialty_micro)
+        self.n_macro = n_macro
+        self.n_micro = n_micro
+        self._version = None
+
+    @classmethod
+    def from_assignments(cls, index, assignments, anchors=None, **params):
+        """Build the router from ``(specialty_uri, microcategory, macrocategory)`` rows.
+
+        Centroids come from ``anchors`` (the JSON written by
+        part2_mkEmbed_anchors.py: macro average embeddings and one embedding per
+        microcategory anchor) where available, otherwise from the mean of the
+        member specialty embeddings.
+        """
+        macro_names, micro_names, micro_macro, specialty_micro = [], [], [], {}
+        macro_pos, micro_pos = {}, {}
+        for specialty_uri, micro, macro in assignments:
+            if macro not in macro_pos:
+                macro_pos[macro] = len(macro_names)
+                macro_names.append(macro)
+            if micro not in micro_pos:
+                micro_pos[micro] = len(micro_names)
+                micro_names.append(micro)
+                micro_macro.append(macro_pos[macro])
+            specialty_micro[specialty_uri] = micro_pos[micro]
+
+        # Anchor embeddings of another size come from another embedding model: they are ignored
+        dimensions = index.dimensions
+        anchors = anchors or {}
+        macro_anchor = {
+            name: entry["macro_avg_embedding"]
+            for name, entry in anchors.items()
+            if len(entry["macro_avg_embedding"]) == dimensions
+        }
+        micro_anchor = {
+            anchor: embedding
+            for entry in anchors.values()
+            for anchor, embedding in zip(entry["anchors"], entry["anchor_embeddings"])
+            if len(embedding) == dimensions
+        }
+
+        # Member means, for categories without an anchor embedding
+        row_micro = np.array([specialty_micro.get(uri, -1) for uri in index.row_specialty], dtype=np.int64)
+        known = (row_micro >= 0) & (index.row_provider >= 0)
+        micro_sums = np.zeros((len(micro_names), dimensions), dtype=np.float32)
+        np.add.at(micro_sums, row_micro[known], index.matrix[known])
+        macro_sums = np.zeros((len(macro_names), dimensions), dtype=np.float32)
+        np.add.at(macro_sums, np.asarray(micro_macro, dtype=np.int64), micro_sums)
+
+        micro_centroids = np.array([
+            micro_anchor.get(name, micro_sums[i]) for i, name in enumerate(micro_names)
+        ], dtype=np.float32).reshape(-1, dimensions)
+        macro_centroids = np.array([
+            macro_anchor.get(name, macro_sums[i]) for i, name in enumerate(macro_names)
+        ], dtype=np.float32).reshape(-1, dimensions)
+        return cls(index, macro_names, macro_centroids, micro_names, micro_centroids, micro_macro,
+                   specialty_micro, **params)
+
+    @classmethod
+    def load(cls, index, driver, database=None, anchors_path=None, **params):
+        with driver.session(database=database) as session:
+            assignments = [
+                (record["specialty_uri"], record["microcategory"], record["macrocategory"])
+                for record in session.run(CATEGORY_QUERY)
+            ]
+        anchors = None
+        if anchors_path and os.path.exists(anchors_path):
+            with open(anchors_path, "r") as f:
+                anchors = json.load(f)
+        return cls.from_assignments(index, assignments, anchors, **params)
+
+    # Function to (re)build the row lists of every microcategory when the index changed
+    def _lists(self):
+        index = self.index
+        version = index.version
+        if self._version != version:
+            row_provider = index.row_provider
+            row_micro = np.array([self.specialty_micro.get(uri, -1) for uri in index.row_specialty],
+                                 dtype=np.int64)[:row_provider.shape[0]]
+            live = row_provider[:row_micro.shape[0]] >= 0
+            categorized = np.flatnonzero(live & (row_micro >= 0))
+            self._list_rows = categorized[np.argsort(row_micro[categorized], kind="stable")]
+            self._list_offsets = np.zeros(len(self.micro_names) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(row_micro[categorized], minlength=len(self.micro_names)),
+                      out=self._list_offsets[1:])
+            self._uncategorized = np.flatnonzero(live & (row_micro < 0))
+            self._version = version
+        return self._list_rows, self._list_offsets, self._uncategorized
+
+    # Function to pick the specialty rows to score for a normalized query
+    def candidate_rows(self, query, categories=None, n_macro=None, n_micro=None):
+        list_rows, list_offsets, uncategorized = self._lists()
+        if categories:
+            unknown = [name for name in categories if name not in self.macro_pos]
+            if unknown:
+                raise ValueError(f"Unknown categories: {', '.join(unknown)}")
+            micros = np.flatnonzero(np.isin(self.micro_macro, [self.macro_pos[name] for name in categories]))
+            extra = []
+        else:
+            macros = top_k_indices(self.macro_centroids @ query, n_macro or self.n_macro)
+            micros = np.flatnonzero(np.isin(self.micro_macro, macros))
+            micros = micros[top_k_indices(self.micro_centroids[micros] @ query, n_micro or self.n_micro)]
+            extra = [uncategorized]
+        slices = [list_rows[list_offsets[m]:list_offsets[m + 1]] for m in micros]
+        return np.concatenate(slices + extra) if slices or extra else np.empty(0, dtype=np.int64)
+
+    def _rows(self, query_embedding, categories, n_macro, n_micro):
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+        return self.candidate_rows(query, categories, n_macro, n_micro)
+
+    def top_specialties(self, query_embedding, top_k=5, categories=None, n_macro=None, n_micro=None):
+        rows = self._rows(query_embedding, categories, n_macro, n_micro)
+        return self.index.rank_rows_specialties(rows, query_embedding, top_k)
+
+    def top_providers(self, query_embedding, top_k=5, categories=None, aggregation="max", n_macro=None,
+                      n_micro=None):
+        rows = self._rows(query_embedding, categories, n_macro, n_micro)
+        return self.index.rank_rows(rows, query_embedding, top_k, aggregation)
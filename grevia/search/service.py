@@ -0,0 +1,508 @@
+import asyncio
+import os
+import threading
+import time
+
+import numpy as np
+
+from grevia.embeddings.batching import embed_texts
+from grevia.embeddings.embedders import OPENAI_EMBEDDING_DIMENSIONS, OPENAI_EMBEDDING_MODEL, create_embedder
+from grevia.embeddings.query_cache import QueryEmbeddingCache
+from grevia.search.ann import AnnSearch, load_or_build_ivf
+from grevia.search.geo import GeoIndex
+from grevia.search.index import AGGREGATIONS, SpecialtyIndex
+from grevia.search.lexical import BM25Index, load_or_build_bm25, reciprocal_rank_fusion
+from grevia.search.refresh import IndexRefresher, current_watermark
+from grevia.search.result_cache import (
+    INVALIDATION_PATH, ResultCache, canonical_query, embedding_key, invalidation_stamp,
+)
+from grevia.search.routing import CategoryRouter
+from grevia.search.vector_index import (
+    AsyncNeo4jExactSearch, AsyncNeo4jVectorSearch, Neo4jExactSearch, Neo4jVectorSearch,
+)
+
+EMBEDDING_MODEL = OPENAI_EMBEDDING_MODEL
+EMBEDDING_DIMENSIONS = OPENAI_EMBEDDING_DIMENSIONS
+BACKENDS = ("memory", "ann", "routed", "neo4j_vector", "neo4j_exact")
+# Backends scoring rows of the in-memory index exactly: they support every aggregation, category and location filters
+IN_MEMORY_BACKENDS = ("memory", "routed")
+# semantic: embeddings only; lexical: BM25 only (no embedding call); hybrid: both, fused with RRF;
+# auto: lexical for short exact-term queries (every term in the BM25 vocabulary), hybrid otherwise
+SEARCH_MODES = ("semantic", "lexical", "hybrid", "auto")
+AUTO_LEXICAL_MAX_TERMS = 2
+# Each ranking fused in hybrid mode holds this many times top_k candidates
+HYBRID_CANDIDATES = 4
+
+
+class ProviderSearchService:
+    """Long-lived provider search engine shared by every app session.
+
+    Owns the Neo4j driver, the (cached) query embedder and the search
+    backends. The in-memory index and the ANN index are loaded lazily on
+    first use and kept for the life of the process. Nothing here depends on
+    Streamlit, so the service can be driven from scripts, benchmarks or an
+    HTTP server. A prebuilt ``index`` can be passed in instead of loading it
+    from Neo4j; the ``a*`` methods are the async variants used by the API.
+    Text searches can also go through a BM25 index over provider names,
+    descriptions and specialty values (``mode``, see SEARCH_MODES), and be
+    restricted to macrocategories (``categories``) through the CategoryRouter
+    and to a location (``near``, a GeoFilter) through the GeoIndex. With
+    ``result_cache_ttl`` the results of text searches are cached for every
+    session (see ResultCache) until they expire or the data changes.
+    """
+
+    def __init__(self, driver, embedding_model, database=None, backend="memory",
+                 query_cache_path=None, matrix_path=None, refresh_interval=60,
+                 ann_index_path="cache/specialty_ivf.npz", ann_nprobe=16,
+                 index=None, async_driver=None, aggregation="max", mode="semantic",
+                 lexical_index_path="cache/bm25.npz", lexical=None, category_anchors_path=None, router=None,
+                 result_cache_ttl=0, result_cache_size=10_000, invalidation_path=INVALIDATION_PATH):
+        if aggregation not in AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation: {aggregation}")
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        self.driver = driver
+        self.async_driver = async_driver
+        self.database = database
+        self.backend = backend
+        self.aggregation = aggregation
+        self.mode = mode
+        self.lexical_index_path = lexical_index_path
+        self.category_anchors_path = category_anchors_path
+        self.matrix_path = matrix_path
+        self.refresh_interval = refresh_interval
+        self.ann_index_path = ann_index_path
+        self.ann_nprobe = ann_nprobe
+        self.embedding_model = embedding_model
+        self.query_cache = None
+        if query_cache_path:
+            self.query_cache = QueryEmbeddingCache(
+                embedding_model, getattr(embedding_model, "model", EMBEDDING_MODEL),
+                getattr(embedding_model, "dimensions", EMBEDDING_DIMENSIONS), query_cache_path,
+            )
+        self.result_cache = None
+        if result_cache_ttl:
+            self.result_cache = ResultCache(ttl=result_cache_ttl, max_entries=result_cache_size)
+        self.invalidation_path = invalidation_path
+        self._watermark = None
+        self._watermark_checked = None
+        self.refresher = None
+        self._index = index
+        self._ann = None
+        self._lexical = lexical
+        self._router = router
+        self._geo = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, **overrides):
+        from neo4j import AsyncGraphDatabase, GraphDatabase
+
+        # OpenAI by default, or the local ONNX encoder with EMBEDDING_BACKEND=local (the graph's
+        # embeddings must then come from the same model, see scripts_neo4j/reembed_specialties.py)
+        embedding_model = create_embedder(overrides.pop("embedding_backend", None))
+        auth = (os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD"))
+        driver = GraphDatabase.driver(os.getenv("NEO4J_URI"), auth=auth)
+        options = {
+            "database": os.getenv("DATABASE_NAME"),
+            "backend": os.getenv("SEARCH_BACKEND", "memory"),
+            "query_cache_path": os.getenv("QUERY_CACHE_PATH", "cache/query_embeddings.sqlite"),
+            "matrix_path": os.getenv("SPECIALTY_MATRIX_PATH"),
+            "refresh_interval": int(os.getenv("INDEX_REFRESH_SECONDS", "60")),
+            "ann_index_path": os.getenv("ANN_INDEX_PATH", "cache/specialty_ivf.npz"),
+            "ann_nprobe": int(os.getenv("ANN_NPROBE", "16")),
+            "aggregation": os.getenv("SEARCH_AGGREGATION", "max"),
+            "mode": os.getenv("SEARCH_MODE", "semantic"),
+            "lexical_index_path": os.getenv("LEXICAL_INDEX_PATH", "cache/bm25.npz"),
+            "category_anchors_path": os.getenv("CATEGORY_ANCHORS_PATH", "macro_anchors_with_avg_embeddings.json"),
+            "result_cache_ttl": float(os.getenv("RESULT_CACHE_TTL", "300")),
+            "result_cache_size": int(os.getenv("RESULT_CACHE_SIZE", "10000")),
+        }
+        if overrides.pop("use_async_driver", False):
+            options["async_driver"] = AsyncGraphDatabase.driver(os.getenv("NEO4J_URI"), auth=auth)
+        options.update(overrides)
+        return cls(driver, embedding_model, **options)
+
+    # Function to build a service that runs fully offline: fake embedder + synthetic catalog
+    @classmethod
+    def from_synthetic(cls, n_providers, latency=0.0, **options):
+        from grevia.embeddings.fake import FakeEmbeddingModel
+        from grevia.search.synthetic import SyntheticCatalog
+
+        catalog = SyntheticCatalog(n_providers)
+        index = SpecialtyIndex.from_records(catalog.records())
+        lexical = BM25Index.from_records(catalog.documents())
+        router = CategoryRouter.from_assignments(index, catalog.categories())
+        return cls(None, FakeEmbeddingModel(latency=latency), index=index, lexical=lexical, router=router,
+                   refresh_interval=0, **options)
+
+    # In-memory specialty index, loaded on first use and kept in sync by a background thread
+    @property
+    def index(self):
+        with self._lock:
+            if self._index is None:
+                since = current_watermark(self.driver, database=self.database)
+                self._index = SpecialtyIndex.load(self.driver, database=self.database, matrix_path=self.matrix_path)
+                if self.refresh_interval:
+                    self.refresher = IndexRefresher(self._index, self.driver, database=self.database,
+                                                    since=since, interval=self.refresh_interval)
+                    self.refresher.start()
+            return self._index
+
+    @property
+    def ann(self):
+        index = self.index
+        with self._lock:
+            if self._ann is None:
+                self._ann = AnnSearch(index, load_or_build_ivf(index, self.ann_index_path), nprobe=self.ann_nprobe)
+            return self._ann
+
+    # BM25 index, loaded from disk (or rebuilt when the graph changed) on first use
+    @property
+    def lexical(self):
+        with self._lock:
+            if self._lexical is None:
+                self._lexical = load_or_build_bm25(self.driver, self.lexical_index_path, database=self.database)
+            return self._lexical
+
+    # Macro/microcategory router over the in-memory index, loaded on first use
+    @property
+    def router(self):
+        index = self.index
+        with self._lock:
+            if self._router is None:
+                self._router = CategoryRouter.load(index, self.driver, database=self.database,
+                                                   anchors_path=self.category_anchors_path)
+            return self._router
+
+    # Grid index of the provider coordinates, rebuilt when the index was patched
+    @property
+    def geo(self):
+        index = self.index
+        with self._lock:
+            if self._geo is None or self._geo[0] != index.version:
+                self._geo = (index.version, GeoIndex.from_index(index))
+            return self._geo[1]
+
+    # Macrocategory names available as category filters
+    @property
+    def categories(self):
+        return sorted(self.router.macro_names)
+
+    # Function to check that a backend can run on this service (the Neo4j ones need a driver, which
+    # synthetic services have not)
+    def check_backend(self, backend=None):
+        backend = backend or self.backend
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown search backend: {backend}")
+        if backend in ("neo4j_vector", "neo4j_exact") and self.driver is None and self.async_driver is None:
+            raise ValueError(f"The {backend} backend needs a Neo4j driver")
+        return backend
+
+    def searcher(self, backend=None):
+        backend = backend or self.backend
+        if backend == "memory":
+            return self.index
+        if backend == "ann":
+            return self.ann
+        if backend == "routed":
+            return self.router
+        self.check_backend(backend)
+        if backend == "neo4j_vector":
+            return Neo4jVectorSearch(self.driver, database=self.database)
+        if backend == "neo4j_exact":
+            return Neo4jExactSearch(self.driver, database=self.database)
+        raise ValueError(f"Unknown search backend: {backend}")
+
+    # Function to embed a query, through the query cache when there is one
+    def embed_query(self, query):
+        if self.query_cache is not None:
+            return self.query_cache.embed_query(query)
+        return self.embedding_model.embed_query(query)
+
+    # Function to check the provider aggregation, category and location filters: only the backends
+    # scoring the in-memory rows exactly support more than max and unfiltered search
+    def check_aggregation(self, backend, aggregation, categories=None, near=None):
+        aggregation = aggregation or self.aggregation
+        if aggregation not in AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation: {aggregation}")
+        if aggregation != "max" and (backend or self.backend) not in IN_MEMORY_BACKENDS:
+            raise ValueError(f"Aggregation '{aggregation}' needs the memory or routed backend")
+        if categories and (backend or self.backend) not in IN_MEMORY_BACKENDS:
+            raise ValueError("Category filters need the memory or routed backend")
+        if near is not None and (backend or self.backend) not in IN_MEMORY_BACKENDS:
+            raise ValueError("Location filters need the memory or routed backend")
+        return aggregation
+
+    # Function to pick the specialty rows of the providers matching a location filter
+    # (and the categories, if any). The rows are selected before any scoring.
+    def filtered_rows(self, near, categories=None):
+        rows = self.index.provider_rows(self.geo.filter(near))
+        if categories:
+            rows = np.intersect1d(rows, self.router.candidate_rows(None, list(categories)), assume_unique=True)
+        return rows
+
+    # Function to find top providers, scored by aggregating their specialty similarities
+    # (the best specialty by default), or with per_provider=False the top specialty rows
+    # (a provider can then appear several times). categories restricts the search to
+    # specialties of those macrocategories, near to the providers around a location.
+    def find_top_providers(self, query_embedding, top_k=5, backend=None, per_provider=True, aggregation=None,
+                           categories=None, near=None, rows=None):
+        aggregation = self.check_aggregation(backend, aggregation, categories, near)
+        if near is not None:
+            if rows is None:
+                rows = self.filtered_rows(near, categories)
+            if not per_provider:
+                return self.index.rank_rows_specialties(rows, query_embedding, top_k)
+            return self.index.rank_rows(rows, query_embedding, top_k, aggregation)
+        options = {}
+        if categories:
+            searcher = self.router
+            options["categories"] = list(categories)
+        else:
+            searcher = self.searcher(backend)
+        if not per_provider:
+            return searcher.top_specialties(query_embedding, top_k, **options)
+        if aggregation != "max":
+            options["aggregation"] = aggregation
+        return searcher.top_providers(query_embedding, top_k, **options)
+
+    # Function to pick the mode of a text query (auto: lexical for short exact-term queries).
+    # BM25 knows neither categories nor locations, so these filters need the semantic mode.
+    def query_mode(self, query, mode=None, categories=None, near=None):
+        mode = mode or self.mode
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        if categories or near is not None:
+            if mode in ("lexical", "hybrid"):
+                raise ValueError(f"Category and location filters are not supported by the {mode} search mode")
+            return "semantic"
+        if mode == "auto":
+            short = len(query.split()) <= AUTO_LEXICAL_MAX_TERMS
+            return "lexical" if short and self.lexical.covers(query) else "hybrid"
+        return mode
+
+    # Function to tell the version of the searched data: the in-memory index version (bumped when a
+    # refresh changes rows), or else the graph's change watermark, polled every refresh_interval
+    # seconds; together with the time loader scripts last touched the invalidation marker
+    def data_generation(self):
+        return self._data_version(), invalidation_stamp(self.invalidation_path)
+
+    def _data_version(self):
+        if self._index is not None:
+            return self._index.version
+        if self.driver is None:
+            return None
+        now = time.monotonic()
+        if self._watermark_checked is None or (self.refresh_interval and
+                                               now - self._watermark_checked >= self.refresh_interval):
+            self._watermark = current_watermark(self.driver, database=self.database)
+            self._watermark_checked = now
+        return self._watermark
+
+    # Function to build the result cache key of a search: ("text", canonical query) or
+    # ("embedding", quantized embedding hash), followed by every option affecting the results
+    def result_key(self, kind, value, top_k, backend, per_provider, aggregation, mode, categories, near):
+        return (kind, value, top_k, backend or self.backend, per_provider, aggregation or self.aggregation, mode,
+                tuple(sorted(categories or ())), near)
+
+    # Function to look a search up in the result cache (None when disabled or on a miss)
+    def cached_results(self, key, count_miss=True):
+        if self.result_cache is None:
+            return None
+        self.result_cache.validate(self.data_generation())
+        return self.result_cache.get(key, count_miss)
+
+    def store_results(self, keys, results):
+        if self.result_cache is not None:
+            self.result_cache.put(keys, results)
+
+    # Function to drop every cached result (e.g. after a loader script wrote to Neo4j)
+    def invalidate_results(self):
+        if self.result_cache is not None:
+            self.result_cache.invalidate()
+
+    # Hit ratio and memory use of the result and query embedding caches
+    def cache_stats(self):
+        return {
+            "results": self.result_cache.stats() if self.result_cache is not None else None,
+            "query_embeddings": self.query_cache.stats() if self.query_cache is not None else None,
+        }
+
+    # Function to fuse the semantic ranking with the BM25 ranking of the same query. The RRF scores only
+    # order the results: each one carries the provider's semantic similarity, scored on the in-memory
+    # index for the providers found by BM25 alone
+    def fuse(self, query, query_embedding, semantic, top_k=5, aggregation=None):
+        candidates = max(top_k, len(semantic))
+        fused = reciprocal_rank_fusion([semantic, self.lexical.top_providers(query, candidates)], top_k)
+        similarity = {(result[1], result[2]): result[0] for result in semantic}
+        missing = [(result[1], result[2]) for result in fused if (result[1], result[2]) not in similarity]
+        if missing:
+            similarity.update(self.index.provider_similarities(query_embedding, missing,
+                                                               aggregation or self.aggregation))
+        return [(similarity.get((result[1], result[2]), 0.0),) + tuple(result[1:]) for result in fused]
+
+    # Results are cached by canonical query text, and semantic ones also by quantized
+    # embedding, so near-duplicate queries are answered without scoring again
+    def search(self, query, top_k=5, backend=None, per_provider=True, aggregation=None, mode=None,
+               categories=None, near=None):
+        mode = self.query_mode(query, mode, categories, near)
+        if mode != "semantic" and not per_provider:
+            raise ValueError(f"The {mode} search mode ranks providers, not specialty rows")
+        options = (top_k, backend, per_provider, aggregation, mode, categories, near)
+        keys = [self.result_key("text", canonical_query(query), *options)]
+        results = self.cached_results(keys[0], count_miss=mode != "semantic")
+        if results is not None:
+            return results
+        if mode == "lexical":
+            results = self.lexical.top_providers(query, top_k)
+        elif mode == "hybrid":
+            query_embedding = self.embed_query(query)
+            semantic = self.find_top_providers(query_embedding, HYBRID_CANDIDATES * top_k, backend, per_provider,
+                                               aggregation)
+            results = self.fuse(query, query_embedding, semantic, top_k, aggregation)
+        else:
+            query_embedding = self.embed_query(query)
+            keys.append(self.result_key("embedding", embedding_key(query_embedding), *options))
+            results = self.cached_results(keys[1])
+            if results is None:
+                results = self.find_top_providers(query_embedding, top_k, backend, per_provider, aggregation,
+                                                  categories, near)
+        self.store_results(keys, results)
+        return results
+
+    # Function to embed many queries in batched model calls, through the query cache when there is one
+    def embed_queries(self, queries, **batch_options):
+        if self.query_cache is not None:
+            return self.query_cache.embed_queries(queries, **batch_options)
+        vectors, errors = embed_texts(self.embedding_model, queries, **batch_options)
+        if errors:
+            raise RuntimeError(f"{len(errors)} embedding batches failed: {errors[0][1]}")
+        return vectors
+
+    # Function to find the top providers of many query embeddings. The in-memory index
+    # scores the whole batch with one matrix-matrix product; other backends loop.
+    # A location filter selects its rows once for the whole batch.
+    def find_top_providers_batch(self, query_embeddings, top_k=5, backend=None, per_provider=True,
+                                 aggregation=None, categories=None, near=None):
+        aggregation = self.check_aggregation(backend, aggregation, categories, near)
+        if not len(query_embeddings):
+            return []
+        if near is not None:
+            rows = self.filtered_rows(near, categories)
+            return [
+                self.find_top_providers(q, top_k, backend, per_provider, aggregation, categories, near, rows)
+                for q in query_embeddings
+            ]
+        searcher = self.searcher(backend)
+        if isinstance(searcher, SpecialtyIndex) and not categories:
+            if per_provider:
+                return searcher.top_providers_batch(query_embeddings, top_k, aggregation=aggregation)
+            return searcher.top_specialties_batch(query_embeddings, top_k)
+        return [
+            self.find_top_providers(q, top_k, backend, per_provider, aggregation, categories)
+            for q in query_embeddings
+        ]
+
+    # Function to check the options of a batch search before anything is searched (the API checks
+    # them before streaming results); returns the mode of every query
+    def check_search_batch(self, queries, top_k=5, backend=None, per_provider=True, aggregation=None, mode=None,
+                           categories=None, near=None):
+        modes = [self.query_mode(query, mode, categories, near) for query in queries]
+        if not per_provider and any(m != "semantic" for m in modes):
+            raise ValueError("Lexical and hybrid search modes rank providers, not specialty rows")
+        self.check_backend(backend)
+        self.check_aggregation(backend, aggregation, categories, near)
+        if categories:
+            unknown = [name for name in categories if name not in self.router.macro_pos]
+            if unknown:
+                raise ValueError(f"Unknown categories: {', '.join(unknown)}")
+        return modes
+
+    # Function to search many text queries: the ones needing embeddings are embedded and
+    # scored as one batch, lexical ones never reach the embedding model. Queries found in
+    # the result cache (by canonical text) are not searched again.
+    def search_batch(self, queries, top_k=5, backend=None, per_provider=True, aggregation=None, mode=None,
+                     categories=None, near=None):
+        modes = self.check_search_batch(queries, top_k, backend, per_provider, aggregation, mode, categories, near)
+        keys = [
+            self.result_key("text", canonical_query(query), top_k, backend, per_provider, aggregation, m,
+                            categories, near)
+            for query, m in zip(queries, modes)
+        ]
+        results = [self.cached_results(key) for key in keys]
+        pending = [i for i, r in enumerate(results) if r is None]
+        embedded = [i for i in pending if modes[i] != "lexical"]
+        candidates = HYBRID_CANDIDATES * top_k if "hybrid" in modes else top_k
+        vectors = self.embed_queries([queries[i] for i in embedded]) if embedded else []
+        semantic = self.find_top_providers_batch(vectors, candidates, backend, per_provider, aggregation,
+                                                 categories, near)
+        for i, vector, ranking in zip(embedded, vectors, semantic):
+            if modes[i] == "hybrid":
+                results[i] = self.fuse(queries[i], vector, ranking, top_k, aggregation)
+            else:
+                results[i] = ranking[:top_k]
+        for i in pending:
+            if modes[i] == "lexical":
+                results[i] = self.lexical.top_providers(queries[i], top_k)
+            self.store_results([keys[i]], results[i])
+        return results
+
+    async def aembed_query(self, query):
+        if self.query_cache is not None:
+            return await self.query_cache.aembed_query(query)
+        return await self.embedding_model.aembed_query(query)
+
+    async def afind_top_providers(self, query_embedding, top_k=5, backend=None, per_provider=True,
+                                  aggregation=None, categories=None, near=None):
+        backend = self.check_backend(backend)
+        if backend in ("neo4j_vector", "neo4j_exact") and self.async_driver is not None:
+            self.check_aggregation(backend, aggregation, categories, near)
+            search_class = AsyncNeo4jVectorSearch if backend == "neo4j_vector" else AsyncNeo4jExactSearch
+            searcher = search_class(self.async_driver, database=self.database)
+            if per_provider:
+                return await searcher.top_providers(query_embedding, top_k)
+            return await searcher.top_specialties(query_embedding, top_k)
+        # In-process backends are numpy work (which releases the GIL): run them off the event loop
+        return await asyncio.to_thread(self.find_top_providers, query_embedding, top_k, backend, per_provider,
+                                       aggregation, categories, near)
+
+    async def asearch(self, query, top_k=5, backend=None, per_provider=True, aggregation=None, mode=None,
+                      categories=None, near=None):
+        mode = await asyncio.to_thread(self.query_mode, query, mode, categories, near)
+        if mode != "semantic" and not per_provider:
+            raise ValueError(f"The {mode} search mode ranks providers, not specialty rows")
+        options = (top_k, backend, per_provider, aggregation, mode, categories, near)
+        keys = [self.result_key("text", canonical_query(query), *options)]
+        results = await asyncio.to_thread(self.cached_results, keys[0], mode != "semantic")
+        if results is not None:
+            return results
+        if mode == "lexical":
+            results = await asyncio.to_thread(self.lexical.top_providers, query, top_k)
+        else:
+            query_embedding = await self.aembed_query(query)
+            if mode == "semantic":
+                keys.append(self.result_key("embedding", embedding_key(query_embedding), *options))
+                results = await asyncio.to_thread(self.cached_results, keys[1])
+            if results is None:
+                candidates = HYBRID_CANDIDATES * top_k if mode == "hybrid" else top_k
+                results = await self.afind_top_providers(query_embedding, candidates, backend, per_provider,
+                                                         aggregation, categories, near)
+                if mode == "hybrid":
+                    results = await asyncio.to_thread(self.fuse, query, query_embedding, results, top_k,
+                                                      aggregation)
+        self.store_results(keys, results)
+        return results
+
+    def close(self):
+        if self.refresher is not None:
+            self.refresher.stop()
+        if self.query_cache is not None:
+            self.query_cache.close()
+        if self.driver is not None:
+            self.driver.close()
+
+    async def aclose(self):
+        if self.async_driver is not None:
+            await self.async_driver.close()
+        self.close()
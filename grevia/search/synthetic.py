@@ -0,0 +1,126 @@
+import numpy as np
+
+# Every synthetic node URI starts with this prefix, so they can be removed again
+SYNTHETIC_PREFIX = "http://example.org/synthetic/"
+
+
+class SyntheticCatalog:
+    """Random providers and specialties with clustered embeddings.
+
+    Specialty vectors are drawn around ``n_topics`` random centres so queries
+    have realistic near neighbours. Each provider links to
+    ``specialties_per_provider`` random specialties.
+    """
+
+    def __init__(self, n_providers, n_specialties=None, specialties_per_provider=3, dimensions=512,
+                 n_topics=64, seed=42):
+        rng = np.random.default_rng(seed)
+        self.n_providers = n_providers
+        self.n_specialties = n_specialties or max(1, n_providers * specialties_per_provider // 2)
+        self.dimensions = dimensions
+
+        centres = rng.standard_normal((n_topics, dimensions)).astype(np.float32)
+        self.specialty_topic = rng.integers(0, n_topics, self.n_specialties)
+        self.embeddings = centres[self.specialty_topic]
+        self.embeddings += 0.5 * rng.standard_normal((self.n_specialties, dimensions)).astype(np.float32)
+        self.provider_specialties = rng.integers(0, self.n_specialties, (n_providers, specialties_per_provider))
+        self.lat = rng.uniform(35.0, 60.0, n_providers)
+        self.lon = rng.uniform(-10.0, 30.0, n_providers)
+
+    def provider_uri(self, i):
+        return f"{SYNTHETIC_PREFIX}provider_{i}"
+
+    def specialty_uri(self, j):
+        return f"{SYNTHETIC_PREFIX}specialty_{j}"
+
+    # Function to yield rows shaped like the SpecialtyIndex query results
+    def records(self):
+        for i in range(self.n_providers):
+            info = {
+                "provider_id": self.provider_uri(i),
+                "name": f"Provider {i}",
+                "url": f"https://provider{i}.example.org",
+                "lat": float(self.lat[i]),
+                "lon": float(self.lon[i]),
+            }
+            for j in np.unique(self.provider_specialties[i]):
+                yield dict(info, specialty_uri=self.specialty_uri(j), embedding=self.embeddings[j])
+
+    # Function to yield (specialty_uri, microcategory, macrocategory) rows: one microcategory per
+    # topic, grouped eight by eight into macrocategories
+    def categories(self, topics_per_macro=8):
+        for j in range(self.n_specialties):
+            topic = int(self.specialty_topic[j])
+            yield self.specialty_uri(j), f"micro_{topic}", f"macro_{topic // topics_per_macro}"
+
+    # Function to yield provider texts shaped like the BM25Index query results
+    def documents(self):
+        for i in range(self.n_providers):
+            yield {
+                "provider_id": self.provider_uri(i),
+                "name": f"Provider {i}",
+                "url": f"https://provider{i}.example.org",
+                "lat": float(self.lat[i]),
+                "lon": float(self.lon[i]),
+                "description": "Synthetic provider working on "
+                               + " ".join(f"topic{self.specialty_topic[j]}" for j in self.provider_specialties[i]),
+                "specialty_values": [f"synthetic_{j}" for j in np.unique(self.provider_specialties[i])],
+            }
+
+    # Function to draw query vectors near random specialties
+    def queries(self, n, noise=0.8, seed=7):
+        rng = np.random.default_rng(seed)
+        picks = rng.integers(0, self.n_specialties, n)
+        noise = noise * rng.standard_normal((n, self.dimensions)).astype(np.float32)
+        return self.embeddings[picks] + noise
+
+    # Function to write the catalog into Neo4j with the same labels and properties as the real KG
+    def load_into_neo4j(self, driver, database=None, batch_size=1000):
+        with driver.session(database=database) as session:
+            for start in range(0, self.n_specialties, batch_size):
+                rows = [
+                    {"uri": self.specialty_uri(j), "value": f"synthetic_{j}",
+                     "embedding": self.embeddings[j].astype(float).tolist()}
+                    for j in range(start, min(start + batch_size, self.n_specialties))
+                ]
+                session.run(
+                    """
+                    UNWIND $rows AS row
+                    MERGE (s:Resource:specialties__Specialty {uri: row.uri})
+                    SET s.rdf__value = row.value, s.ns2__embedding_value = row.embedding
+                    """,
+                    rows=rows,
+                )
+            for start in range(0, self.n_providers, batch_size):
+                rows = [
+                    {"uri": self.provider_uri(i), "name": f"Provider {i}",
+                     "url": f"https://provider{i}.example.org",
+                     "lat": float(self.lat[i]), "lon": float(self.lon[i]),
+                     "specialties": [self.specialty_uri(j) for j in np.unique(self.provider_specialties[i])]}
+                    for i in range(start, min(start + batch_size, self.n_providers))
+                ]
+                session.run(
+                    """
+                    UNWIND $rows AS row
+                    MERGE (p:Resource:schema1__Organization {uri: row.uri})
+                    SET p.schema1__name = row.name, p.schema1__url = row.url,
+                        p.schema1__latitude = row.lat, p.schema1__longitude = row.lon
+                    WITH p, row
+                    UNWIND row.specialties AS specialty_uri
+                    MATCH (s:Resource {uri: specialty_uri})
+                    MERGE (p)-[:custom__hasSpecialty]->(s)
+                    """,
+                    rows=rows,
+                )
+
+
+# Function to delete every synthetic node from Neo4j
+def delete_synthetic_nodes(driver, database=None):
+    with driver.session(database=database) as session:
+        session.run(
+            """
+            MATCH (n:Resource) WHERE n.uri STARTS WITH $prefix
+            CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 10000 ROWS
+            """,
+            prefix=SYNTHETIC_PREFIX,
+        )
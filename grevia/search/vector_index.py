@@ -0,0 +1,150 @@
+import numpy as np
+
+VECTOR_INDEX_NAME = "specialty_embeddings"
+
+# Neo4j reports cosine scores as (1 + cosine) / 2; results are mapped back to cosine
+# so they are comparable with the in-memory index
+PROVIDER_MATCH = """
+CALL db.index.vector.queryNodes($index_name, $candidates, $embedding)
+YIELD node AS specialty, score
+MATCH (provider:schema1__Organization)-[:custom__hasSpecialty]->(specialty)
+"""
+
+# Exact variant without a vector index: every specialty is scored inside Neo4j
+# (vector.similarity.cosine, Neo4j 5.18+) and only the winning rows are returned.
+# ORDER BY ... LIMIT is planned as a streaming top-k (heap), so the provider table
+# is never materialized on either side.
+EXACT_MATCH = """
+MATCH (provider:schema1__Organization)-[:custom__hasSpecialty]->(specialty:specialties__Specialty)
+WHERE specialty.ns2__embedding_value IS :: LIST<FLOAT NOT NULL>
+  AND size(specialty.ns2__embedding_value) = size($embedding)
+WITH provider, vector.similarity.cosine(specialty.ns2__embedding_value, $embedding) AS score
+"""
+
+# Best specialty per provider, then the top_k providers
+BEST_PER_PROVIDER = """
+WITH provider, max(score) AS best
+ORDER BY best DESC
+LIMIT $top_k
+RETURN 2 * best - 1 AS similarity,
+       provider.schema1__name AS name,
+       provider.schema1__url AS url,
+       provider.schema1__latitude AS lat,
+       provider.schema1__longitude AS lon
+"""
+
+# Top specialty rows (a provider can appear several times)
+BEST_ROWS = """
+RETURN 2 * score - 1 AS similarity,
+       provider.schema1__name AS name,
+       provider.schema1__url AS url,
+       provider.schema1__latitude AS lat,
+       provider.schema1__longitude AS lon
+ORDER BY similarity DESC
+LIMIT $top_k
+"""
+
+TOP_PROVIDERS_QUERY = PROVIDER_MATCH + BEST_PER_PROVIDER
+TOP_SPECIALTIES_QUERY = PROVIDER_MATCH + BEST_ROWS
+EXACT_TOP_PROVIDERS_QUERY = EXACT_MATCH + BEST_PER_PROVIDER
+EXACT_TOP_SPECIALTIES_QUERY = EXACT_MATCH + BEST_ROWS
+
+
+# Function to create the vector index on specialty embeddings (they must be float-list properties)
+def create_vector_index(driver, database=None, dimensions=512, index_name=VECTOR_INDEX_NAME):
+    with driver.session(database=database) as session:
+        session.run(
+            f"""
+            CREATE VECTOR INDEX {index_name} IF NOT EXISTS
+            FOR (specialty:specialties__Specialty) ON (specialty.ns2__embedding_value)
+            OPTIONS {{indexConfig: {{
+                `vector.dimensions`: {int(dimensions)},
+                `vector.similarity_function`: 'cosine'
+            }}}}
+            """
+        )
+        session.run("CALL db.awaitIndexes(300)")
+
+
+class Neo4jVectorSearch:
+    """Provider search running inside Neo4j on its native vector index.
+
+    Same interface and result tuples as SpecialtyIndex. The index returns
+    specialty nodes, so ``oversample * top_k`` candidates are fetched and the
+    best specialty per provider is reduced on the server. Providers outside
+    the candidate set (e.g. without specialties) are not returned.
+    """
+
+    top_providers_query = TOP_PROVIDERS_QUERY
+    top_specialties_query = TOP_SPECIALTIES_QUERY
+
+    def __init__(self, driver, database=None, index_name=VECTOR_INDEX_NAME, oversample=10):
+        self.driver = driver
+        self.database = database
+        self.index_name = index_name
+        self.oversample = oversample
+
+    def _run(self, query, query_embedding, top_k):
+        embedding = np.asarray(query_embedding, dtype=float).tolist()
+        with self.driver.session(database=self.database) as session:
+            records = session.run(
+                query,
+                index_name=self.index_name,
+                candidates=max(top_k * self.oversample, top_k),
+                embedding=embedding,
+                top_k=top_k,
+            )
+            return [
+                (record["similarity"], record["name"], record["url"], record["lat"], record["lon"])
+                for record in records
+            ]
+
+    def top_providers(self, query_embedding, top_k=5):
+        return self._run(self.top_providers_query, query_embedding, top_k)
+
+    def top_specialties(self, query_embedding, top_k=5):
+        return self._run(self.top_specialties_query, query_embedding, top_k)
+
+
+class Neo4jExactSearch(Neo4jVectorSearch):
+    """Exact provider search inside Neo4j, without a vector index.
+
+    Every specialty embedding is scored on the server; the best specialty per
+    provider and the top_k are reduced there too, so only ``top_k`` rows
+    cross the wire. Needs float-list embeddings (Neo4j 5.18+).
+    """
+
+    top_providers_query = EXACT_TOP_PROVIDERS_QUERY
+    top_specialties_query = EXACT_TOP_SPECIALTIES_QUERY
+
+
+class AsyncNeo4jVectorSearch(Neo4jVectorSearch):
+    """Neo4jVectorSearch on the async Neo4j driver (AsyncGraphDatabase)."""
+
+    async def _run(self, query, query_embedding, top_k):
+        embedding = np.asarray(query_embedding, dtype=float).tolist()
+        async with self.driver.session(database=self.database) as session:
+            result = await session.run(
+                query,
+                index_name=self.index_name,
+                candidates=max(top_k * self.oversample, top_k),
+                embedding=embedding,
+                top_k=top_k,
+            )
+            return [
+                (record["similarity"], record["name"], record["url"], record["lat"], record["lon"])
+                async for record in result
+            ]
+
+    async def top_providers(self, query_embedding, top_k=5):
+        return await self._run(self.top_providers_query, query_embedding, top_k)
+
+    async def top_specialties(self, query_embedding, top_k=5):
+        return await self._run(self.top_specialties_query, query_embedding, top_k)
+
+
+class AsyncNeo4jExactSearch(AsyncNeo4jVectorSearch):
+    """Neo4jExactSearch on the async Neo4j driver."""
+
+    top_providers_query = EXACT_TOP_PROVIDERS_QUERY
+    top_specialties_query = EXACT_TOP_SPECIALTIES_QUERY
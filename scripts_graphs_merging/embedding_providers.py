@@ -1,23 +1,16 @@
 import os
-import json
-from rdflib import Graph, Namespace, Literal
+import sys
+from rdflib import Graph, Namespace
 from tqdm import tqdm
 from dotenv import load_dotenv
-from langchain_openai import OpenAIEmbeddings
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from grevia.embeddings import EmbeddingStore, create_embedder, embedding_literal
 # Load environment variables
 load_dotenv()
 
-# Retrieve OpenAI API Key
-openai_api_key = os.getenv("OPENAI_API_KEY")
-if not openai_api_key:
-    raise ValueError("OpenAI API key not set. Please set the OPENAI_API_KEY environment variable.")
-
-# Initialize OpenAI Embeddings
-embedding_model = OpenAIEmbeddings(
-    model="text-embedding-3-small",
-    openai_api_key=openai_api_key,
-    dimensions=512
-)
+# Initialize the embedding model (OpenAI, or the local ONNX encoder with EMBEDDING_BACKEND=local)
+embedding_model = create_embedder()
 
 # Load the final cleaned RDF graph
 file_path = "providers_graphV3.ttl"  # Input file
@@ -46,19 +39,28 @@ for s, p, o in graph.triples((None, schema1.description, None)):
 for s, p, o in graph.triples((None, rdf_ns.value, None)):
     parts_to_embed.append((s, rdf_ns.value, str(o)))
 
-# Generate embeddings and add them to the graph
-for subject, predicate, text in tqdm(parts_to_embed, desc="Embedding parts"):
-    try:
-        # Generate real embedding using OpenAI model
-        embedding = embedding_model.embed_documents([text])[0]
-        
-        # Create a unique embedding property name
-        embedding_key = f"embedding_{predicate.split('#')[-1]}"
-        
-        # Add the embedding to the graph
-        graph.add((subject, ns2[embedding_key], Literal(json.dumps(embedding))))
-    except Exception as e:
-        print(f"Error embedding text for subject {subject}: {e}")
+# Generate embeddings in deduplicated, token-budgeted batches sent concurrently;
+# texts already embedded by a previous run are read from the shared embedding store
+store = EmbeddingStore()
+texts = [text for _, _, text in parts_to_embed]
+with tqdm(total=len(set(texts)), desc="Embedding parts") as progress:
+    embeddings, errors = store.embed(embedding_model, texts, max_workers=4, progress=progress)
+print(store.report())
+
+for batch, e in errors:
+    print(f"Error embedding a batch of {len(batch)} texts: {e}")
+
+# Add the embeddings to the graph in input order
+for (subject, predicate, text), embedding in zip(parts_to_embed, embeddings):
+    if embedding is None:
+        print(f"Error embedding text for subject {subject}: no embedding returned")
+        continue
+
+    # Create a unique embedding property name
+    embedding_key = f"embedding_{predicate.split('#')[-1]}"
+
+    # Add the embedding to the graph
+    graph.add((subject, ns2[embedding_key], embedding_literal(embedding)))
 
 # Save the enriched graph
 graph.serialize(destination=output_path, format="turtle")
@@ -0,0 +1,35 @@
+import os
+import sys
+import argparse
+from rdflib import Graph
+from tqdm import tqdm
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from grevia.embeddings.codec import decode_embedding, embedding_literal, is_embedding_predicate
+
+# Rewrite every embedding literal of a Turtle KG (ns2:embedding_value, ns1:description, ...)
+# as compact base64 float32 literals, or back to the legacy JSON strings
+parser = argparse.ArgumentParser(description="Convert the embedding literals of a Turtle KG.")
+parser.add_argument("input_file")
+parser.add_argument("output_file")
+parser.add_argument("--format", choices=["base64", "json"], default="base64")
+args = parser.parse_args()
+
+graph = Graph()
+graph.parse(args.input_file, format="turtle")
+
+embedding_triples = [(s, p, o) for s, p, o in graph if is_embedding_predicate(p)]
+converted = 0
+for s, p, o in tqdm(embedding_triples, desc="Converting embeddings"):
+    vector = decode_embedding(o)
+    if vector is None:
+        print(f"Error decoding embedding for {s} {p}")
+        continue
+    literal = embedding_literal(vector, args.format)
+    if literal != o:
+        graph.remove((s, p, o))
+        graph.add((s, p, literal))
+        converted += 1
+
+graph.serialize(destination=args.output_file, format="turtle")
+print(f"Converted {converted} of {len(embedding_triples)} embeddings to {args.format}; saved to {args.output_file}")
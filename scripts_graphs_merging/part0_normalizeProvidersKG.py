@@ -1,12 +1,17 @@
+import os
+import sys
+import argparse
 from rdflib import Graph, Namespace, URIRef, Literal
 from rdflib.namespace import RDF, RDFS
 
-# Load the KG
-input_file = "C:/Users/Utente/neo4j-projects/grevia-project-neo4j/import_data/providersKG_embed.ttl"
-output_file = "providersKG_normalized.ttl"
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from grevia.pipeline import DATA_DIR
+from grevia.rdf import convert, load_graph, save_graph
 
-graph = Graph()
-graph.parse(input_file, format="turtle")
+# Normalize the specialty URIs and names of the providers KG. By default triples are streamed:
+# read a chunk at a time (Turtle, N-Triples or N-Quads), normalized and written as they come, so
+# memory stays flat whatever the size of the KG. Each chunk is parsed, normalized and formatted by
+# one of a pool of worker processes. --in-memory loads the whole graph as before.
 
 # Define Namespaces
 specialties = Namespace("http://example.org/specialties/")  # Add specialties prefix
@@ -35,28 +40,63 @@ def adjust_specialty_schema_name(uri, predicate, obj):
             return RDF.value, Literal(uri_str.replace("http://example.org/specialties/", ""))
     return predicate, obj
 
-# Create a new graph for the updated data
-normalized_graph = Graph()
-normalized_graph.bind("specialties", specialties)  # Bind specialties prefix
-normalized_graph.bind("custom", custom)
-normalized_graph.bind("schema1", schema1)
-normalized_graph.bind("ns1", ns1)  # Bind ns1 explicitly
-normalized_graph.bind("ns2", ns2)
-
-# Iterate through triples to normalize and adjust
-for s, p, o in graph:
+# Function to normalize one triple
+def normalize_triple(s, p, o):
     # Normalize specialty URIs
     if isinstance(s, URIRef):
         s = normalize_specialty_uri(s)
     if isinstance(o, URIRef):
         o = normalize_specialty_uri(o)
-    
+
     # Adjust schema1:name usage for specialties
     p, o = adjust_specialty_schema_name(s, p, o)
-    
-    # Add the normalized triple to the new graph
-    normalized_graph.add((s, p, o))
+    return s, p, o
+
+# Function to tell whether a normalized triple is about a specialty: merging the URI variants of a
+# specialty makes such triples repeat, so the writers keep them once (as the in-memory Graph does)
+def specialty_triple(s, p, o):
+    return str(s).startswith(str(specialties)) or (isinstance(o, URIRef) and str(o).startswith(str(specialties)))
+
+# Prefixes of the output
+namespaces = {
+    "specialties": specialties,
+    "custom": custom,
+    "schema1": schema1,
+    "ns1": ns1,
+    "ns2": ns2,
+    "rdf": RDF,
+    "rdfs": RDFS,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Normalize the specialty URIs and names of the providers KG.")
+    parser.add_argument("input_file", nargs="?", default=os.path.join(DATA_DIR, "providersKG_embed.ttl"))
+    parser.add_argument("output_file", nargs="?", default=os.path.join(DATA_DIR, "providersKG_normalized.ttl"),
+                        help="Output file (.ttl or .nt)")
+    parser.add_argument("--in-memory", action="store_true",
+                        help="Parse the whole KG into an rdflib Graph and serialize a normalized copy")
+    parser.add_argument("--workers", type=int, help="Parser/writer processes (default: one per core)")
+    args = parser.parse_args()
+    input_file = args.input_file
+    output_file = args.output_file
+
+    if args.in_memory:
+        graph = load_graph(input_file, args.workers)
+
+        # Create a new graph for the updated data
+        normalized_graph = Graph()
+        for prefix, namespace in namespaces.items():
+            normalized_graph.bind(prefix, namespace)
+
+        # Iterate through triples to normalize and adjust
+        for s, p, o in graph.triples((None, None, None)):
+            normalized_graph.add(normalize_triple(s, p, o))
+
+        # Save the updated graph
+        count = save_graph(normalized_graph, output_file)
+    else:
+        # Stream: the workers normalize each triple as it is read (graph names of N-Quads dropped); the
+        # specialty triples that normalize to the same triple are written once
+        count = convert(input_file, output_file, normalize_triple, args.workers, namespaces, dedupe=specialty_triple)
 
-# Save the updated graph
-normalized_graph.serialize(destination=output_file, format="turtle")
-print(f"Normalized KG saved to {output_file}")
+    print(f"Normalized KG ({count} triples) saved to {output_file}")
@@ -1,49 +1,62 @@
-import json
+import os
+import sys
+import argparse
 import numpy as np
-from rdflib import Graph, Namespace, URIRef
+from rdflib import Namespace, URIRef
 from rdflib.namespace import RDF, RDFS
 
-# Load providers KG with embeddings
-input_file = r"C:\Users\Utente\neo4j-projects\grevia-project-neo4j\import_data\providersKG_normalized.ttl"
-
-graph = Graph()
-graph.parse(input_file, format="turtle")
-
-# Define Namespaces
-schema1 = Namespace("http://schema.org/")
-custom = Namespace("http://example.org/custom/")
-specialties = Namespace("http://example.org/specialties/")  # Updated for specialties
-ns2 = Namespace("http://example.org/embedding#")
-
-# Initialize data structures for specialties and embeddings
-embeddings = []
-specialty_uris = []
-
-# Iterate through all specialties in the KG
-for s, p, o in graph.triples((None, RDF.type, specialties.Specialty)):
-    # Find the embedding for this specialty
-    for s2, p2, o2 in graph.triples((s, ns2.embedding_value, None)):
-        # Parse the embedding JSON and store it
-        try:
-            arr = json.loads(str(o2))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from grevia.embeddings import decode_embedding, save_embedding_matrix
+from grevia.pipeline import DATA_DIR
+from grevia.rdf import KGSnapshots
+
+
+# Function to run the extraction (called under the guard below, as the snapshot loader's worker processes
+# re-import this script on Windows)
+def main():
+    parser = argparse.ArgumentParser(description="Extract the specialty embeddings of the providers KG as a matrix.")
+    parser.add_argument("input_file", nargs="?", default=os.path.join(DATA_DIR, "providersKG_normalized.ttl"))
+    parser.add_argument("output_prefix", nargs="?", default=os.path.join(DATA_DIR, "providers_embeddings"),
+                        help="Writes <prefix>.npy and <prefix>_uris.json")
+    args = parser.parse_args()
+
+    # Load providers KG with embeddings (parsed in chunks by one process per core)
+    snapshots = KGSnapshots()
+    graph = snapshots.load(args.input_file)
+    print(snapshots.report())
+
+    # Define Namespaces
+    schema1 = Namespace("http://schema.org/")
+    custom = Namespace("http://example.org/custom/")
+    specialties = Namespace("http://example.org/specialties/")  # Updated for specialties
+    ns2 = Namespace("http://example.org/embedding#")
+
+    # Initialize data structures for specialties and embeddings
+    embeddings = []
+    specialty_uris = []
+
+    # Iterate through all specialties in the KG
+    for s, p, o in graph.triples((None, RDF.type, specialties.Specialty)):
+        # Find the embedding for this specialty
+        for s2, p2, o2 in graph.triples((s, ns2.embedding_value, None)):
+            # Decode the embedding (JSON or base64 float32 literal) and store it
+            arr = decode_embedding(o2)
+            if arr is None:
+                print(f"Error decoding embedding for {s}")
+                continue
             embeddings.append(arr)
             specialty_uris.append(str(s))
-        except json.JSONDecodeError as e:
-            print(f"Error decoding JSON for {s}: {e}")
 
-# Convert embeddings to a NumPy array for clustering
-X = np.array(embeddings)  # Shape: (num_specialties, embedding_dim)
-print(f"Extracted {len(specialty_uris)} specialties with embeddings.")
-print(f"Embedding matrix shape: {X.shape}")
+    # Convert embeddings to a float32 matrix for clustering
+    X = np.vstack(embeddings).astype(np.float32) if embeddings else np.zeros((0, 0), dtype=np.float32)
+    print(f"Extracted {len(specialty_uris)} specialties with embeddings.")
+    print(f"Embedding matrix shape: {X.shape}")
 
-# Save the extracted data to a JSON file for the clustering script
-output_data = {
-    "specialty_uris": specialty_uris,
-    "embeddings": embeddings
-}
+    # Save the matrix as float32 .npy plus a URI index, so downstream scripts can memory-map it
+    matrix_file, index_file = save_embedding_matrix(args.output_prefix, specialty_uris, X)
 
-output_file = r"C:\Users\Utente\neo4j-projects\grevia-project-neo4j\import_data\providers_embeddings.json"
-with open(output_file, "w") as f:
-    json.dump(output_data, f)
+    print(f"Extracted data saved to {matrix_file} and {index_file}")
 
-print(f"Extracted data saved to {output_file}")
+
+if __name__ == "__main__":
+    main()
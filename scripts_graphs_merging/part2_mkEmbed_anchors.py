@@ -1,24 +1,23 @@
 import os
+import sys
 import json
+import argparse
 from dotenv import load_dotenv
-from langchain_openai import OpenAIEmbeddings
-from tqdm import tqdm
 import numpy as np
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from grevia.embeddings import EmbeddingStore, create_embedder
+from grevia.pipeline import DATA_DIR
+
+parser = argparse.ArgumentParser(description="Embed the anchor terms of every macrocategory.")
+parser.add_argument("output_file", nargs="?", default=os.path.join(DATA_DIR, "macro_anchors_with_avg_embeddings.json"))
+args = parser.parse_args()
+
 # Load environment variables
 load_dotenv()
 
-# Retrieve OpenAI API Key
-openai_api_key = os.getenv("OPENAI_API_KEY")
-if not openai_api_key:
-    raise ValueError("OpenAI API key not set. Please set the OPENAI_API_KEY environment variable.")
-
-# Initialize OpenAI Embeddings
-embedding_model = OpenAIEmbeddings(
-    model="text-embedding-3-small",
-    openai_api_key=openai_api_key,
-    dimensions=512
-)
+# Initialize the embedding model (OpenAI, or the local ONNX encoder with EMBEDDING_BACKEND=local)
+embedding_model = create_embedder()
 
 macro_anchors = {
   "Agriculture & Crop Management": [
@@ -102,13 +101,22 @@ macro_anchors = {
   ]
 }
 
+# Embed all anchors at once; anchors embedded by a previous run are read from the shared store
+store = EmbeddingStore()
+all_anchors = [anchor for anchors in macro_anchors.values() for anchor in anchors]
+all_embeddings, errors = store.embed(embedding_model, all_anchors)
+if errors:
+    raise RuntimeError(f"Failed to embed {sum(len(batch) for batch, _ in errors)} anchors: {errors[0][1]}")
+print(store.report())
+
 # Prepare a dictionary to store the embeddings
 macro_anchors_embeddings = {}
 
-for macro_name, anchors in tqdm(macro_anchors.items(), desc="Embedding Macro Anchors"):
-    # Embed all anchors at once
-    anchor_embeddings = embedding_model.embed_documents(anchors)
-    
+offset = 0
+for macro_name, anchors in macro_anchors.items():
+    anchor_embeddings = all_embeddings[offset:offset + len(anchors)]
+    offset += len(anchors)
+
     # Compute average embedding for the macrocategory
     avg_embedding = np.mean(anchor_embeddings, axis=0).tolist()
     
@@ -120,7 +128,7 @@ for macro_name, anchors in tqdm(macro_anchors.items(), desc="Embedding Macro Anc
     }
 
 # Save the macro anchors embeddings to a JSON file
-output_file = "macro_anchors_with_avg_embeddings.json"
+output_file = args.output_file
 with open(output_file, "w") as f:
     json.dump(macro_anchors_embeddings, f, indent=2)
 
@@ -0,0 +1,89 @@
+import os
+import sys
+import json
+import argparse
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from grevia.pipeline import DATA_DIR, DEFAULT_STATE_PATH, REPO_DIR, Pipeline, Stage
+
+# Run the graph-merging workflow (part0 -> part1/part2/part3 -> Neo4j load -> backup) as one DAG.
+# Every stage declares the files it reads and writes; a stage whose script, arguments and inputs
+# are unchanged since its last successful run is skipped, so editing the anchors in part2 only reruns
+# part2 and the stages that use its output. Independent stages run concurrently.
+
+
+# Function to declare the stages over the files of data_dir
+def pipeline_stages(data_dir, workers=None):
+    def data(name):
+        return os.path.join(data_dir, name)
+
+    def script(path):
+        return os.path.join(REPO_DIR, path)
+
+    embedded_kg = data("providersKG_embed.ttl")
+    normalized_kg = data("providersKG_normalized.ttl")
+    matrix_prefix = data("providers_embeddings")
+    anchors = data("macro_anchors_with_avg_embeddings.json")
+    assignments = data("specialty_to_microcategory_assignment.json")
+    final_kg = data("providersKG_with_microcategories.ttl")
+    return [
+        Stage("normalize", script("scripts_graphs_merging/part0_normalizeProvidersKG.py"),
+              [embedded_kg, normalized_kg] + (["--workers", workers] if workers else []),
+              inputs=[embedded_kg], outputs=[normalized_kg]),
+        Stage("extract", script("scripts_graphs_merging/part1_extract_ProvidersSpec_embeddings.py"),
+              [normalized_kg, matrix_prefix], inputs=[normalized_kg],
+              outputs=[matrix_prefix + ".npy", matrix_prefix + "_uris.json"]),
+        Stage("anchors", script("scripts_graphs_merging/part2_mkEmbed_anchors.py"), [anchors], outputs=[anchors],
+              env=["EMBEDDING_BACKEND", "LOCAL_EMBEDDING_MODEL"]),
+        Stage("assign", script("scripts_graphs_merging/part3AssignSpecToMacroCat.py"),
+              [normalized_kg, assignments, final_kg], inputs=[normalized_kg, assignments], outputs=[final_kg]),
+        Stage("load", script("scripts_neo4j/load_providersKG.py"), [final_kg], inputs=[final_kg],
+              env=["NEO4J_URI", "DATABASE_NAME"]),
+        # The anchor embeddings are stored on the category nodes created by the load
+        Stage("load_anchors", script("scripts_neo4j/addEmbedToprovidersdb.py"), [anchors], inputs=[anchors],
+              after=["load"], env=["URI"]),
+        Stage("backup", script("scripts_neo4j/backup_greviaKG.py"), after=["load", "load_anchors"],
+              env=["NEO4J_DATABASE_DIR"]),
+    ]
+
+
+# Function to format an optional number for the report table
+def number(value, digits=1):
+    return "-" if value is None else f"{value:.{digits}f}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the graph-merging pipeline, skipping up-to-date stages.")
+    parser.add_argument("stages", nargs="*", help="Stages to bring up to date, with their upstream stages "
+                                                  "(default: all)")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Folder of the KG files (default: GREVIA_DATA_DIR)")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH, help="State file of the last runs")
+    parser.add_argument("--force", nargs="+", default=[], metavar="STAGE", help="Run these stages even if up to date")
+    parser.add_argument("--force-all", action="store_true", help="Run every selected stage")
+    parser.add_argument("--parallel", type=int, default=2, help="Stages run at the same time")
+    parser.add_argument("--workers", type=int, help="Parser/writer processes of the normalization")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the stages that would run")
+    parser.add_argument("--output", help="Write the per-stage report as JSON to this file")
+    args = parser.parse_intermixed_args()
+
+    # The scripts read .env themselves; load it here too so that the stage keys see the same values
+    load_dotenv()
+    pipeline = Pipeline(pipeline_stages(args.data_dir, args.workers), args.state)
+    force = list(pipeline.stages) if args.force_all else args.force
+    report = pipeline.run(args.stages, force, args.parallel, args.dry_run)
+
+    print(f"{'stage':<14}{'status':<9}{'seconds':>10}{'peak RSS MB':>13}")
+    for row in report:
+        if row["status"] == "skipped":
+            note = f"  (last run: {number(row['last_seconds'])} s, {number(row['last_peak_rss_mb'], 0)} MB)"
+        else:
+            note = ""
+        print(f"{row['stage']:<14}{row['status']:<9}{number(row['seconds']):>10}"
+              f"{number(row['peak_rss_mb'], 0):>13}{note}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "stages": report}, f, indent=2)
+    if any(row["status"] in ("failed", "blocked") for row in report):
+        sys.exit(1)
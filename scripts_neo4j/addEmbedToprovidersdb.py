@@ -4,8 +4,19 @@ import json
 from neo4j import GraphDatabase
 from tqdm import tqdm
 import os
+import sys
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from grevia.pipeline import DATA_DIR
+from grevia.search.result_cache import invalidate_result_caches
+
 # Path to JSON file with embeddings
-embedding_file = "C:/Users/Utente/neo4j-projects/grevia-project-neo4j/import_data/macro_anchors_with_avg_embeddings.json"
+parser = argparse.ArgumentParser(description="Store the macro/microcategory anchor embeddings on their Neo4j nodes.")
+parser.add_argument("embedding_file", nargs="?",
+                    default=os.path.join(DATA_DIR, "macro_anchors_with_avg_embeddings.json"))
+args = parser.parse_args()
+embedding_file = args.embedding_file
 
 # Neo4j connection details
 NEO4J_URI = os.getenv("URI")
@@ -29,7 +40,8 @@ def update_embeddings(tx, macro_name, macro_embedding, micro_embeddings):
     result = tx.run(
         """
         MATCH (macro:specialties__Macrocategory {rdfs__label: $macro_name})
-        SET macro.ns2__embedding_value = $macro_embedding
+        SET macro.ns2__embedding_value = $macro_embedding,
+            macro.custom__updatedAt = timestamp()
         RETURN macro.rdfs__label AS MacroLabel
         """,
         macro_name=macro_name,
@@ -43,7 +55,8 @@ def update_embeddings(tx, macro_name, macro_embedding, micro_embeddings):
         result = tx.run(
             """
             MATCH (micro:specialties__Microcategory {rdfs__label: $micro_anchor})
-            SET micro.ns2__embedding_value = $micro_embedding
+            SET micro.ns2__embedding_value = $micro_embedding,
+                micro.custom__updatedAt = timestamp()
             RETURN micro.rdfs__label AS MicroLabel
             """,
             micro_anchor=micro_anchor,
@@ -58,14 +71,16 @@ driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
 # Main process
 with driver.session(database="providersdb") as session:  # Specify your database name
     for macro_name, data in tqdm(embeddings_data.items(), desc="Loading embeddings"):
-        macro_embedding = json.dumps(data["macro_avg_embedding"])  # Convert to JSON string
+        # Stored as native float-list properties (no JSON parsing needed by readers)
+        macro_embedding = [float(x) for x in data["macro_avg_embedding"]]
         micro_embeddings = {
-            anchor: json.dumps(embedding)
+            anchor: [float(x) for x in embedding]
             for anchor, embedding in zip(data["anchors"], data["anchor_embeddings"])
         }
         session.write_transaction(update_embeddings, macro_name, macro_embedding, micro_embeddings)
 
 print("All embeddings successfully loaded into Neo4j.")
+invalidate_result_caches()
 
 # Close driver
 driver.close()
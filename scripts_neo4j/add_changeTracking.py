@@ -0,0 +1,42 @@
+import os
+import sys
+from neo4j import GraphDatabase
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from grevia.search.refresh import UPDATED_AT, CHANGE_TRACKING_INDEXES
+from grevia.search.result_cache import invalidate_result_caches
+
+# Load environment variables
+load_dotenv()
+
+# Neo4j connection details
+NEO4J_URI = os.getenv("NEO4J_URI")
+NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+DATABASE_NAME = os.getenv("DATABASE_NAME")
+
+# Initialize Neo4j driver
+driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
+
+with driver.session(database=DATABASE_NAME) as session:
+    # Create the indexes used by the app's incremental index refresh
+    for statement in CHANGE_TRACKING_INDEXES:
+        session.run(statement)
+
+    # Stamp providers and specialties that were loaded before change tracking existed
+    result = session.run(
+        f"""
+        MATCH (n)
+        WHERE (n:schema1__Organization OR n:specialties__Specialty) AND n.{UPDATED_AT} IS NULL
+        SET n.{UPDATED_AT} = timestamp()
+        RETURN count(n) AS stamped
+        """
+    )
+    print(f"Stamped {result.single()['stamped']} nodes with {UPDATED_AT}.")
+
+print("Change tracking ready.")
+invalidate_result_caches()
+
+# Close driver
+driver.close()
@@ -2,8 +2,20 @@ from neo4j import GraphDatabase
 import json
 from tqdm import tqdm
 import os
+import sys
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from grevia.pipeline import DATA_DIR
+from grevia.search.result_cache import invalidate_result_caches
+
 # Path to JSON file with location data
-json_file = "C:/Users/Utente/neo4j-projects/grevia-project-neo4j/import_data/JSONLike_gdf.json"
+parser = argparse.ArgumentParser(description="Store the provider locations of a GeoJSON file on their Neo4j nodes.")
+parser.add_argument("json_file", nargs="?", default=os.path.join(DATA_DIR, "JSONLike_gdf.json"))
+parser.add_argument("--database", default=os.getenv("DATABASE_NAME", "providersdb"))
+args = parser.parse_args()
+json_file = args.json_file
+DATABASE = args.database
 
 # Neo4j connection details
 NEO4J_URI = os.getenv("URI")
@@ -22,7 +34,8 @@ def update_location(tx, website, latitude, longitude):
     query = """
         MATCH (provider:schema1__Organization {schema1__url: $website})
         SET provider.schema1__latitude = $latitude,
-            provider.schema1__longitude = $longitude
+            provider.schema1__longitude = $longitude,
+            provider.custom__updatedAt = timestamp()
     """
     tx.run(query, website=website, latitude=float(latitude), longitude=float(longitude))
 
@@ -42,6 +55,7 @@ with driver.session(database=DATABASE) as session:  # Specify the database here
         session.write_transaction(update_location, website, latitude, longitude)
 
 print("Locations successfully updated in Neo4j.")
+invalidate_result_caches()
 
 # Close the driver
 driver.close()
@@ -1,18 +1,25 @@
 import os
+import sys
 import shutil
+import argparse
 from datetime import datetime
 
-# Paths
-neo4j_data_path = r"C:\Users\Utente\.Neo4jDesktop\relate-data\dbmss\dbms-f4acfeb5-9195-427b-b2ca-7f385fffaab4\data\databases\greviakg"
-backup_dir = r"C:\Users\Utente\neo4j-projects\grevia-project-neo4j\backups"
+# Paths (the database folder is under data/databases of the Neo4j DBMS)
+parser = argparse.ArgumentParser(description="Copy the Neo4j database folder to a timestamped backup folder.")
+parser.add_argument("--database-dir", default=os.getenv("NEO4J_DATABASE_DIR"),
+                    help="Neo4j database folder (default: NEO4J_DATABASE_DIR)")
+parser.add_argument("--backup-dir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backups"))
+args = parser.parse_args()
+neo4j_data_path = args.database_dir
+backup_dir = args.backup_dir
 
 # Timestamped backup folder
 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 backup_path = os.path.join(backup_dir, f"greviakg_backup_{timestamp}")
 
 # Copy the database folder
-if os.path.exists(neo4j_data_path):
+if neo4j_data_path and os.path.exists(neo4j_data_path):
     shutil.copytree(neo4j_data_path, backup_path)
     print(f"Backup completed: {backup_path}")
 else:
-    print("Neo4j database folder not found.")
+    sys.exit(f"Neo4j database folder not found: {neo4j_data_path} (set --database-dir or NEO4J_DATABASE_DIR)")
@@ -0,0 +1,77 @@
+import os
+import sys
+import argparse
+import numpy as np
+from neo4j import GraphDatabase
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from grevia.search import SpecialtyIndex, Neo4jExactSearch, Neo4jVectorSearch, create_vector_index
+from grevia.search.synthetic import SyntheticCatalog, delete_synthetic_nodes
+
+# Compare the Neo4j vector index search and the exact in-Cypher search with the
+# brute-force in-memory search.
+# Meant for a disposable local container, e.g.:
+#   docker run --rm -p 7687:7687 -e NEO4J_AUTH=neo4j/password neo4j:5
+parser = argparse.ArgumentParser(description="Check vector index results against brute force.")
+parser.add_argument("--synthetic", type=int, default=0,
+                    help="Load this many synthetic providers first (removed afterwards)")
+parser.add_argument("--queries", type=int, default=50)
+parser.add_argument("--top-k", type=int, default=5)
+parser.add_argument("--tolerance", type=float, default=1e-4)
+args = parser.parse_args()
+
+# Load environment variables
+load_dotenv()
+
+NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
+NEO4J_USERNAME = os.getenv("NEO4J_USERNAME", "neo4j")
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "password")
+DATABASE_NAME = os.getenv("DATABASE_NAME")
+
+driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
+
+catalog = None
+if args.synthetic:
+    catalog = SyntheticCatalog(args.synthetic)
+    catalog.load_into_neo4j(driver, database=DATABASE_NAME)
+    print(f"Loaded {catalog.n_providers} synthetic providers and {catalog.n_specialties} specialties.")
+
+try:
+    index = SpecialtyIndex.load(driver, database=DATABASE_NAME)
+    create_vector_index(driver, database=DATABASE_NAME, dimensions=index.dimensions)
+    backends = {
+        "vector index": Neo4jVectorSearch(driver, database=DATABASE_NAME),
+        "exact cypher": Neo4jExactSearch(driver, database=DATABASE_NAME),
+    }
+
+    if catalog is not None:
+        queries = catalog.queries(args.queries)
+    else:
+        rng = np.random.default_rng(0)
+        queries = index.matrix[rng.integers(0, len(index), args.queries)]
+        queries = queries + 0.05 * rng.standard_normal(queries.shape).astype(np.float32)
+
+    mismatches = 0
+    for name, backend in backends.items():
+        for method in ("top_providers", "top_specialties"):
+            for q in queries:
+                expected = getattr(index, method)(q, args.top_k)
+                actual = getattr(backend, method)(q, args.top_k)
+                same_scores = len(expected) == len(actual) and np.allclose(
+                    [e[0] for e in expected], [a[0] for a in actual], atol=args.tolerance
+                )
+                # Names may swap order only where scores tie within the tolerance
+                same_names = sorted(e[1] for e in expected) == sorted(a[1] for a in actual)
+                if not (same_scores and same_names):
+                    mismatches += 1
+                    print(f"Mismatch in {name} {method}:\n  brute force: {expected}\n  {name}: {actual}")
+            print(f"{name} {method}: checked {len(queries)} queries")
+finally:
+    if catalog is not None:
+        delete_synthetic_nodes(driver, database=DATABASE_NAME)
+    driver.close()
+
+if mismatches:
+    sys.exit(f"{mismatches} mismatching queries")
+print("Vector index and exact Cypher results match brute force.")
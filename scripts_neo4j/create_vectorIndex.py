@@ -0,0 +1,26 @@
+import os
+import sys
+from neo4j import GraphDatabase
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from grevia.search.vector_index import create_vector_index, VECTOR_INDEX_NAME
+
+# Load environment variables
+load_dotenv()
+
+# Neo4j connection details
+NEO4J_URI = os.getenv("NEO4J_URI")
+NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+DATABASE_NAME = os.getenv("DATABASE_NAME")
+
+# Initialize Neo4j driver
+driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
+
+# The vector index only covers float-list properties: run migrate_embeddingsToFloatLists.py first
+create_vector_index(driver, database=DATABASE_NAME, dimensions=512)
+print(f"Vector index '{VECTOR_INDEX_NAME}' is online.")
+
+# Close driver
+driver.close()
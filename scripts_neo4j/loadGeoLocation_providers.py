@@ -2,15 +2,26 @@ from neo4j import GraphDatabase
 import json
 from tqdm import tqdm
 import os
-file_path = "C:/Users/Utente/neo4j-projects/grevia-project-neo4j/import_data/JSONLike_gdf.json"
-print("Path exists:", os.path.exists(file_path))
-print("Absolute Path:", os.path.abspath(file_path))
+import sys
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from grevia.pipeline import DATA_DIR
+from grevia.search.result_cache import invalidate_result_caches
+
+parser = argparse.ArgumentParser(description="Store the provider locations of a GeoJSON file on their Neo4j nodes.")
+parser.add_argument("json_file", nargs="?", default=os.path.join(DATA_DIR, "JSONLike_gdf.json"))
+parser.add_argument("--database", default=os.getenv("DATABASE_NAME", "providersdb"))
+args = parser.parse_args()
+json_file = args.json_file
+print("Path exists:", os.path.exists(json_file))
+print("Absolute Path:", os.path.abspath(json_file))
 
 # Neo4j connection details
 NEO4J_URI = os.getenv("URI")
 NEO4J_USERNAME = os.getenv("USERNAME")
 NEO4J_PASSWORD = os.getenv("PWD")
-DATABASE_NAME = "providersdb"  # Specify the database
+DATABASE_NAME = args.database  # Specify the database
 
 # Load JSON file
 with open(json_file, "r") as f:
@@ -25,7 +36,8 @@ def update_location(tx, website, latitude, longitude):
         """
         MATCH (provider:schema1__Organization {schema1__url: $website})
         SET provider.schema1__latitude = $latitude,
-            provider.schema1__longitude = $longitude
+            provider.schema1__longitude = $longitude,
+            provider.custom__updatedAt = timestamp()
         """,
         website=website,
         latitude=latitude,
@@ -48,6 +60,7 @@ with driver.session(database=DATABASE_NAME) as session:  # Explicitly specify th
         session.write_transaction(update_location, website, latitude, longitude)
 
 print("Locations successfully updated in Neo4j.")
+invalidate_result_caches()
 
 # Close the driver
 driver.close()
@@ -0,0 +1,65 @@
+from rdflib_neo4j import Neo4jStoreConfig, Neo4jStore, HANDLE_VOCAB_URI_STRATEGY
+from rdflib import Graph, Namespace
+from neo4j import GraphDatabase
+from dotenv import load_dotenv
+import os
+import sys
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from grevia.pipeline import DATA_DIR
+from grevia.search.refresh import STAMP_ALL_QUERY, UPDATED_AT
+from grevia.search.result_cache import invalidate_result_caches
+
+# Load environment variables
+load_dotenv()
+
+parser = argparse.ArgumentParser(description="Import the providers KG into Neo4j.")
+parser.add_argument("input_file", nargs="?", default=os.path.join(DATA_DIR, "providersKG_with_microcategories.ttl"))
+parser.add_argument("--database", default=os.getenv("DATABASE_NAME", "providersdb"))
+args = parser.parse_args()
+
+# Neo4j connection details (loaded from environment variables)
+auth_data = {
+    'uri': os.getenv("NEO4J_URI"),
+    'database': args.database,
+    'user': os.getenv("NEO4J_USERNAME"),
+    'pwd': os.getenv("NEO4J_PASSWORD")
+}
+
+# Define prefixes (node labels and properties are named prefix__localName)
+prefixes = {
+    'specialties': Namespace('http://example.org/specialties/'),
+    'custom': Namespace('http://example.org/custom/'),
+    'schema1': Namespace('http://schema.org/'),
+    'ns1': Namespace('http://example.org/embedding#embedding_http://schema.org/'),
+    'ns2': Namespace('http://example.org/embedding#'),
+    'rdf': Namespace('http://www.w3.org/1999/02/22-rdf-syntax-ns#'),
+    'rdfs': Namespace('http://www.w3.org/2000/01/rdf-schema#'),
+    'xsd': Namespace('http://www.w3.org/2001/XMLSchema#')
+}
+
+# Configure Neo4j Store
+config = Neo4jStoreConfig(
+    auth_data=auth_data,
+    custom_prefixes=prefixes,
+    handle_vocab_uri_strategy=HANDLE_VOCAB_URI_STRATEGY.IGNORE,
+    batching=True
+)
+
+# Initialize the graph
+graph_store = Graph(store=Neo4jStore(config=config))
+
+# Parse and ingest the data
+graph_store.parse(args.input_file, format="ttl")
+graph_store.close(True)
+
+print(f"{args.input_file} successfully imported into Neo4j ({args.database}).")
+
+# Stamp the imported providers and specialties, so running apps reload their rows and drop cached results
+driver = GraphDatabase.driver(auth_data['uri'], auth=(auth_data['user'], auth_data['pwd']))
+with driver.session(database=args.database) as session:
+    stamped = session.run(STAMP_ALL_QUERY).single()["stamped"]
+print(f"Stamped {stamped} nodes with {UPDATED_AT}.")
+driver.close()
+invalidate_result_caches()
@@ -0,0 +1,66 @@
+import os
+import sys
+import argparse
+from neo4j import GraphDatabase
+from dotenv import load_dotenv
+from tqdm import tqdm
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from grevia.embeddings.codec import decode_embedding
+from grevia.search.result_cache import invalidate_result_caches
+
+# Convert embedding properties stored as JSON or base64 strings into native float-list properties
+parser = argparse.ArgumentParser(description="Store Neo4j embedding properties as native float lists.")
+parser.add_argument("--property", action="append", dest="properties",
+                    help="Embedding property to convert (repeatable, default ns2__embedding_value)")
+parser.add_argument("--batch-size", type=int, default=1000)
+args = parser.parse_args()
+properties = args.properties or ["ns2__embedding_value"]
+
+# Load environment variables
+load_dotenv()
+
+# Neo4j connection details
+NEO4J_URI = os.getenv("NEO4J_URI")
+NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+DATABASE_NAME = os.getenv("DATABASE_NAME")
+
+# Initialize Neo4j driver
+driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
+
+# Function to write a batch of converted vectors
+def write_vectors(tx, prop, rows):
+    tx.run(
+        f"""
+        UNWIND $rows AS row
+        MATCH (n) WHERE elementId(n) = row.id
+        SET n.`{prop}` = row.vector
+        """,
+        rows=rows,
+    )
+
+with driver.session(database=DATABASE_NAME) as session:
+    for prop in properties:
+        # Only string values need converting; float lists are already in the target form
+        records = session.run(
+            f"MATCH (n) WHERE n.`{prop}` IS NOT NULL RETURN elementId(n) AS id, n.`{prop}` AS value"
+        )
+        pending = [(record["id"], record["value"]) for record in records if isinstance(record["value"], str)]
+
+        converted = 0
+        for start in tqdm(range(0, len(pending), args.batch_size), desc=f"Converting {prop}"):
+            rows = []
+            for node_id, value in pending[start:start + args.batch_size]:
+                vector = decode_embedding(value)
+                if vector is None:
+                    print(f"Error decoding {prop} of node {node_id}")
+                    continue
+                rows.append({"id": node_id, "vector": vector.astype(float).tolist()})
+            session.execute_write(write_vectors, prop, rows)
+            converted += len(rows)
+        print(f"Converted {converted} {prop} values to float lists.")
+invalidate_result_caches()
+
+# Close driver
+driver.close()
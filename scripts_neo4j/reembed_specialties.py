@@ -0,0 +1,105 @@
+import os
+import sys
+import argparse
+from neo4j import GraphDatabase
+from dotenv import load_dotenv
+from tqdm import tqdm
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from grevia.embeddings import EMBEDDING_BACKENDS, EmbeddingStore, create_embedder
+from grevia.search.result_cache import invalidate_result_caches
+from grevia.search.vector_index import VECTOR_INDEX_NAME, create_vector_index
+
+# Rebuild the specialty embeddings (ns2__embedding_value, from each specialty's rdf__value) with another
+# embedding model, e.g. the local ONNX encoder, so the graph and the app's queries share one vector space.
+# Vectors are written as native float lists and stamped with custom__updatedAt. Running apps keep embedding
+# queries with their old model, so restart them with the matching EMBEDDING_BACKEND: until then their
+# refresher refuses the new vectors when the dimension differs, and logs why.
+parser = argparse.ArgumentParser(description="Re-embed the specialties of the graph with another embedding model.")
+parser.add_argument("--backend", choices=EMBEDDING_BACKENDS, default="local",
+                    help="Embedding backend (local: the ONNX model at LOCAL_EMBEDDING_MODEL)")
+parser.add_argument("--batch-size", type=int, default=1000, help="Specialties written per transaction")
+parser.add_argument("--max-workers", type=int, default=1,
+                    help="Concurrent embedding batches (the local model already uses every core)")
+args = parser.parse_args()
+
+# Load environment variables
+load_dotenv()
+
+# Neo4j connection details
+NEO4J_URI = os.getenv("NEO4J_URI")
+NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+DATABASE_NAME = os.getenv("DATABASE_NAME")
+
+# Initialize Neo4j driver and the embedding model
+driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
+embedding_model = create_embedder(args.backend)
+print(f"Embedding model: {embedding_model.model} ({embedding_model.dimensions} dimensions)")
+
+
+# Function to turn an rdf__value property (a string or a list of strings) into the text to embed
+def specialty_text(value):
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(v) for v in value if v)
+    return str(value)
+
+
+# Function to write a batch of vectors
+def write_vectors(tx, rows):
+    tx.run(
+        """
+        UNWIND $rows AS row
+        MATCH (specialty) WHERE elementId(specialty) = row.id
+        SET specialty.ns2__embedding_value = row.vector,
+            specialty.custom__updatedAt = timestamp()
+        """,
+        rows=rows,
+    )
+
+
+with driver.session(database=DATABASE_NAME) as session:
+    records = session.run(
+        "MATCH (specialty:specialties__Specialty) WHERE specialty.rdf__value IS NOT NULL "
+        "RETURN elementId(specialty) AS id, specialty.rdf__value AS value"
+    )
+    specialties = [(record["id"], specialty_text(record["value"])) for record in records]
+print(f"{len(specialties)} specialties to embed.")
+
+# Texts already embedded with this model by a previous run are read from the embedding store
+store = EmbeddingStore()
+texts = [text for _, text in specialties]
+with tqdm(total=len(set(texts)), desc="Embedding specialties") as progress:
+    embeddings, errors = store.embed(embedding_model, texts, max_workers=args.max_workers, progress=progress)
+print(store.report())
+for batch, e in errors:
+    print(f"Error embedding a batch of {len(batch)} texts: {e}")
+
+rows = [
+    {"id": node_id, "vector": [float(v) for v in embedding]}
+    for (node_id, _), embedding in zip(specialties, embeddings)
+    if embedding is not None
+]
+with driver.session(database=DATABASE_NAME) as session:
+    for start in tqdm(range(0, len(rows), args.batch_size), desc="Writing embeddings"):
+        session.execute_write(write_vectors, rows[start:start + args.batch_size])
+
+    # The vector index is bound to a number of dimensions: recreate it for the new model
+    session.run(f"DROP INDEX {VECTOR_INDEX_NAME} IF EXISTS")
+create_vector_index(driver, database=DATABASE_NAME, dimensions=embedding_model.dimensions)
+print(f"Wrote {len(rows)} specialty embeddings; vector index '{VECTOR_INDEX_NAME}' recreated.")
+
+invalidate_result_caches()
+
+# Artifacts built from the old vectors
+ann_index_path = os.getenv("ANN_INDEX_PATH", "cache/specialty_ivf.npz")
+if os.path.exists(ann_index_path):
+    os.remove(ann_index_path)
+    print(f"Removed the stale ANN index {ann_index_path}.")
+if os.getenv("SPECIALTY_MATRIX_PATH"):
+    print("SPECIALTY_MATRIX_PATH still holds the old vectors: unset it or rebuild it with part1.")
+print("Next: run the app with EMBEDDING_BACKEND set to the same backend, and re-run "
+      "part2_mkEmbed_anchors.py with it to refresh the category anchors.")
+
+# Close driver
+driver.close()
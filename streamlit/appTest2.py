@@ -1,67 +1,21 @@
 import os
-import json
-import numpy as np
+import sys
 import streamlit as st
 from dotenv import load_dotenv
-from neo4j import GraphDatabase
-from langchain_openai import OpenAIEmbeddings
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from grevia.search import ProviderSearchService
 
 # Load environment variables
 load_dotenv()
 
-# OpenAI API setup using langchain-openai
-openai_api_key = os.getenv("OPENAI_API_KEY")
-if not openai_api_key:
-    raise ValueError("OpenAI API key not set. Please set the OPENAI_API_KEY environment variable.")
-
-embedding_model = OpenAIEmbeddings(
-    model="text-embedding-3-small",
-    openai_api_key=openai_api_key,
-    dimensions=512
-)
-
-# Neo4j connection details
-NEO4J_URI = os.getenv("NEO4J_URI")
-NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
-NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
-DATABASE_NAME = os.getenv("DATABASE_NAME")
-
-# Initialize Neo4j driver
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
-
-# Function to embed query using langchain-openai
-def embed_query(query):
-    return embedding_model.embed_query(query)
-
-# Function to calculate cosine similarity
-def cosine_similarity(vec1, vec2):
-    vec1 = np.array(vec1)
-    vec2 = np.array(vec2)
-    return np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
-
-# Function to find top providers based on query
-def find_top_providers(query_embedding, top_k=5):
-    query = """
-    MATCH (provider:schema1__Organization)
-    OPTIONAL MATCH (provider)-[:custom__hasSpecialty]->(specialty:specialties__Specialty)
-    RETURN provider.schema1__name AS name,
-           provider.schema1__url AS url,
-           provider.schema1__description AS description,
-           specialty.ns2__embedding_value AS embedding
-    """
-    with driver.session(database=DATABASE_NAME) as session:
-        results = session.run(query)
-
-        matches = []
-        for record in results:
-            if record["embedding"]:
-                specialty_embedding = json.loads(record["embedding"])
-                similarity = cosine_similarity(query_embedding, specialty_embedding)
-                matches.append((similarity, record["name"], record["url"]))
+# Search service (Neo4j driver, query embedder, indexes and caches) created once
+# per process and shared by every session, instead of on every rerun
+@st.cache_resource(show_spinner=False)
+def load_search_service():
+    return ProviderSearchService.from_env()
 
-        # Sort matches by similarity and return top_k results
-        matches = sorted(matches, key=lambda x: x[0], reverse=True)[:top_k]
-        return matches
+service = load_search_service()
 
 # Set page config and add custom CSS
 st.set_page_config(page_title="Farmer's Semantic Search", page_icon="🌱", layout="wide")
@@ -129,12 +83,12 @@ with col2:
 if search_button:
     if query.strip():
         with st.spinner("Understanding your request..."):
-            query_embedding = embed_query(query)
-            top_providers = find_top_providers(query_embedding)
+            query_embedding = service.embed_query(query)
+            top_providers = service.find_top_providers(query_embedding, per_provider=False)
 
         if top_providers:
             st.markdown("### Top Matching Providers")
-            for idx, (similarity, name, url) in enumerate(top_providers, start=1):
+            for idx, (similarity, name, url, lat, lon) in enumerate(top_providers, start=1):
                 st.markdown(f'<div class="provider-card">', unsafe_allow_html=True)
                 st.markdown(f"<h4>{idx}. {name}</h4>", unsafe_allow_html=True)
                 st.markdown(f'<p class="score">Similarity Score: {similarity:.4f}</p>', unsafe_allow_html=True)
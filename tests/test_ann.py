@@ -0,0 +1,37 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from grevia.search import ProviderSearchService
+from grevia.search.ann import AnnSearch, IVFIndex, load_or_build_ivf
+
+
+def test_ann_search_matches_exact_top_provider():
+    service = ProviderSearchService.from_synthetic(300)
+    index = service.index
+    ann = AnnSearch(index, IVFIndex.build(index.matrix, nlist=8), nprobe=8)
+    query = index.matrix[0]
+    exact = index.top_providers(query, 5)
+    approx = ann.top_providers(query, 5)
+    assert len(approx) == 5
+    assert approx[0][0] >= exact[-1][0] - 1e-6
+
+
+def test_ann_backend_of_the_service(tmp_path):
+    service = ProviderSearchService.from_synthetic(300, ann_index_path=str(tmp_path / "ivf.npz"))
+    results = service.search("soil testing", top_k=3, backend="ann", mode="semantic")
+    assert len(results) == 3
+    assert os.path.exists(tmp_path / "ivf.npz")
+
+
+def test_saved_ivf_is_rebuilt_when_the_matrix_changes(tmp_path):
+    path = str(tmp_path / "ivf.npz")
+    index = ProviderSearchService.from_synthetic(300).index
+    engine = load_or_build_ivf(index, path, nlist=8)
+    assert load_or_build_ivf(index, path, nlist=8).fingerprint == engine.fingerprint
+
+    other = ProviderSearchService.from_synthetic(300).index
+    other.matrix[0] = np.roll(other.matrix[0], 1)
+    assert load_or_build_ivf(other, path, nlist=8).fingerprint != engine.fingerprint
@@ -0,0 +1,34 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from grevia.search import ProviderSearchService
+
+
+def test_hybrid_results_carry_the_semantic_similarity():
+    service = ProviderSearchService.from_synthetic(500)
+    query = "soil testing and carbon credits"
+    results = service.search(query, top_k=10, mode="hybrid")
+    assert len(results) == 10
+
+    index = service.index
+    scores = index.provider_scores(service.embed_query(query))
+    similarity = {index.providers[p][:2]: float(score) for p, score in enumerate(scores)}
+    for score, name, url, _, _ in results:
+        assert np.isclose(score, similarity[(name, url)], atol=1e-5)
+
+
+def test_providers_found_by_bm25_alone_are_scored_on_the_index():
+    service = ProviderSearchService.from_synthetic(500)
+    query = "topic21 soil"
+    query_embedding = service.embed_query(query)
+    results = service.fuse(query, query_embedding, [], top_k=5)
+    assert results
+
+    index = service.index
+    scores = index.provider_scores(query_embedding)
+    similarity = {index.providers[p][:2]: float(score) for p, score in enumerate(scores)}
+    for score, name, url, _, _ in results:
+        assert np.isclose(score, similarity[(name, url)], atol=1e-5)
@@ -0,0 +1,56 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from grevia.search.index import SpecialtyIndex
+from grevia.search.refresh import IndexRefresher
+
+
+class FakeSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, since=0):
+        return [record for record in self.driver.records
+                if max(record["provider_updated_at"] or 0, record["specialty_updated_at"] or 0) > since]
+
+
+class FakeDriver:
+    """Returns the stamped rows of ``records`` like CHANGED_ROWS_QUERY."""
+
+    def __init__(self, records):
+        self.records = records
+
+    def session(self, database=None):
+        return FakeSession(self)
+
+
+def record(provider, embedding, stamp):
+    return {"provider_id": provider, "name": provider, "url": None, "lat": None, "lon": None,
+            "specialty_uri": f"{provider}/specialty", "embedding": list(embedding),
+            "provider_updated_at": stamp, "specialty_updated_at": stamp}
+
+
+def test_bulk_stamp_is_applied_once():
+    rng = np.random.default_rng(0)
+    records = [record(f"p{i}", rng.normal(size=8), 1000) for i in range(100)]
+    index = SpecialtyIndex.from_records(records)
+    refresher = IndexRefresher(index, FakeDriver(records), since=0)
+
+    assert refresher.refresh() == 0
+    assert index.version == 0
+    assert refresher.refresh() == 0
+
+    records[0] = record("p0", rng.normal(size=8), 1001)
+    assert refresher.refresh() == 1
+    assert index.version == 1
+    assert refresher.refresh() == 0
+    assert index.version == 1
@@ -0,0 +1,20 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from grevia.search import ProviderSearchService, invalidate_result_caches
+
+
+def test_marker_invalidates_the_results_of_another_process(tmp_path):
+    path = str(tmp_path / "result_cache.invalidated")
+    service = ProviderSearchService.from_synthetic(200, result_cache_ttl=600, invalidation_path=path)
+
+    service.search("soil testing", mode="semantic")
+    service.search("soil testing", mode="semantic")
+    assert service.cache_stats()["results"]["hits"] == 1
+
+    invalidate_result_caches(api_url="", path=path)
+    service.search("soil testing", mode="semantic")
+    stats = service.cache_stats()["results"]
+    assert stats["hits"] == 1
+    assert stats["invalidations"] == 1